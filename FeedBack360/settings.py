@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,12 +45,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'project.middleware.RequestMetricsMiddleware',  # Per-view timing and SQL metrics
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'project.middleware.SessionRenewalMiddleware',  # Sliding session expiry without a write per request
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'project.middleware.LoginRequiredMiddleware',  # Add our custom middleware
 ]
@@ -143,11 +148,76 @@ MESSAGE_TAGS = {
     messages.ERROR: 'alert-danger',
 }
 
+# Messages travel in a signed cookie, so flashing one never touches the database
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Cache
+# Use a shared backend (e.g. Redis) in production so every gunicorn worker sees
+# the same notification counters; the local-memory cache is per process.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'feedback360'),
+    }
+}
+PER_PROCESS_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+SHARED_CACHE = CACHES['default']['BACKEND'] not in PER_PROCESS_CACHES
+
 # Session settings
+# SESSION_MODE picks where sessions live:
+#   cached_db      - cache in front of the database (default with a shared CACHE_BACKEND)
+#   cache          - cache only
+#   signed_cookies - stored in the browser, no server-side state
+#   db             - database only (default with the per-process cache)
+# cache and cached_db need a shared CACHE_BACKEND: with a per-process cache a
+# logout only clears the session in the worker that handled it.
+SESSION_ENGINES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'db': 'django.contrib.sessions.backends.db',
+}
+SESSION_MODE = os.environ.get('SESSION_MODE', 'cached_db' if SHARED_CACHE else 'db')
+if SESSION_MODE not in SESSION_ENGINES:
+    raise ImproperlyConfigured(
+        f"SESSION_MODE={SESSION_MODE!r} is not valid; use one of: {', '.join(SESSION_ENGINES)}"
+    )
+if SESSION_MODE in ('cache', 'cached_db') and not SHARED_CACHE:
+    raise ImproperlyConfigured(
+        f"SESSION_MODE={SESSION_MODE!r} needs a shared CACHE_BACKEND (e.g. Redis or Memcached); "
+        f"{CACHES['default']['BACKEND']} is per process"
+    )
+SESSION_ENGINE = SESSION_ENGINES[SESSION_MODE]
 SESSION_COOKIE_AGE = 86400  # 24 hours
-SESSION_SAVE_EVERY_REQUEST = True
-# Add this to ensure sessions are properly stored
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# Sessions are only rewritten when they change or get close to expiring
+# (project.middleware.SessionRenewalMiddleware), not on every request
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_RENEW_WINDOW = 3 * 3600  # Renew once less than 3 hours are left
+
+# Unread notification counters shown in the header
+NOTIFICACOES_CACHE_TIMEOUT = 300  # 5 minutes
+NOTIFICACOES_RECENTES = 5
+
+# Cached user totals shown in the admin user directory
+USUARIOS_TOTAIS_CACHE_TIMEOUT = 600  # 10 minutes
+
+# Admin dashboard statistics snapshot
+DASHBOARD_CACHE_TIMEOUT = 60  # 1 minute
+
+# Window used by the send_deadline_reminders command
+LEMBRETE_PRAZO_DIAS = 3
+
+# Period of received scores covered by the send_evaluation_digest command
+RESUMO_AVALIACOES_DIAS = 7
+
+# Request instrumentation (project.middleware.RequestMetricsMiddleware)
+METRICS_WINDOW = 1000  # Samples kept per view for the rolling percentiles
+METRICS_SLOW_REQUEST_MS = 500
+METRICS_SLOW_SAMPLE_RATE = 1.0  # Fraction of slow requests written to the log
+METRICS_SLOW_LOG = BASE_DIR / 'logs' / 'slow_requests.jsonl'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -180,6 +250,12 @@ else:
     EMAIL_HOST_USER = 'seu-email@gmail.com'  # Replace with your email
     EMAIL_HOST_PASSWORD = 'sua-senha-app'     # Use an app password generated from Google
 
+# Outgoing email queue (project.models.EmailPendente), drained by send_queued_emails
+EMAIL_FILA_MAX_TENTATIVAS = 5
+EMAIL_FILA_ESPERA = 60  # Seconds before the first retry, doubled after each failure
+EMAIL_FILA_ESPERA_MAXIMA = 3600  # 1 hour
+EMAIL_FILA_RESERVA = 300  # Seconds a worker holds a message it is sending
+
 # Default sender name and email
 DEFAULT_FROM_EMAIL = 'Sistema Feedback 360° <seu-email@gmail.com>'
 
@@ -0,0 +1,473 @@
+from collections import defaultdict
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Avg, Case, Count, F, IntegerField, Sum, Value, When
+
+from .models import FatoNota, Nota, ResumoCompetencia
+
+# Mapeia cada coluna da tabela de fatos para o caminho correspondente a partir de Nota
+DIMENSOES_FATO = {
+    "nota_origem_id": F("id"),
+    "avaliado_id": F("avaliacao__avaliado_aluno_id"),
+    "avaliador_id": F("avaliacao__avaliador_aluno_id"),
+    "atividade_id": F("avaliacao__atividade_id"),
+    "turma_id": F("avaliacao__atividade__turma_id"),
+    "disciplina_id": F("avaliacao__atividade__turma__disciplina_id"),
+    "curso_id": F("avaliacao__atividade__turma__disciplina__curso_id"),
+    "semestre_id": F("avaliacao__atividade__turma__semestre_id"),
+    "is_self_assessment": F("avaliacao__is_self_assessment"),
+}
+
+
+def _lotes(iteravel, tamanho):
+    iterador = iter(iteravel)
+    while lote := list(islice(iterador, tamanho)):
+        yield lote
+
+
+def registrar_fatos(notas_qs, batch_size=1000):
+    """
+    Insere na tabela de fatos as linhas correspondentes às notas informadas
+
+    Notas que já possuem fato são ignoradas, então a função pode ser chamada
+    novamente sem duplicar linhas.
+
+    Args:
+        notas_qs (QuerySet): Notas de avaliações concluídas
+        batch_size (int): Quantidade de linhas por INSERT
+
+    Returns:
+        int: Quantidade de notas processadas
+    """
+    linhas = notas_qs.order_by().values(
+        "nota", "competencia_id", "dataAvaliacao", **DIMENSOES_FATO
+    )
+    total = 0
+    for lote in _lotes(linhas.iterator(chunk_size=batch_size), batch_size):
+        FatoNota.objects.bulk_create(
+            [FatoNota(**linha) for linha in lote], ignore_conflicts=True
+        )
+        total += len(lote)
+    return total
+
+
+def reconstruir_fatos(batch_size=1000):
+    """
+    Apaga e recria toda a tabela de fatos a partir das notas de avaliações concluídas
+
+    Returns:
+        int: Quantidade de linhas criadas
+    """
+    with transaction.atomic():
+        FatoNota.objects.all().delete()
+        return registrar_fatos(
+            Nota.objects.filter(avaliacao__concluida=True), batch_size
+        )
+
+
+def _origem(is_self_assessment):
+    return "auto" if is_self_assessment else "pares"
+
+
+def atualizar_resumos(avaliacao, notas):
+    """
+    Soma as notas de uma avaliação recém-concluída aos resumos do aluno avaliado
+
+    Deve ser chamada dentro da mesma transação que marca a avaliação como concluída.
+
+    Args:
+        avaliacao (Avaliacao): Avaliação concluída
+        notas (list): Notas registradas para a avaliação
+    """
+    chave = {
+        "aluno_id": avaliacao.avaliado_aluno_id,
+        "semestre_id": avaliacao.atividade.turma.semestre_id,
+        "origem": _origem(avaliacao.is_self_assessment),
+    }
+    ResumoCompetencia.objects.bulk_create(
+        [ResumoCompetencia(competencia_id=n.competencia_id, **chave) for n in notas],
+        ignore_conflicts=True,
+    )
+    for nota in notas:
+        ResumoCompetencia.objects.filter(
+            competencia_id=nota.competencia_id, **chave
+        ).update(soma=F("soma") + nota.nota, total=F("total") + 1)
+
+
+def atualizar_resumos_em_lote(incrementos, batch_size=1000):
+    """
+    Soma de uma vez os incrementos de várias avaliações recém-concluídas aos resumos
+
+    Em vez de um UPDATE por aluno e competência, os resumos que faltarem são
+    criados com um INSERT, os existentes são localizados com uma consulta e
+    recebem todos os incrementos em um único UPDATE com CASE (por lote de
+    `batch_size` linhas). Deve ser chamada dentro da transação que conclui as
+    avaliações.
+
+    Args:
+        incrementos (dict): {(aluno_id, competencia_id, semestre_id, origem): (soma, total)}
+        batch_size (int): Quantidade de resumos por INSERT e por UPDATE
+    """
+    if not incrementos:
+        return
+    campos = ("aluno_id", "competencia_id", "semestre_id", "origem")
+    ResumoCompetencia.objects.bulk_create(
+        [ResumoCompetencia(**dict(zip(campos, chave))) for chave in incrementos],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    chaves = list(zip(*incrementos))
+    linhas = ResumoCompetencia.objects.filter(
+        **{f"{campo}__in": set(valores) for campo, valores in zip(campos, chaves)}
+    ).values_list("pk", *campos)
+    por_pk = {
+        linha[0]: incrementos[linha[1:]] for linha in linhas if linha[1:] in incrementos
+    }
+    for lote in _lotes(por_pk.items(), batch_size):
+        ResumoCompetencia.objects.filter(pk__in=[pk for pk, _ in lote]).update(
+            soma=F("soma") + Case(
+                *[When(pk=pk, then=Value(soma)) for pk, (soma, _) in lote],
+                output_field=IntegerField(),
+            ),
+            total=F("total") + Case(
+                *[When(pk=pk, then=Value(total)) for pk, (_, total) in lote],
+                output_field=IntegerField(),
+            ),
+        )
+
+
+def calcular_resumos():
+    """
+    Recalcula os resumos a partir das notas das avaliações concluídas
+
+    Returns:
+        dict: {(aluno_id, competencia_id, semestre_id, origem): (soma, total)}
+    """
+    linhas = (
+        Nota.objects.filter(avaliacao__concluida=True)
+        .values(
+            "competencia_id",
+            aluno_id=F("avaliacao__avaliado_aluno_id"),
+            semestre_id=F("avaliacao__atividade__turma__semestre_id"),
+            is_self_assessment=F("avaliacao__is_self_assessment"),
+        )
+        .annotate(soma=Sum("nota"), total=Count("id"))
+        .order_by()
+    )
+    return {
+        (
+            linha["aluno_id"],
+            linha["competencia_id"],
+            linha["semestre_id"],
+            _origem(linha["is_self_assessment"]),
+        ): (linha["soma"], linha["total"])
+        for linha in linhas
+    }
+
+
+def reconciliar_resumos(corrigir=False, batch_size=1000):
+    """
+    Compara os resumos armazenados com os valores recalculados a partir das notas
+
+    Args:
+        corrigir (bool): Se True, regrava todos os resumos quando houver divergência
+        batch_size (int): Quantidade de linhas por INSERT ao corrigir
+
+    Returns:
+        list: Tuplas (chave, armazenado, esperado) para cada resumo divergente
+    """
+    esperado = calcular_resumos()
+    armazenado = {
+        (aluno_id, competencia_id, semestre_id, origem): (soma, total)
+        for aluno_id, competencia_id, semestre_id, origem, soma, total in (
+            ResumoCompetencia.objects.values_list(
+                "aluno_id", "competencia_id", "semestre_id", "origem", "soma", "total"
+            )
+        )
+    }
+    divergencias = [
+        (chave, armazenado.get(chave), esperado.get(chave))
+        for chave in sorted(esperado.keys() | armazenado.keys())
+        if armazenado.get(chave, (0, 0)) != esperado.get(chave, (0, 0))
+    ]
+
+    if corrigir and divergencias:
+        with transaction.atomic():
+            ResumoCompetencia.objects.all().delete()
+            ResumoCompetencia.objects.bulk_create(
+                [
+                    ResumoCompetencia(
+                        aluno_id=aluno_id,
+                        competencia_id=competencia_id,
+                        semestre_id=semestre_id,
+                        origem=origem,
+                        soma=soma,
+                        total=total,
+                    )
+                    for (aluno_id, competencia_id, semestre_id, origem), (
+                        soma,
+                        total,
+                    ) in esperado.items()
+                ],
+                batch_size=batch_size,
+            )
+
+    return divergencias
+
+
+def agregar_resumos(aluno):
+    """
+    Retorna os resumos do aluno no mesmo formato de `agregar_notas`
+
+    Args:
+        aluno (Aluno): Aluno avaliado
+
+    Returns:
+        list: Dicionários com competencia_id, semestre_id, ano, periodo,
+        is_self_assessment, soma e total
+    """
+    linhas = ResumoCompetencia.objects.filter(aluno=aluno).values(
+        "competencia_id",
+        "semestre_id",
+        "origem",
+        "soma",
+        "total",
+        ano=F("semestre__ano"),
+        periodo=F("semestre__periodo"),
+    )
+    return [
+        dict(linha, is_self_assessment=linha["origem"] == "auto") for linha in linhas
+    ]
+
+
+def agregar_notas(fatos_qs):
+    """
+    Agrupa as notas por competência, semestre e tipo de avaliação em uma única consulta
+
+    Args:
+        fatos_qs (QuerySet): Linhas de FatoNota já filtradas (por aluno, turma, etc.)
+
+    Returns:
+        list: Dicionários com competencia_id, semestre_id, ano, periodo,
+        is_self_assessment, soma e total
+    """
+    return list(
+        fatos_qs.values(
+            "competencia_id",
+            "semestre_id",
+            "is_self_assessment",
+            ano=F("semestre__ano"),
+            periodo=F("semestre__periodo"),
+        )
+        .annotate(soma=Sum("nota"), total=Count("id"))
+        .order_by()
+    )
+
+
+def _media(soma, total):
+    return float(soma) / total if total else 0
+
+
+def montar_chart_data(linhas, competencias):
+    """
+    Monta a evolução da média de cada competência por semestre
+
+    Args:
+        linhas (list): Resultado de `agregar_notas`
+        competencias (iterable): Competências na ordem de exibição
+
+    Returns:
+        dict: {nome_competencia: {"labels": [...], "data": [...]}}
+    """
+    por_competencia = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+    for linha in linhas:
+        chave = (linha["ano"], linha["periodo"])
+        acumulado = por_competencia[linha["competencia_id"]][chave]
+        acumulado[0] += linha["soma"]
+        acumulado[1] += linha["total"]
+
+    chart_data = {}
+    for competencia in competencias:
+        semestres = por_competencia.get(competencia.id)
+        if not semestres:
+            continue
+        chart_data[competencia.nome] = {"labels": [], "data": []}
+        for (ano, periodo), (soma, total) in sorted(semestres.items()):
+            chart_data[competencia.nome]["labels"].append(f"{ano}/{periodo}")
+            chart_data[competencia.nome]["data"].append(_media(soma, total))
+    return chart_data
+
+
+def montar_radar_data(linhas, competencias):
+    """
+    Monta a média geral e a média das auto-avaliações por competência
+
+    Args:
+        linhas (list): Resultado de `agregar_notas`
+        competencias (iterable): Competências na ordem de exibição
+
+    Returns:
+        dict: {"labels": [...], "media_geral": [...], "auto_avaliacao": [...]}
+    """
+    geral = defaultdict(lambda: [0, 0])
+    auto = defaultdict(lambda: [0, 0])
+    for linha in linhas:
+        destinos = [geral[linha["competencia_id"]]]
+        if linha["is_self_assessment"]:
+            destinos.append(auto[linha["competencia_id"]])
+        for acumulado in destinos:
+            acumulado[0] += linha["soma"]
+            acumulado[1] += linha["total"]
+
+    return {
+        "labels": [c.nome for c in competencias],
+        "media_geral": [_media(*geral[c.id]) for c in competencias],
+        "auto_avaliacao": [_media(*auto[c.id]) for c in competencias],
+    }
+
+
+def pivot_medias(fatos_qs, campo, chaves, competencias):
+    """
+    Calcula a matriz de médias competência × `campo` com um único GROUP BY
+
+    Args:
+        fatos_qs (QuerySet): Linhas de FatoNota já filtradas
+        campo (str): Dimensão das colunas (ex.: "turma_id" ou "disciplina_id")
+        chaves (list): Ids da dimensão na ordem das colunas
+        competencias (list): Competências na ordem das linhas
+
+    Returns:
+        numpy.ndarray: Matriz len(competencias) × len(chaves), com 0 onde não há notas
+    """
+    registros = (
+        fatos_qs.values("competencia_id", chave=F(campo))
+        .annotate(media=Avg("nota"))
+        .order_by()
+    )
+    df = pd.DataFrame.from_records(
+        list(registros), columns=["chave", "competencia_id", "media"]
+    )
+    tabela = df.pivot(index="competencia_id", columns="chave", values="media").reindex(
+        index=[c.id for c in competencias], columns=list(chaves)
+    )
+    return tabela.fillna(0).to_numpy(dtype=float)
+
+
+def perfis_de_competencia(alunos_ids, competencias_ids):
+    """
+    Monta a matriz aluno × competência com a média histórica das avaliações dos pares
+
+    Competências sem histórico para um aluno recebem a média da turma naquela
+    competência (ou 0 se ninguém tiver notas nela).
+
+    Args:
+        alunos_ids (list): Ids dos alunos, na ordem das linhas
+        competencias_ids (list): Ids das competências, na ordem das colunas
+
+    Returns:
+        numpy.ndarray: Matriz len(alunos_ids) × len(competencias_ids)
+    """
+    registros = (
+        ResumoCompetencia.objects.filter(
+            aluno_id__in=alunos_ids, competencia_id__in=competencias_ids, origem="pares"
+        )
+        .values("aluno_id", "competencia_id")
+        .annotate(soma=Sum("soma"), total=Sum("total"))
+        .order_by()
+    )
+    df = pd.DataFrame.from_records(
+        list(registros), columns=["aluno_id", "competencia_id", "soma", "total"]
+    )
+    df["media"] = df["soma"] / df["total"].where(df["total"] > 0)
+    tabela = df.pivot(index="aluno_id", columns="competencia_id", values="media").reindex(
+        index=list(alunos_ids), columns=list(competencias_ids)
+    )
+    return tabela.fillna(tabela.mean()).fillna(0).to_numpy(dtype=float)
+
+
+def balancear_grupos(perfis, tamanhos, semente=None, max_iteracoes=None):
+    """
+    Distribui os alunos em grupos com perfis médios de competência o mais parecidos possível
+
+    Parte de uma escolha alternada (serpentina) pela pontuação geral e depois
+    aplica busca local: a cada rodada avalia, de forma vetorizada, todas as trocas
+    de alunos entre grupos diferentes e aplica as que mais reduzem a soma dos
+    quadrados das distâncias entre a média de cada grupo e a média geral. As
+    competências são padronizadas para terem o mesmo peso.
+
+    Args:
+        perfis (numpy.ndarray): Matriz aluno × competência (ver `perfis_de_competencia`)
+        tamanhos (list): Quantidade de alunos de cada grupo (a soma deve ser o nº de alunos)
+        semente: Semente usada para desempatar alunos com a mesma pontuação (opcional)
+        max_iteracoes (int): Limite de rodadas de trocas (padrão: nº de alunos)
+
+    Returns:
+        list: Para cada grupo, a lista de índices das linhas de `perfis`
+    """
+    n = len(perfis)
+    tamanhos = np.asarray(tamanhos)
+    k = len(tamanhos)
+    desvio = perfis.std(axis=0)
+    X = (perfis - perfis.mean(axis=0)) / np.where(desvio > 0, desvio, 1)
+
+    # Initial assignment: serpentine draft by overall score
+    ordem = np.random.default_rng(semente).permutation(n)
+    ordem = ordem[np.argsort(-X[ordem].sum(axis=1), kind="stable")]
+    grupo = np.empty(n, dtype=int)
+    ocupacao = np.zeros(k, dtype=int)
+    rodada = 0
+    posicao = 0
+    while posicao < n:
+        sequencia = range(k) if rodada % 2 == 0 else range(k - 1, -1, -1)
+        for g in sequencia:
+            if posicao < n and ocupacao[g] < tamanhos[g]:
+                grupo[ordem[posicao]] = g
+                ocupacao[g] += 1
+                posicao += 1
+        rodada += 1
+
+    if k < 2:
+        return [list(range(n))]
+
+    somas = np.zeros((k, X.shape[1]))
+    np.add.at(somas, grupo, X)
+    normas = (X**2).sum(axis=1)
+    gram = X @ X.T
+    quadrados = normas[:, None] + normas[None, :] - 2 * gram
+    peso = 1.0 / tamanhos**2
+
+    for _ in range(max_iteracoes or n):
+        # Change in the objective for swapping students a and b:
+        # 2 (E_a - E_b)·(x_b - x_a) + |x_b - x_a|² (1/n_a² + 1/n_b²)
+        E = (somas / tamanhos[:, None])[grupo] / tamanhos[grupo][:, None]
+        P = E @ X.T
+        diagonal = np.diag(P)
+        delta = 2 * (P + P.T - diagonal[:, None] - diagonal[None, :])
+        delta += quadrados * (peso[grupo][:, None] + peso[grupo][None, :])
+        delta[grupo[:, None] == grupo[None, :]] = np.inf
+
+        # Swaps between disjoint pairs of groups do not interact, so every pass
+        # applies the best improving swap of as many group pairs as possible
+        melhores = delta.argmin(axis=1)
+        ganhos = delta[np.arange(n), melhores]
+        usados = np.zeros(k, dtype=bool)
+        trocas = 0
+        for a in np.argsort(ganhos):
+            if ganhos[a] >= -1e-9:
+                break
+            b = melhores[a]
+            ga, gb = grupo[a], grupo[b]
+            if usados[ga] or usados[gb]:
+                continue
+            usados[ga] = usados[gb] = True
+            somas[ga] += X[b] - X[a]
+            somas[gb] += X[a] - X[b]
+            grupo[a], grupo[b] = gb, ga
+            trocas += 1
+        if not trocas:
+            break
+
+    return [np.flatnonzero(grupo == g).tolist() for g in range(k)]
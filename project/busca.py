@@ -0,0 +1,91 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+LIMITE_PADRAO = 20
+LIMITE_MAXIMO = 50
+
+# Greater than any character, so [termo, termo + FIM) covers every string with that prefix
+FIM = "\U0010ffff"
+
+
+def codificar_cursor(chave, pk):
+    """Gera o cursor opaco que aponta para depois do item (`chave`, `pk`)"""
+    return base64.urlsafe_b64encode(json.dumps([chave, pk]).encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    """
+    Lê um cursor gerado por `codificar_cursor`
+
+    Returns:
+        tuple: (chave, pk) do último item da página anterior
+
+    Raises:
+        ValueError: Se o cursor estiver malformado
+    """
+    try:
+        chave, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Cursor inválido.")
+    if not isinstance(chave, str) or not isinstance(pk, int):
+        raise ValueError("Cursor inválido.")
+    return chave, pk
+
+
+def normalizar_limite(limite):
+    """Converte o limite pedido em um inteiro entre 1 e LIMITE_MAXIMO"""
+    try:
+        limite = int(limite)
+    except (TypeError, ValueError):
+        return LIMITE_PADRAO
+    return max(1, min(limite, LIMITE_MAXIMO))
+
+
+def buscar_por_prefixo(queryset, termo, campos, ordem, cursor=None, limite=LIMITE_PADRAO):
+    """
+    Busca por prefixo (sem diferenciar maiúsculas) com paginação por chave
+
+    O prefixo é comparado como intervalo sobre LOWER(campo), o que permite usar
+    os índices de expressão declarados nos modelos em vez de varrer a tabela, e
+    a página seguinte começa depois do último (LOWER(ordem), pk) devolvido, sem
+    OFFSET.
+
+    Args:
+        queryset (QuerySet): Registros visíveis para o usuário
+        termo (str): Prefixo digitado
+        campos (list): Campos comparados com o prefixo
+        ordem (str): Campo usado na ordenação e no cursor
+        cursor (str): Valor de `proximo` devolvido pela página anterior
+        limite (int): Quantidade máxima de itens na página
+
+    Returns:
+        tuple: (lista de objetos, cursor da próxima página ou None)
+
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    limite = normalizar_limite(limite)
+    queryset = queryset.annotate(_chave=Lower(ordem))
+
+    termo = (termo or "").strip().lower()
+    if termo:
+        filtro = Q()
+        for i, campo in enumerate(campos):
+            alias = f"_prefixo_{i}"
+            queryset = queryset.alias(**{alias: Lower(campo)})
+            filtro |= Q(**{f"{alias}__gte": termo, f"{alias}__lt": termo + FIM})
+        queryset = queryset.filter(filtro)
+
+    if cursor:
+        chave, pk = decodificar_cursor(cursor)
+        queryset = queryset.filter(Q(_chave__gt=chave) | Q(_chave=chave, pk__gt=pk))
+
+    itens = list(queryset.order_by("_chave", "pk")[: limite + 1])
+    proximo = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        proximo = codificar_cursor(itens[-1]._chave, itens[-1].pk)
+    return itens, proximo
@@ -1,5 +1,4 @@
-from .models import Avaliacao
-from .utils import obter_notificacoes_usuario
+from .utils import resumo_notificacoes
 
 def user_data(request):
     """
@@ -11,10 +10,10 @@ def user_data(request):
         'username': request.session.get('username'),
     }
     
-    # Adicionar notificações não lidas
+    # Adicionar notificações não lidas (contador e últimas mantidos em cache)
     if 'user_type' in request.session:
-        notificacoes = obter_notificacoes_usuario(request)
-        context['notificacoes_nao_lidas'] = notificacoes.filter(lida=False)
-        context['notificacoes_count'] = context['notificacoes_nao_lidas'].count()
+        resumo = resumo_notificacoes(context['user_type'], context['user_id'])
+        context['notificacoes_nao_lidas'] = resumo['recentes']
+        context['notificacoes_count'] = resumo['count']
     
     return context
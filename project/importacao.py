@@ -0,0 +1,307 @@
+import codecs
+import csv
+import io
+from itertools import chain, islice
+
+import pandas as pd
+from django.db import IntegrityError, transaction
+from openpyxl import load_workbook
+
+from .models import Aluno, Coordenador, Curso, Professor
+from .services import registrar_identidades
+from .utils import hash_password
+
+SENHA_PADRAO = "123456"
+
+# Formato de cada tipo de importação: colunas do arquivo e campos do modelo
+FORMATOS = {
+    "alunos": {
+        "tipo": "aluno",
+        "modelo": Aluno,
+        "campos": {
+            "nome": "nomeAluno",
+            "email": "emailAluno",
+            "matricula": "matricula",
+            "curso_id": "curso_id",
+        },
+        "senha": "senhaAluno",
+        "unicos": ["email", "matricula"],
+    },
+    "professores": {
+        "tipo": "professor",
+        "modelo": Professor,
+        "campos": {"nome": "nomeProf", "email": "emailProf"},
+        "senha": "senhaProf",
+        "unicos": ["email"],
+    },
+    "coordenadores": {
+        "tipo": "coordenador",
+        "modelo": Coordenador,
+        "campos": {"nome": "nomeCoord", "email": "emailCoord", "curso_id": "curso_id"},
+        "senha": "senhaCoord",
+        "unicos": ["email"],
+    },
+}
+
+EMAIL_REGEX = r"[^@\s]+@[^@\s]+\.[^@\s]+"
+
+TAMANHO_BLOCO = 1000
+
+
+def _detectar_codificacao(arquivo, amostra=64 * 1024):
+    """Retorna 'utf-8' se o início do arquivo for UTF-8 válido, senão 'latin1'"""
+    inicio = arquivo.read(amostra)
+    arquivo.seek(0)
+    try:
+        # A final incomplete multibyte sequence is not an error here
+        codecs.getincrementaldecoder("utf-8")().decode(inicio, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin1"
+
+
+def ler_csv_em_blocos(arquivo, tamanho=TAMANHO_BLOCO):
+    """
+    Lê um CSV em blocos de `tamanho` linhas sem carregar o arquivo inteiro
+
+    Args:
+        arquivo: Arquivo binário (ex.: UploadedFile)
+        tamanho (int): Quantidade de linhas por bloco
+
+    Yields:
+        DataFrame: Bloco de linhas com todas as colunas como texto
+    """
+    texto = io.TextIOWrapper(
+        arquivo, encoding=_detectar_codificacao(arquivo), newline=""
+    )
+    try:
+        yield from pd.read_csv(texto, dtype=str, chunksize=tamanho)
+    finally:
+        # Keep the upload open for Django to clean up
+        texto.detach()
+
+
+def _texto(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def ler_xlsx_em_blocos(arquivo, tamanho=TAMANHO_BLOCO):
+    """
+    Lê a primeira planilha de um XLSX em modo somente leitura, em blocos de linhas
+
+    Args:
+        arquivo: Arquivo binário (ex.: UploadedFile)
+        tamanho (int): Quantidade de linhas por bloco
+
+    Yields:
+        DataFrame: Bloco de linhas com todas as colunas como texto
+    """
+    planilha = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = planilha.active.iter_rows(values_only=True)
+        cabecalho = [_texto(c) for c in next(linhas, ())]
+        colunas = len(cabecalho)
+        # Blank rows are skipped, as pandas does for CSV
+        preenchidas = (
+            linha for linha in linhas if any(v is not None for v in linha)
+        )
+        while bloco := list(islice(preenchidas, tamanho)):
+            yield pd.DataFrame(
+                [
+                    [_texto(v) for v in linha[:colunas]]
+                    + [None] * (colunas - len(linha))
+                    for linha in bloco
+                ],
+                columns=cabecalho,
+                dtype="object",
+            )
+    finally:
+        planilha.close()
+
+
+class ImportacaoUsuarios:
+    """
+    Importa usuários de um DataFrame (ou de vários, em sequência) com validação vetorizada
+
+    Cada bloco recebido por `processar` é validado por inteiro com operações do
+    pandas; cursos e valores já cadastrados são consultados com poucos `IN` e as
+    linhas válidas são gravadas com bulk_create em transações de `batch_size`
+    linhas. Linhas rejeitadas entram no relatório com o número da linha no arquivo.
+    """
+
+    def __init__(self, import_type, batch_size=1000):
+        if import_type not in FORMATOS:
+            raise ValueError("Tipo de importação inválido.")
+        self.formato = FORMATOS[import_type]
+        self.batch_size = batch_size
+        self.senha_padrao = hash_password(SENHA_PADRAO)
+        self.cursos = set()
+        self.linhas_lidas = 0
+        self.importados = 0
+        self.erros = []
+
+    @property
+    def resultado(self):
+        """Relatório no formato esperado pelo template de importação"""
+        return {
+            "total": self.linhas_lidas,
+            "success": self.importados,
+            "failures": len(self.erros),
+            "errors": self.erros,
+        }
+
+    def processar(self, df):
+        """
+        Valida e grava um bloco de linhas do arquivo
+
+        Args:
+            df (DataFrame): Linhas lidas do arquivo, com cabeçalho
+
+        Returns:
+            int: Quantidade de usuários importados neste bloco
+        """
+        df = self._normalizar(df)
+        linhas = pd.Series(
+            range(self.linhas_lidas + 2, self.linhas_lidas + 2 + len(df)), index=df.index
+        )
+        self.linhas_lidas += len(df)
+
+        erro = self._validar(df)
+        for linha, mensagem in zip(linhas[erro.notna()], erro[erro.notna()]):
+            self.erros.append(f"Linha {linha}: {mensagem}")
+
+        validos = df[erro.isna()]
+
+        importados = 0
+        for inicio in range(0, len(validos), self.batch_size):
+            lote = validos.iloc[inicio : inicio + self.batch_size]
+            importados += self._gravar(lote, linhas[lote.index])
+        self.importados += importados
+        return importados
+
+    def _normalizar(self, df):
+        df = df.rename(columns=lambda c: str(c).strip().lower())
+        faltando = [c for c in self.formato["campos"] if c not in df.columns]
+        if faltando:
+            raise ValueError(
+                f"Colunas obrigatórias ausentes no arquivo: {', '.join(faltando)}"
+            )
+
+        df = df[list(self.formato["campos"])].reset_index(drop=True)
+        for coluna in df.columns:
+            df[coluna] = df[coluna].astype("string").str.strip().replace("", pd.NA)
+        return df
+
+    def _validar(self, df):
+        """Retorna uma Series com a mensagem de erro de cada linha (NA se válida)"""
+        erro = pd.Series(pd.NA, index=df.index, dtype="object")
+
+        def marcar(condicao, mensagem):
+            # Only the first problem found in a row is reported
+            condicao = condicao.fillna(False).astype(bool)
+            erro.mask(erro.isna() & condicao, mensagem, inplace=True)
+
+        for coluna in df.columns:
+            marcar(df[coluna].isna(), f"campo obrigatório ausente ({coluna})")
+
+        marcar(~df["email"].str.fullmatch(EMAIL_REGEX), "email inválido")
+
+        if "curso_id" in df.columns:
+            curso_ids = pd.to_numeric(df["curso_id"], errors="coerce")
+            inteiro = curso_ids.notna() & (curso_ids % 1 == 0)
+            marcar(~inteiro, "curso_id inválido")
+            df["curso_id"] = curso_ids.where(inteiro).astype("Int64")
+            self._carregar_cursos(df["curso_id"].dropna().unique())
+            marcar(~df["curso_id"].isin(list(self.cursos)), "curso inexistente")
+
+        for campo in self.formato["unicos"]:
+            valores = df[campo]
+            cadastrados = self._cadastrados(campo, valores.dropna().unique())
+            marcar(valores.isin(list(cadastrados)), f"já existe um cadastro com este {campo}")
+            # Earlier blocks are already committed, so only this block is checked
+            repetidos = valores.notna() & valores.duplicated(keep="first")
+            marcar(repetidos, f"{campo} aparece mais de uma vez no arquivo")
+
+        return erro
+
+    def _carregar_cursos(self, ids):
+        novos = [int(i) for i in ids if int(i) not in self.cursos]
+        for inicio in range(0, len(novos), self.batch_size):
+            self.cursos.update(
+                Curso.objects.filter(
+                    id__in=novos[inicio : inicio + self.batch_size]
+                ).values_list("id", flat=True)
+            )
+
+    def _cadastrados(self, campo, valores):
+        modelo = self.formato["modelo"]
+        campo_modelo = self.formato["campos"][campo]
+        valores = list(valores)
+        cadastrados = set()
+        for inicio in range(0, len(valores), self.batch_size):
+            cadastrados.update(
+                modelo.objects.filter(
+                    **{f"{campo_modelo}__in": valores[inicio : inicio + self.batch_size]}
+                ).values_list(campo_modelo, flat=True)
+            )
+        return cadastrados
+
+    def _gravar(self, lote, linhas):
+        modelo = self.formato["modelo"]
+        campos = self.formato["campos"]
+        usuarios = [
+            modelo(
+                **{campos[coluna]: valor for coluna, valor in registro.items()},
+                **{self.formato["senha"]: self.senha_padrao},
+            )
+            for registro in lote.astype(object).to_dict("records")
+        ]
+        try:
+            with transaction.atomic():
+                criados = modelo.objects.bulk_create(usuarios)
+                registrar_identidades(self.formato["tipo"], criados, self.batch_size)
+        except IntegrityError as e:
+            # Another request inserted a conflicting row after validation
+            self.erros.extend(
+                f"Linha {linha}: não foi possível gravar ({e})" for linha in linhas
+            )
+            return 0
+        return len(criados)
+
+
+def ler_matriculas(arquivo):
+    """
+    Lê a lista de matrículas de um CSV (coluna `matricula` ou a primeira coluna)
+
+    Args:
+        arquivo: Arquivo binário (ex.: UploadedFile)
+
+    Returns:
+        list: Matrículas na ordem do arquivo, sem repetições
+    """
+    texto = io.TextIOWrapper(
+        arquivo, encoding=_detectar_codificacao(arquivo), newline=""
+    )
+    try:
+        leitor = csv.reader(texto)
+        primeira = next(leitor, [])
+        cabecalho = [c.strip().lower() for c in primeira]
+        if "matricula" in cabecalho or "matrícula" in cabecalho:
+            coluna = cabecalho.index(
+                "matricula" if "matricula" in cabecalho else "matrícula"
+            )
+            linhas = leitor
+        else:
+            # No header: the first line is already a matrícula
+            coluna = 0
+            linhas = chain([primeira], leitor)
+        matriculas = (
+            linha[coluna].strip() for linha in linhas if len(linha) > coluna
+        )
+        return list(dict.fromkeys(m for m in matriculas if m))
+    finally:
+        texto.detach()
@@ -5,6 +5,7 @@ from project.models import (
     Turma, TurmaAluno, Semestre, Atividade, Grupo,
     Avaliacao, Competencia, Nota
 )
+from project.analytics import reconstruir_fatos, reconciliar_resumos
 import random
 from datetime import timedelta
 
@@ -204,4 +205,6 @@ class Command(BaseCommand):
                             
                             group_number += 1
         
+        reconstruir_fatos()
+        reconciliar_resumos(corrigir=True)
         self.stdout.write(self.style.SUCCESS('Demo data created successfully!'))
@@ -5,6 +5,7 @@ from project.models import (
     Turma, TurmaAluno, Semestre, Atividade, Grupo,
     Avaliacao, Competencia, Nota
 )
+from project.analytics import reconstruir_fatos, reconciliar_resumos
 from project.utils import hash_password
 import random
 from datetime import timedelta
@@ -222,6 +223,9 @@ class Command(BaseCommand):
                                                         dataAvaliacao=timezone.now() - timedelta(days=random.randint(1, 5))
                                                     )
         
+        reconstruir_fatos()
+        reconciliar_resumos(corrigir=True)
+
         self.stdout.write("")
         self.stdout.write(self.style.SUCCESS('Dados de teste criados com sucesso!'))
         self.stdout.write("")
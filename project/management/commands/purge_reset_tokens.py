@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from project.services import purgar_tokens_redefinicao
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired or already used password reset tokens in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Linhas por DELETE')
+
+    def handle(self, *args, **options):
+        total = purgar_tokens_redefinicao(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} tokens de redefinição removidos.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from project.analytics import reconstruir_fatos
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the denormalized grade fact table (FatoNota) from Nota rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Linhas por INSERT')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Reconstruindo tabela de fatos de notas...')
+        total = reconstruir_fatos(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} notas carregadas na tabela de fatos.'))
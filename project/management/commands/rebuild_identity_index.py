@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from project.services import reconstruir_identidades
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the unified identity index (Identidade) from the four user models'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Linhas por INSERT')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Reconstruindo índice de identidades...')
+        total = reconstruir_identidades(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} usuários carregados no índice de identidades.'))
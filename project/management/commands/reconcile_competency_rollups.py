@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from project.analytics import reconciliar_resumos
+
+
+class Command(BaseCommand):
+    help = 'Recomputes per-student competency rollups from Nota rows and reports drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Regrava os resumos divergentes')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Verificando resumos por competência...')
+        divergencias = reconciliar_resumos(corrigir=options['fix'])
+
+        if not divergencias:
+            self.stdout.write(self.style.SUCCESS('Nenhuma divergência encontrada.'))
+            return
+
+        for (aluno_id, competencia_id, semestre_id, origem), armazenado, esperado in divergencias:
+            self.stdout.write(
+                f'Aluno {aluno_id}, competência {competencia_id}, semestre {semestre_id} ({origem}): '
+                f'armazenado={armazenado} esperado={esperado}'
+            )
+
+        if options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'{len(divergencias)} resumos corrigidos.'))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'{len(divergencias)} resumos divergentes. Use --fix para corrigir.'
+            ))
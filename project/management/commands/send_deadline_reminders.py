@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from project.services import enviar_lembretes_de_prazo
+
+
+class Command(BaseCommand):
+    help = 'Sends one aggregated reminder to each student with pending evaluations for activities due soon (meant for cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias', type=int, default=settings.LEMBRETE_PRAZO_DIAS,
+            help='Considera atividades com entrega entre hoje e hoje + DIAS'
+        )
+        parser.add_argument('--email', action='store_true', help='Também envia um email de resumo')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Alunos por lote')
+
+    def handle(self, *args, **options):
+        hoje = timezone.localdate()
+        notificacoes, emails = enviar_lembretes_de_prazo(
+            hoje,
+            hoje + timedelta(days=options['dias']),
+            email=options['email'],
+            batch_size=options['batch_size'],
+        )
+        mensagem = f'{notificacoes} lembretes enviados'
+        if options['email']:
+            mensagem += f' ({emails} emails)'
+        self.stdout.write(self.style.SUCCESS(f'{mensagem}.'))
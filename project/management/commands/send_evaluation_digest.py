@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from project.services import enviar_resumo_de_avaliacoes
+
+
+class Command(BaseCommand):
+    help = 'Emails each student a digest of pending evaluations and recently received scores (meant for cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias', type=int, default=settings.RESUMO_AVALIACOES_DIAS,
+            help='Inclui as notas recebidas nos últimos DIAS dias'
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='E-mails por chamada de send_messages')
+
+    def handle(self, *args, **options):
+        enviados = enviar_resumo_de_avaliacoes(
+            timezone.now() - timedelta(days=options['dias']),
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'{enviados} resumos enviados.'))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from project.services import enviar_emails_pendentes
+
+
+class Command(BaseCommand):
+    help = 'Sends the queued emails in batches over a single SMTP connection, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='E-mails reservados por vez')
+        parser.add_argument('--continuo', action='store_true', help='Continua rodando e verificando a fila')
+        parser.add_argument('--intervalo', type=int, default=10, help='Segundos entre verificações no modo contínuo')
+
+    def handle(self, *args, **options):
+        while True:
+            enviados, falhas = enviar_emails_pendentes(batch_size=options['batch_size'])
+            if enviados or falhas or not options['continuo']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'{enviados} e-mails enviados, {falhas} tentativas com falha.'
+                ))
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
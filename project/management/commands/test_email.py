@@ -58,9 +58,9 @@ class Command(BaseCommand):
             success = enviar_email_redefinicao_senha(user, user_type)
             
             if success:
-                self.stdout.write(self.style.SUCCESS(f'Password reset email sent to {email}'))
+                self.stdout.write(self.style.SUCCESS(f'Password reset email queued for {email} (run send_queued_emails to deliver it)'))
             else:
-                self.stdout.write(self.style.ERROR(f'Failed to send password reset email'))
+                self.stdout.write(self.style.ERROR(f'Failed to queue password reset email'))
             
         elif use_template:
             # Send HTML email with template
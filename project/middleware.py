@@ -1,3 +1,14 @@
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.db import connection
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.contrib import messages
@@ -25,17 +36,9 @@ class LoginRequiredMiddleware:
         # Code to be executed before the view
         path = request.path
         
-        # Print debugging information about the request
-        print(f"Request path: {path}")
-        if 'user_type' in request.session:
-            print(f"User type in session: {request.session['user_type']}")
-            print(f"User ID in session: {request.session.get('user_id')}")
-            print(f"Username in session: {request.session.get('username')}")
-        
         # Redirect django admin urls to our custom admin
         for admin_url, redirect_url in self.redirect_map.items():
             if path.startswith(admin_url):
-                print(f"Redirecting from {path} to {redirect_url}")
                 return redirect(redirect_url)
             
         # Check if the path should require authentication
@@ -52,3 +55,171 @@ class LoginRequiredMiddleware:
             if path.startswith(url):
                 return True
         return False
+
+
+
+class SessionRenewalMiddleware:
+    """
+    Sliding session expiry without SESSION_SAVE_EVERY_REQUEST.
+    
+    A logged-in session is only marked as modified (and therefore saved, with
+    a fresh cookie) when less than settings.SESSION_RENEW_WINDOW seconds of
+    its SESSION_COOKIE_AGE are left, so ordinary page views do not write to
+    the session store. Must come after SessionMiddleware.
+    """
+    RENEWED_AT = '_renewed_at'
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.renew_after = settings.SESSION_COOKIE_AGE - settings.SESSION_RENEW_WINDOW
+    
+    def __call__(self, request):
+        response = self.get_response(request)
+        
+        session = getattr(request, 'session', None)
+        if session is None or 'user_type' not in session:
+            return response
+        
+        now = int(time.time())
+        renewed_at = session.get(self.RENEWED_AT)
+        # A session that is being saved anyway gets its timestamp refreshed for free
+        if session.modified or renewed_at is None or now - renewed_at >= self.renew_after:
+            session[self.RENEWED_AT] = now
+        return response
+
+class ViewMetrics:
+    """
+    Rolling per-view statistics kept in memory by each worker process.
+    
+    Nothing is shared between processes: with several gunicorn workers each
+    one has its own window, and /custom-admin/metrics/ shows the numbers of
+    whichever worker served it (labelled with its PID). The slow request log
+    is the view across all workers.
+    """
+    def __init__(self, window):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.requests = defaultdict(int)
+    
+    def record(self, view_name, duration_ms, query_count, sql_ms):
+        with self.lock:
+            self.samples[view_name].append((duration_ms, query_count, sql_ms))
+            self.requests[view_name] += 1
+    
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.requests.clear()
+    
+    def snapshot(self):
+        """Return one row per view, sorted by total wall time in the window"""
+        with self.lock:
+            data = {view: list(samples) for view, samples in self.samples.items()}
+            requests = dict(self.requests)
+        
+        rows = []
+        for view_name, samples in data.items():
+            durations = sorted(sample[0] for sample in samples)
+            count = len(samples)
+            rows.append({
+                'view': view_name,
+                'requests': requests[view_name],
+                'window': count,
+                'p50': _percentile(durations, 50),
+                'p95': _percentile(durations, 95),
+                'p99': _percentile(durations, 99),
+                'avg_queries': sum(sample[1] for sample in samples) / count,
+                'avg_sql_ms': sum(sample[2] for sample in samples) / count,
+                'total_ms': sum(durations),
+            })
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    index = max(0, -(-len(sorted_values) * percent // 100) - 1)
+    return sorted_values[int(index)]
+
+
+view_metrics = ViewMetrics(getattr(settings, 'METRICS_WINDOW', 1000))
+
+_slow_logger = None
+_slow_logger_lock = threading.Lock()
+
+
+def get_slow_request_logger():
+    """
+    Logger whose records are written to the slow-request JSONL file by a
+    background thread, so request threads never block on disk I/O.
+    """
+    global _slow_logger
+    with _slow_logger_lock:
+        if _slow_logger is None:
+            path = settings.METRICS_SLOW_LOG
+            path.parent.mkdir(parents=True, exist_ok=True)
+            file_handler = logging.FileHandler(path, encoding='utf-8')
+            file_handler.setFormatter(logging.Formatter('%(message)s'))
+            
+            records = queue.SimpleQueue()
+            listener = logging.handlers.QueueListener(records, file_handler)
+            listener.start()
+            
+            logger = logging.getLogger('project.metrics.slow_requests')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(logging.handlers.QueueHandler(records))
+            _slow_logger = logger
+    return _slow_logger
+
+
+class RequestMetricsMiddleware:
+    """
+    Records wall time, SQL query count and SQL time for each resolved view.
+    
+    Slow requests are sampled into a JSONL file (settings.METRICS_SLOW_LOG) and
+    the rolling percentiles are shown at /custom-admin/metrics/.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'METRICS_SLOW_REQUEST_MS', 500)
+        self.sample_rate = getattr(settings, 'METRICS_SLOW_SAMPLE_RATE', 1.0)
+    
+    def __call__(self, request):
+        sql = {'count': 0, 'seconds': 0.0}
+        
+        def count_queries(execute, sql_text, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql_text, params, many, context)
+            finally:
+                sql['count'] += 1
+                sql['seconds'] += time.perf_counter() - start
+        
+        start = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            response = self.get_response(request)
+        duration_ms = (time.perf_counter() - start) * 1000
+        
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else 'unresolved'
+        sql_ms = sql['seconds'] * 1000
+        view_metrics.record(view_name, duration_ms, sql['count'], sql_ms)
+        
+        if duration_ms >= self.slow_ms and random.random() < self.sample_rate:
+            get_slow_request_logger().info(json.dumps({
+                'timestamp': time.time(),
+                'view': view_name,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration_ms, 2),
+                'queries': sql['count'],
+                'sql_ms': round(sql_ms, 2),
+                'user_type': request.session.get('user_type') if hasattr(request, 'session') else None,
+            }))
+        
+        return response
@@ -0,0 +1,62 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def preencher_fatos(apps, schema_editor):
+    """
+    Popula a tabela de fatos com as notas das avaliações já concluídas
+    """
+    Nota = apps.get_model('project', 'Nota')
+    FatoNota = apps.get_model('project', 'FatoNota')
+
+    linhas = Nota.objects.filter(avaliacao__concluida=True).values(
+        'nota',
+        'competencia_id',
+        'dataAvaliacao',
+        nota_origem_id=models.F('id'),
+        avaliado_id=models.F('avaliacao__avaliado_aluno_id'),
+        avaliador_id=models.F('avaliacao__avaliador_aluno_id'),
+        atividade_id=models.F('avaliacao__atividade_id'),
+        turma_id=models.F('avaliacao__atividade__turma_id'),
+        disciplina_id=models.F('avaliacao__atividade__turma__disciplina_id'),
+        curso_id=models.F('avaliacao__atividade__turma__disciplina__curso_id'),
+        semestre_id=models.F('avaliacao__atividade__turma__semestre_id'),
+        is_self_assessment=models.F('avaliacao__is_self_assessment'),
+    )
+    FatoNota.objects.bulk_create(
+        (FatoNota(**linha) for linha in linhas.iterator()), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0012_alter_avaliacao_unique_together'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FatoNota',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('nota', models.IntegerField()),
+                ('is_self_assessment', models.BooleanField(default=False)),
+                ('dataAvaliacao', models.DateTimeField()),
+                ('atividade', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fatos', to='project.atividade')),
+                ('avaliado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fatos_recebidos', to='project.aluno')),
+                ('avaliador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fatos_realizados', to='project.aluno')),
+                ('competencia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fatos', to='project.competencia')),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fatos', to='project.curso')),
+                ('disciplina', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fatos', to='project.disciplina')),
+                ('nota_origem', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fato', to='project.nota')),
+                ('semestre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fatos', to='project.semestre')),
+                ('turma', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fatos', to='project.turma')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['avaliado', 'competencia'], name='project_fat_avaliad_3dd920_idx'), models.Index(fields=['turma', 'competencia'], name='project_fat_turma_i_ca8661_idx'), models.Index(fields=['disciplina', 'competencia'], name='project_fat_discipl_c4acf5_idx'), models.Index(fields=['curso', 'semestre'], name='project_fat_curso_i_8dd608_idx')],
+            },
+        ),
+        migrations.RunPython(preencher_fatos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def preencher_resumos(apps, schema_editor):
+    """
+    Calcula os resumos por competência a partir das notas já registradas
+    """
+    Nota = apps.get_model('project', 'Nota')
+    ResumoCompetencia = apps.get_model('project', 'ResumoCompetencia')
+
+    linhas = (
+        Nota.objects.filter(avaliacao__concluida=True)
+        .values(
+            'competencia_id',
+            aluno_id=models.F('avaliacao__avaliado_aluno_id'),
+            semestre_id=models.F('avaliacao__atividade__turma__semestre_id'),
+            is_self_assessment=models.F('avaliacao__is_self_assessment'),
+        )
+        .annotate(soma=models.Sum('nota'), total=models.Count('id'))
+        .order_by()
+    )
+    ResumoCompetencia.objects.bulk_create(
+        [
+            ResumoCompetencia(
+                aluno_id=linha['aluno_id'],
+                competencia_id=linha['competencia_id'],
+                semestre_id=linha['semestre_id'],
+                origem='auto' if linha['is_self_assessment'] else 'pares',
+                soma=linha['soma'],
+                total=linha['total'],
+            )
+            for linha in linhas
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0013_fatonota'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoCompetencia',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('origem', models.CharField(choices=[('auto', 'Auto-avaliação'), ('pares', 'Avaliação dos pares')], max_length=5)),
+                ('soma', models.IntegerField(default=0)),
+                ('total', models.IntegerField(default=0)),
+                ('aluno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos', to='project.aluno')),
+                ('competencia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos', to='project.competencia')),
+                ('semestre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos', to='project.semestre')),
+            ],
+            options={
+                'unique_together': {('aluno', 'competencia', 'semestre', 'origem')},
+            },
+        ),
+        migrations.RunPython(preencher_resumos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+ORIGENS = {
+    'aluno': ('Aluno', 'emailAluno', 'senhaAluno', 'nomeAluno'),
+    'professor': ('Professor', 'emailProf', 'senhaProf', 'nomeProf'),
+    'coordenador': ('Coordenador', 'emailCoord', 'senhaCoord', 'nomeCoord'),
+    'admin': ('Admin', 'emailAdmin', 'senhaAdmin', 'nomeAdmin'),
+}
+
+
+def preencher_identidades(apps, schema_editor):
+    """
+    Copia para o índice de identidades os usuários já cadastrados
+    """
+    Identidade = apps.get_model('project', 'Identidade')
+
+    for tipo, (nome_modelo, campo_email, campo_senha, campo_nome) in ORIGENS.items():
+        modelo = apps.get_model('project', nome_modelo)
+        Identidade.objects.bulk_create(
+            [
+                Identidade(
+                    tipo=tipo,
+                    usuario_id=usuario.pk,
+                    email=getattr(usuario, campo_email),
+                    senha=getattr(usuario, campo_senha),
+                    nome=getattr(usuario, campo_nome),
+                    reset_token=usuario.reset_token,
+                )
+                for usuario in modelo.objects.all()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0014_resumocompetencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Identidade',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('email', models.EmailField(db_index=True, max_length=254)),
+                ('tipo', models.CharField(choices=[('aluno', 'Aluno'), ('professor', 'Professor'), ('coordenador', 'Coordenador'), ('admin', 'Administrador')], max_length=11)),
+                ('usuario_id', models.IntegerField()),
+                ('nome', models.CharField(max_length=100)),
+                ('senha', models.CharField(max_length=100)),
+                ('reset_token', models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+            ],
+            options={
+                'unique_together': {('tipo', 'usuario_id')},
+            },
+        ),
+        migrations.RunPython(preencher_identidades, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def migrar_tokens_pendentes(apps, schema_editor):
+    """
+    Converte os tokens antigos, gravados nos próprios usuários, em tokens com validade
+    """
+    Identidade = apps.get_model('project', 'Identidade')
+    TokenRedefinicao = apps.get_model('project', 'TokenRedefinicao')
+
+    expira_em = django.utils.timezone.now() + timedelta(seconds=settings.PASSWORD_RESET_TIMEOUT)
+    TokenRedefinicao.objects.bulk_create(
+        [
+            TokenRedefinicao(token=token, identidade_id=identidade_id, expira_em=expira_em)
+            for identidade_id, token in Identidade.objects.exclude(reset_token__isnull=True)
+            .exclude(reset_token='')
+            .values_list('id', 'reset_token')
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0015_identidade'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRedefinicao',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('token', models.CharField(max_length=100, unique=True)),
+                ('criado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expira_em', models.DateTimeField(db_index=True)),
+                ('usado', models.BooleanField(default=False)),
+                ('identidade', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens_redefinicao', to='project.identidade')),
+            ],
+        ),
+        migrations.RunPython(migrar_tokens_pendentes, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='admin',
+            name='reset_token',
+        ),
+        migrations.RemoveField(
+            model_name='aluno',
+            name='reset_token',
+        ),
+        migrations.RemoveField(
+            model_name='coordenador',
+            name='reset_token',
+        ),
+        migrations.RemoveField(
+            model_name='identidade',
+            name='reset_token',
+        ),
+        migrations.RemoveField(
+            model_name='professor',
+            name='reset_token',
+        ),
+    ]
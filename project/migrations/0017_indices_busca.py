@@ -0,0 +1,46 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:48
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0016_token_redefinicao'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aluno',
+            index=models.Index(django.db.models.functions.text.Lower('nomeAluno'), models.F('idAluno'), name='aluno_nome_busca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aluno',
+            index=models.Index(django.db.models.functions.text.Lower('emailAluno'), name='aluno_email_busca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aluno',
+            index=models.Index(django.db.models.functions.text.Lower('matricula'), name='aluno_matricula_busca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disciplina',
+            index=models.Index(django.db.models.functions.text.Lower('nome'), models.F('id'), name='disciplina_nome_busca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disciplina',
+            index=models.Index(django.db.models.functions.text.Lower('codigo'), name='disciplina_codigo_busca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='professor',
+            index=models.Index(django.db.models.functions.text.Lower('nomeProf'), models.F('idProfessor'), name='professor_nome_busca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='professor',
+            index=models.Index(django.db.models.functions.text.Lower('emailProf'), name='professor_email_busca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='turma',
+            index=models.Index(django.db.models.functions.text.Lower('codigo'), name='turma_codigo_busca_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:51
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0017_indices_busca'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='admin',
+            index=models.Index(django.db.models.functions.text.Lower('nomeAdmin'), models.F('id'), name='admin_nome_busca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='admin',
+            index=models.Index(django.db.models.functions.text.Lower('emailAdmin'), name='admin_email_busca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aluno',
+            index=models.Index(models.F('curso'), django.db.models.functions.text.Lower('nomeAluno'), models.F('idAluno'), name='aluno_curso_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coordenador',
+            index=models.Index(django.db.models.functions.text.Lower('nomeCoord'), models.F('id'), name='coordenador_nome_busca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coordenador',
+            index=models.Index(django.db.models.functions.text.Lower('emailCoord'), name='coordenador_email_busca_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.3 on 2026-10-18 10:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0019_fila_de_emails'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fatonota',
+            index=models.Index(fields=['dataAvaliacao'], name='project_fat_dataAva_6ddcfb_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-18 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0020_indice_data_fato_nota'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailpendente',
+            name='reserva',
+            field=models.CharField(blank=True, db_index=True, max_length=32),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.core import validators
 from django.utils import timezone
 
@@ -15,7 +16,12 @@ class Coordenador(models.Model):
     emailCoord = models.EmailField(unique=True)
     senhaCoord = models.CharField(max_length=100)
     curso = models.ForeignKey(Curso, on_delete=models.SET_NULL, null=True, related_name='coordenadores')
-    reset_token = models.CharField(max_length=100, null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(Lower('nomeCoord'), 'id', name='coordenador_nome_busca_idx'),
+            models.Index(Lower('emailCoord'), name='coordenador_email_busca_idx'),
+        ]
     
     def __str__(self):
         return self.nomeCoord
@@ -27,7 +33,16 @@ class Aluno(models.Model):
     senhaAluno = models.CharField(max_length=100)
     matricula = models.CharField(max_length=20, unique=True)
     curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='alunos')
-    reset_token = models.CharField(max_length=100, null=True, blank=True)
+    
+    class Meta:
+        # Prefix search and keyset pagination in the typeahead endpoints
+        indexes = [
+            models.Index(Lower('nomeAluno'), 'idAluno', name='aluno_nome_busca_idx'),
+            models.Index(Lower('emailAluno'), name='aluno_email_busca_idx'),
+            models.Index(Lower('matricula'), name='aluno_matricula_busca_idx'),
+            # Per-course pages of the user directory
+            models.Index('curso', Lower('nomeAluno'), 'idAluno', name='aluno_curso_nome_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nomeAluno} ({self.matricula})"
@@ -37,7 +52,12 @@ class Professor(models.Model):
     nomeProf = models.CharField(max_length=100)
     emailProf = models.EmailField(unique=True)
     senhaProf = models.CharField(max_length=100)
-    reset_token = models.CharField(max_length=100, null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(Lower('nomeProf'), 'idProfessor', name='professor_nome_busca_idx'),
+            models.Index(Lower('emailProf'), name='professor_email_busca_idx'),
+        ]
     
     def __str__(self):
         return self.nomeProf
@@ -56,6 +76,12 @@ class Disciplina(models.Model):
     codigo = models.CharField(max_length=20)
     curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='disciplinas')
     
+    class Meta:
+        indexes = [
+            models.Index(Lower('nome'), 'id', name='disciplina_nome_busca_idx'),
+            models.Index(Lower('codigo'), name='disciplina_codigo_busca_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.codigo} - {self.nome}"
 
@@ -66,6 +92,11 @@ class Turma(models.Model):
     professor = models.ForeignKey(Professor, on_delete=models.CASCADE, related_name='turmas')
     semestre = models.ForeignKey(Semestre, on_delete=models.CASCADE, related_name='turmas')
     
+    class Meta:
+        indexes = [
+            models.Index(Lower('codigo'), name='turma_codigo_busca_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.disciplina} - Turma {self.codigo} ({self.semestre})"
 
@@ -135,12 +166,70 @@ class Nota(models.Model):
     def __str__(self):
         return f"Nota {self.nota} para {self.competencia} - {self.avaliacao}"
 
+class FatoNota(models.Model):
+    """Nota desnormalizada com todas as dimensões usadas pelos painéis de análise"""
+    id = models.AutoField(primary_key=True)
+    nota_origem = models.OneToOneField(Nota, on_delete=models.CASCADE, related_name='fato')
+    nota = models.IntegerField()
+    avaliado = models.ForeignKey(Aluno, on_delete=models.CASCADE, related_name='fatos_recebidos')
+    avaliador = models.ForeignKey(Aluno, on_delete=models.CASCADE, related_name='fatos_realizados')
+    competencia = models.ForeignKey(Competencia, on_delete=models.CASCADE, related_name='fatos')
+    atividade = models.ForeignKey(Atividade, on_delete=models.CASCADE, related_name='fatos')
+    turma = models.ForeignKey(Turma, on_delete=models.CASCADE, related_name='fatos')
+    disciplina = models.ForeignKey(Disciplina, on_delete=models.CASCADE, related_name='fatos')
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='fatos')
+    semestre = models.ForeignKey(Semestre, on_delete=models.CASCADE, related_name='fatos')
+    is_self_assessment = models.BooleanField(default=False)
+    dataAvaliacao = models.DateTimeField()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['avaliado', 'competencia']),
+            models.Index(fields=['turma', 'competencia']),
+            models.Index(fields=['disciplina', 'competencia']),
+            models.Index(fields=['curso', 'semestre']),
+            models.Index(fields=['dataAvaliacao']),
+        ]
+    
+    def __str__(self):
+        return f"Fato {self.nota} para {self.competencia} - {self.avaliado}"
+
+class ResumoCompetencia(models.Model):
+    """Soma e quantidade de notas por aluno, competência, semestre e origem da avaliação"""
+    ORIGEM_CHOICES = (
+        ('auto', 'Auto-avaliação'),
+        ('pares', 'Avaliação dos pares'),
+    )
+    
+    id = models.AutoField(primary_key=True)
+    aluno = models.ForeignKey(Aluno, on_delete=models.CASCADE, related_name='resumos')
+    competencia = models.ForeignKey(Competencia, on_delete=models.CASCADE, related_name='resumos')
+    semestre = models.ForeignKey(Semestre, on_delete=models.CASCADE, related_name='resumos')
+    origem = models.CharField(max_length=5, choices=ORIGEM_CHOICES)
+    soma = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('aluno', 'competencia', 'semestre', 'origem')
+    
+    @property
+    def media(self):
+        return self.soma / self.total if self.total else None
+    
+    def __str__(self):
+        return f"{self.aluno} - {self.competencia} ({self.semestre}, {self.origem})"
+
 class Admin(models.Model):
     id = models.AutoField(primary_key=True)
     nomeAdmin = models.CharField(max_length=100)
     emailAdmin = models.EmailField(unique=True)
     senhaAdmin = models.CharField(max_length=100)
-    reset_token = models.CharField(max_length=100, null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(Lower('nomeAdmin'), 'id', name='admin_nome_busca_idx'),
+            models.Index(Lower('emailAdmin'), name='admin_email_busca_idx'),
+        ]
     
     def __str__(self):
         return self.nomeAdmin
@@ -196,3 +285,103 @@ class Notificacao(models.Model):
         elif self.admin:
             return 'admin'
         return None
+
+class Identidade(models.Model):
+    """Índice único de e-mails dos quatro tipos de usuário, usado pela autenticação"""
+    TIPO_CHOICES = (
+        ('aluno', 'Aluno'),
+        ('professor', 'Professor'),
+        ('coordenador', 'Coordenador'),
+        ('admin', 'Administrador'),
+    )
+    
+    # Modelo e campos de origem de cada tipo: (modelo, email, senha, nome)
+    ORIGENS = {
+        'aluno': (Aluno, 'emailAluno', 'senhaAluno', 'nomeAluno'),
+        'professor': (Professor, 'emailProf', 'senhaProf', 'nomeProf'),
+        'coordenador': (Coordenador, 'emailCoord', 'senhaCoord', 'nomeCoord'),
+        'admin': (Admin, 'emailAdmin', 'senhaAdmin', 'nomeAdmin'),
+    }
+    
+    id = models.AutoField(primary_key=True)
+    email = models.EmailField(db_index=True)
+    tipo = models.CharField(max_length=11, choices=TIPO_CHOICES)
+    usuario_id = models.IntegerField()
+    nome = models.CharField(max_length=100)
+    senha = models.CharField(max_length=100)
+    
+    class Meta:
+        unique_together = ('tipo', 'usuario_id')
+    
+    def __str__(self):
+        return f"{self.email} ({self.tipo})"
+    
+    @classmethod
+    def tipo_do_modelo(cls, modelo):
+        """Retorna o tipo de usuário correspondente a um dos quatro modelos, ou None"""
+        for tipo, (origem, *_) in cls.ORIGENS.items():
+            if modelo is origem:
+                return tipo
+        return None
+    
+    @classmethod
+    def dados_do_usuario(cls, tipo, usuario):
+        """Extrai de um usuário os campos espelhados no índice"""
+        _, campo_email, campo_senha, campo_nome = cls.ORIGENS[tipo]
+        return {
+            'email': getattr(usuario, campo_email),
+            'nome': getattr(usuario, campo_nome),
+            'senha': getattr(usuario, campo_senha),
+        }
+    
+    @property
+    def usuario(self):
+        """Carrega o registro de origem (Aluno, Professor, Coordenador ou Admin)"""
+        modelo = self.ORIGENS[self.tipo][0]
+        return modelo.objects.get(pk=self.usuario_id)
+
+class TokenRedefinicao(models.Model):
+    """Token de uso único para redefinição de senha, válido até `expira_em`"""
+    id = models.AutoField(primary_key=True)
+    token = models.CharField(max_length=100, unique=True)
+    identidade = models.ForeignKey(Identidade, on_delete=models.CASCADE, related_name='tokens_redefinicao')
+    criado_em = models.DateTimeField(default=timezone.now)
+    expira_em = models.DateTimeField(db_index=True)
+    usado = models.BooleanField(default=False)
+    
+    def __str__(self):
+        return f"Token de {self.identidade} (expira em {self.expira_em:%d/%m/%Y %H:%M})"
+
+class EmailPendente(models.Model):
+    """E-mail já renderizado aguardando o envio pelo comando send_queued_emails"""
+    STATUS_CHOICES = (
+        ('pendente', 'Pendente'),
+        ('enviado', 'Enviado'),
+        ('falhou', 'Falhou'),
+    )
+    
+    id = models.AutoField(primary_key=True)
+    assunto = models.CharField(max_length=255)
+    corpo = models.TextField()
+    corpo_html = models.TextField(blank=True)
+    remetente = models.CharField(max_length=255)
+    destinatario = models.EmailField()
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES, default='pendente')
+    tentativas = models.PositiveIntegerField(default=0)
+    ultimo_erro = models.TextField(blank=True)
+    criado_em = models.DateTimeField(default=timezone.now)
+    # Also used as a lease: a worker pushes it forward while sending the message
+    proxima_tentativa = models.DateTimeField(default=timezone.now)
+    # Identifies the worker run that claimed the message (see services._reservar_emails)
+    reserva = models.CharField(max_length=32, blank=True, db_index=True)
+    enviado_em = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'E-mail pendente'
+        verbose_name_plural = 'E-mails pendentes'
+        indexes = [
+            models.Index(fields=['status', 'proxima_tentativa'], name='email_fila_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.assunto} para {self.destinatario} ({self.status})"
@@ -0,0 +1,1203 @@
+import hashlib
+import heapq
+import math
+import random
+import uuid
+from datetime import timedelta
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.db.models import (
+    Avg,
+    BooleanField,
+    Count,
+    Exists,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils import timezone
+
+from .analytics import (
+    atualizar_resumos,
+    atualizar_resumos_em_lote,
+    balancear_grupos,
+    perfis_de_competencia,
+    registrar_fatos,
+)
+from .models import (
+    Atividade,
+    Aluno,
+    Avaliacao,
+    Competencia,
+    Coordenador,
+    Curso,
+    Disciplina,
+    EmailPendente,
+    FatoNota,
+    Grupo,
+    Identidade,
+    Nota,
+    Notificacao,
+    TokenRedefinicao,
+    TurmaAluno,
+)
+from .utils import (
+    criar_notificacoes,
+    generate_token,
+    invalidar_notificacoes_em_lote,
+    url_absoluta,
+    verify_password,
+)
+
+
+def _contagem(queryset, campo):
+    """Transforma um queryset em uma subquery escalar de contagem agrupada por `campo`"""
+    return Coalesce(
+        Subquery(
+            queryset.values(campo).annotate(total=Count("pk")).values("total")[:1],
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def _colegas_e_concluidas(avaliador, atividade, grupo):
+    """
+    Subconsultas com o número de colegas do aluno no grupo e de avaliações já
+    concluídas para colegas que continuam no grupo
+
+    `pendentes` é a diferença entre as duas; a auto-avaliação não entra em
+    nenhuma delas. É a mesma definição na caixa de avaliações e nos lembretes.
+
+    Args:
+        avaliador: Id do aluno (valor ou OuterRef)
+        atividade: Id da atividade (valor ou OuterRef)
+        grupo: Id do grupo do aluno na atividade (valor ou OuterRef)
+
+    Returns:
+        tuple: (expressão com o número de colegas, expressão com o de concluídas)
+    """
+    membros = Grupo.alunos.through.objects.filter(grupo_id=grupo).exclude(aluno_id=avaliador)
+    concluidas = Avaliacao.objects.filter(
+        atividade_id=atividade,
+        avaliador_aluno_id=avaliador,
+        avaliado_aluno__grupos=grupo,
+        concluida=True,
+    ).exclude(avaliado_aluno_id=avaliador)
+    return _contagem(membros, "grupo_id"), _contagem(concluidas, "atividade_id")
+
+
+def caixa_de_avaliacoes(aluno):
+    """
+    Retorna as atividades do aluno com a situação das suas avaliações
+
+    Cada atividade recebe os atributos `grupo` (ou None), `pendentes` (colegas
+    ainda não avaliados) e `pendente` (True se houver avaliações em aberto).
+    O número de consultas é constante, independente da quantidade de atividades.
+
+    Args:
+        aluno (Aluno): Aluno avaliador
+
+    Returns:
+        list: Atividades ordenadas por data de entrega e título
+    """
+    grupo_do_aluno = Grupo.objects.filter(
+        atividade=OuterRef("pk"), alunos=aluno
+    ).values("pk")[:1]
+
+    num_colegas, num_concluidas = _colegas_e_concluidas(
+        aluno.pk, OuterRef("pk"), OuterRef("grupo_id")
+    )
+
+    atividades = list(
+        Atividade.objects.filter(turma__matriculas__aluno=aluno)
+        .select_related("turma", "turma__disciplina")
+        .annotate(grupo_id=Subquery(grupo_do_aluno))
+        .annotate(num_colegas=num_colegas, num_concluidas=num_concluidas)
+        .order_by("-dataEntrega", "titulo")
+    )
+
+    grupos = Grupo.objects.in_bulk(
+        {a.grupo_id for a in atividades if a.grupo_id is not None}
+    )
+
+    for atividade in atividades:
+        atividade.grupo = grupos.get(atividade.grupo_id)
+        if atividade.grupo:
+            atividade.pendentes = max(
+                atividade.num_colegas - atividade.num_concluidas, 0
+            )
+        else:
+            atividade.pendentes = 0
+        atividade.pendente = atividade.pendentes > 0
+
+    return atividades
+
+
+def alunos_sem_grupo(atividade):
+    """
+    Retorna as matrículas da turma cujos alunos ainda não estão em um grupo da atividade
+
+    Args:
+        atividade (Atividade): Atividade em que os grupos são formados
+
+    Returns:
+        QuerySet: TurmaAluno com o aluno carregado, ordenados pelo nome do aluno
+    """
+    return (
+        TurmaAluno.objects.filter(turma_id=atividade.turma_id)
+        .exclude(aluno__grupos__atividade=atividade)
+        .select_related("aluno")
+        .order_by("aluno__nomeAluno")
+    )
+
+
+def criar_grupos(atividade, composicao, batch_size=1000):
+    """
+    Cria grupos, seus membros e a matriz de avaliações em uma única transação
+
+    Cada membro recebe uma avaliação para cada colega e uma auto-avaliação. Os
+    grupos, as associações e as avaliações são gravados com bulk_create, então o
+    número de consultas não depende do tamanho dos grupos.
+
+    Args:
+        atividade (Atividade): Atividade dos grupos
+        composicao (list): Pares (nome_do_grupo, [ids dos alunos])
+        batch_size (int): Quantidade de linhas por INSERT
+
+    Returns:
+        list: Grupos criados, na ordem de `composicao`
+    """
+    Membro = Grupo.alunos.through
+
+    with transaction.atomic():
+        novos = [Grupo(nome=nome, atividade=atividade) for nome, _ in composicao]
+        if connection.features.can_return_rows_from_bulk_insert:
+            grupos = Grupo.objects.bulk_create(novos, batch_size=batch_size)
+        else:
+            for grupo in novos:
+                grupo.save()
+            grupos = novos
+
+        Membro.objects.bulk_create(
+            [
+                Membro(grupo_id=grupo.pk, aluno_id=aluno_id)
+                for grupo, (_, alunos_ids) in zip(grupos, composicao)
+                for aluno_id in alunos_ids
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        Avaliacao.objects.bulk_create(
+            [
+                Avaliacao(
+                    avaliador_aluno_id=avaliador_id,
+                    avaliado_aluno_id=avaliado_id,
+                    atividade=atividade,
+                    concluida=False,
+                    is_self_assessment=avaliador_id == avaliado_id,
+                )
+                for _, alunos_ids in composicao
+                for avaliador_id in alunos_ids
+                for avaliado_id in alunos_ids
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+    return grupos
+
+
+def dividir_em_grupos(alunos_ids, tamanho, semente=None):
+    """
+    Sorteia os alunos em grupos de `tamanho` alunos
+
+    Os tamanhos diferem em no máximo um e grupos de um único aluno nunca são
+    formados: para evitá-los, um grupo pode ficar com `tamanho` + 1 alunos (ex.:
+    5 alunos com `tamanho` 2 formam grupos de 3 e 2).
+
+    Args:
+        alunos_ids (list): Ids dos alunos disponíveis
+        tamanho (int): Quantidade de alunos por grupo (mínimo 2)
+        semente: Semente do sorteio, para obter sempre a mesma divisão (opcional)
+
+    Returns:
+        list: Listas de ids, uma por grupo
+    """
+    alunos_ids = list(alunos_ids)
+    random.Random(semente).shuffle(alunos_ids)
+    quantidade = _quantidade_de_grupos(len(alunos_ids), tamanho)
+    return [alunos_ids[i::quantidade] for i in range(quantidade)]
+
+
+def _semente_numerica(semente):
+    """Converte a semente digitada (texto livre) em inteiro, como o numpy exige"""
+    if semente is None or isinstance(semente, int):
+        return semente
+    # sha256 rather than hash(), which changes between processes
+    return int.from_bytes(hashlib.sha256(str(semente).encode()).digest()[:8], "big")
+
+
+def dividir_em_grupos_equilibrados(atividade, alunos_ids, tamanho, semente=None):
+    """
+    Divide os alunos em grupos com perfis de competência equilibrados
+
+    Usa a média histórica de cada aluno nas competências da atividade (ou em
+    todas, se a atividade não tiver competências) e os mesmos tamanhos de grupo
+    de `dividir_em_grupos`.
+
+    Args:
+        atividade (Atividade): Atividade em que os grupos são formados
+        alunos_ids (list): Ids dos alunos disponíveis
+        tamanho (int): Quantidade de alunos por grupo (mínimo 2)
+        semente: Semente para desempatar alunos com o mesmo perfil (opcional)
+
+    Returns:
+        list: Listas de ids, uma por grupo
+    """
+    alunos_ids = list(alunos_ids)
+    quantidade = _quantidade_de_grupos(len(alunos_ids), tamanho)
+    tamanhos = [len(range(i, len(alunos_ids), quantidade)) for i in range(quantidade)]
+
+    competencias_ids = list(atividade.competencias.values_list("id", flat=True))
+    if not competencias_ids:
+        competencias_ids = list(Competencia.objects.values_list("id", flat=True))
+
+    perfis = perfis_de_competencia(alunos_ids, competencias_ids)
+    grupos = balancear_grupos(perfis, tamanhos, _semente_numerica(semente))
+    return [[alunos_ids[i] for i in grupo] for grupo in grupos]
+
+
+def avaliacoes_do_grupo(atividade, aluno):
+    """
+    Retorna o grupo do aluno na atividade e as avaliações dele para cada membro
+
+    Os membros e as avaliações existentes vêm de uma única consulta, sem gravar
+    nada; membros ainda sem avaliação recebem uma Avaliacao não salva, criada de
+    fato só no envio (ver `avaliacao_para_envio`).
+
+    Args:
+        atividade (Atividade): Atividade consultada
+        aluno (Aluno): Aluno avaliador
+
+    Returns:
+        tuple: (Grupo ou None, lista de (colega, Avaliacao)) em ordem alfabética
+    """
+    existentes = Avaliacao.objects.filter(
+        avaliador_aluno=aluno, atividade=atividade, avaliado_aluno=OuterRef("aluno_id")
+    )
+    membros = list(
+        Grupo.alunos.through.objects.filter(
+            grupo__atividade=atividade, grupo__alunos=aluno
+        )
+        .select_related("grupo", "aluno")
+        .annotate(
+            avaliacao_id=Subquery(existentes.values("id")[:1]),
+            avaliacao_concluida=Subquery(existentes.values("concluida")[:1]),
+        )
+        .order_by("grupo_id", "aluno__nomeAluno")
+    )
+    if not membros:
+        return None, []
+
+    grupo = membros[0].grupo
+    roster = []
+    for membro in membros:
+        if membro.grupo_id != grupo.id:
+            break
+        roster.append(
+            (
+                membro.aluno,
+                Avaliacao(
+                    id=membro.avaliacao_id,
+                    avaliador_aluno=aluno,
+                    avaliado_aluno=membro.aluno,
+                    atividade=atividade,
+                    concluida=bool(membro.avaliacao_concluida),
+                    is_self_assessment=membro.aluno_id == aluno.pk,
+                ),
+            )
+        )
+    return grupo, roster
+
+
+def avaliacao_para_envio(atividade, avaliador, avaliado):
+    """
+    Retorna a avaliação a ser concluída, criando-a se ainda não existir
+
+    Chamada no envio do formulário; também corrige `is_self_assessment` de
+    avaliações antigas gravadas com o valor errado.
+
+    Args:
+        atividade (Atividade): Atividade avaliada
+        avaliador (Aluno): Aluno que avalia
+        avaliado (Aluno): Colega avaliado (ou o próprio avaliador)
+
+    Returns:
+        Avaliacao: Avaliação gravada
+    """
+    propria = avaliador.pk == avaliado.pk
+    avaliacao, criada = Avaliacao.objects.get_or_create(
+        avaliador_aluno=avaliador,
+        avaliado_aluno=avaliado,
+        atividade=atividade,
+        defaults={"is_self_assessment": propria},
+    )
+    if not criada and avaliacao.is_self_assessment != propria:
+        avaliacao.is_self_assessment = propria
+        avaliacao.save(update_fields=["is_self_assessment"])
+    return avaliacao
+
+
+def _quantidade_de_grupos(total, tamanho):
+    return max(min(math.ceil(total / tamanho), total // 2), 1)
+
+
+def concluir_avaliacao(avaliacao, notas_por_competencia):
+    """
+    Registra as notas de uma avaliação e a marca como concluída em uma única transação
+
+    A tabela de fatos e os resumos por competência são atualizados na mesma
+    transação. Se a avaliação já estiver concluída nada é gravado.
+
+    Args:
+        avaliacao (Avaliacao): Avaliação a concluir
+        notas_por_competencia (dict): {competencia_id: nota} já validadas
+
+    Returns:
+        bool: True se a avaliação foi concluída, False se já estava concluída
+    """
+    with transaction.atomic():
+        if not Avaliacao.objects.filter(pk=avaliacao.pk, concluida=False).update(
+            concluida=True
+        ):
+            return False
+        avaliacao.concluida = True
+
+        agora = timezone.now()
+        notas = Nota.objects.bulk_create(
+            [
+                Nota(
+                    avaliacao=avaliacao,
+                    competencia_id=competencia_id,
+                    nota=valor,
+                    dataAvaliacao=agora,
+                )
+                for competencia_id, valor in notas_por_competencia.items()
+            ]
+        )
+        registrar_fatos(avaliacao.notas.all())
+        atualizar_resumos(avaliacao, notas)
+    return True
+
+
+def concluir_avaliacoes_do_grupo(atividade, avaliador, notas_por_colega, batch_size=1000):
+    """
+    Conclui de uma vez as avaliações do aluno para vários membros do grupo
+
+    Tudo acontece em uma transação: as avaliações que faltarem são criadas com
+    um INSERT, as pendentes são marcadas como concluídas com um único UPDATE,
+    as notas entram com bulk_create, os resumos por competência recebem todos
+    os incrementos em um UPDATE (`atualizar_resumos_em_lote`) e as notificações
+    dos colegas avaliados saem com outro bulk_create. Avaliações já concluídas
+    são ignoradas, então reenviar o mesmo formulário não duplica notas.
+
+    Args:
+        atividade (Atividade): Atividade avaliada
+        avaliador (Aluno): Aluno que avalia
+        notas_por_colega (dict): {aluno_id: {competencia_id: nota}} já validadas
+        batch_size (int): Quantidade de linhas por INSERT
+
+    Returns:
+        list: IDs dos alunos cujas avaliações foram concluídas nesta chamada
+    """
+    with transaction.atomic():
+        # Members added after the groups were formed have no row yet
+        Avaliacao.objects.bulk_create(
+            [
+                Avaliacao(
+                    avaliador_aluno=avaliador,
+                    avaliado_aluno_id=colega_id,
+                    atividade=atividade,
+                    is_self_assessment=colega_id == avaliador.pk,
+                )
+                for colega_id in notas_por_colega
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        pendentes = list(
+            Avaliacao.objects.select_for_update().filter(
+                avaliador_aluno=avaliador,
+                atividade=atividade,
+                avaliado_aluno_id__in=list(notas_por_colega),
+                concluida=False,
+            )
+        )
+        if not pendentes:
+            return []
+
+        # Only rows still pending are flipped; the self-assessment flag is fixed on the way
+        concluidas = Avaliacao.objects.filter(
+            pk__in=[a.pk for a in pendentes], concluida=False
+        ).update(
+            concluida=True,
+            is_self_assessment=ExpressionWrapper(
+                Q(avaliado_aluno_id=avaliador.pk), output_field=BooleanField()
+            ),
+        )
+        if concluidas != len(pendentes):
+            # A concurrent submission concluded some of them first
+            transaction.set_rollback(True)
+            return []
+
+        agora = timezone.now()
+        notas = Nota.objects.bulk_create(
+            [
+                Nota(
+                    avaliacao=avaliacao,
+                    competencia_id=competencia_id,
+                    nota=valor,
+                    dataAvaliacao=agora,
+                )
+                for avaliacao in pendentes
+                for competencia_id, valor in notas_por_colega[
+                    avaliacao.avaliado_aluno_id
+                ].items()
+            ],
+            batch_size=batch_size,
+        )
+        registrar_fatos(Nota.objects.filter(avaliacao__in=pendentes), batch_size)
+
+        por_avaliacao = {avaliacao.pk: avaliacao for avaliacao in pendentes}
+        for avaliacao in pendentes:
+            avaliacao.concluida = True
+            avaliacao.is_self_assessment = avaliacao.avaliado_aluno_id == avaliador.pk
+        semestre_id = atividade.turma.semestre_id
+        incrementos = {}
+        for nota in notas:
+            avaliacao = por_avaliacao[nota.avaliacao_id]
+            chave = (
+                avaliacao.avaliado_aluno_id,
+                nota.competencia_id,
+                semestre_id,
+                "auto" if avaliacao.is_self_assessment else "pares",
+            )
+            soma, total = incrementos.get(chave, (0, 0))
+            incrementos[chave] = (soma + nota.nota, total + 1)
+        atualizar_resumos_em_lote(incrementos, batch_size)
+
+        avaliados = [
+            a.avaliado_aluno_id for a in pendentes if not a.is_self_assessment
+        ]
+        criar_notificacoes(
+            avaliados,
+            titulo="Nova avaliação recebida",
+            mensagem=f"{avaliador.nomeAluno} concluiu sua avaliação na atividade '{atividade.titulo}'.",
+            link=f"/atividade/{atividade.id}/",
+            user_type="aluno",
+            batch_size=batch_size,
+        )
+
+    return [a.avaliado_aluno_id for a in pendentes]
+
+
+def avaliacoes_pendentes_por_aluno(inicio, fim=None):
+    """
+    Conta em uma única consulta as avaliações que cada aluno ainda deve nas
+    atividades com entrega entre `inicio` e `fim` (sem limite se `fim` for None)
+
+    A contagem parte dos membros de cada grupo, com a mesma definição da caixa
+    de avaliações (`_colegas_e_concluidas`: colegas menos avaliações concluídas
+    para colegas ainda no grupo, sem a auto-avaliação), então também cobre
+    avaliações cuja linha só seria criada no envio.
+
+    Returns:
+        QuerySet: Dicionários com aluno_id, nome, email, atividade_id, titulo,
+        data_entrega e pendentes, ordenados por aluno e data de entrega
+    """
+    membros = Grupo.alunos.through.objects.filter(grupo__atividade__dataEntrega__gte=inicio)
+    if fim is not None:
+        membros = membros.filter(grupo__atividade__dataEntrega__lte=fim)
+    colegas, concluidas = _colegas_e_concluidas(
+        OuterRef("aluno_id"), OuterRef("grupo__atividade_id"), OuterRef("grupo_id")
+    )
+    return (
+        membros.annotate(colegas=colegas, concluidas=concluidas)
+        .annotate(pendentes=F("colegas") - F("concluidas"))
+        .filter(pendentes__gt=0)
+        .values(
+            "aluno_id",
+            "pendentes",
+            nome=F("aluno__nomeAluno"),
+            email=F("aluno__emailAluno"),
+            atividade_id=F("grupo__atividade_id"),
+            titulo=F("grupo__atividade__titulo"),
+            data_entrega=F("grupo__atividade__dataEntrega"),
+        )
+        .order_by("aluno_id", "data_entrega", "atividade_id")
+    )
+
+
+def _mensagem_lembrete(itens):
+    total = sum(item["pendentes"] for item in itens)
+    atividades = "; ".join(
+        f"'{item['titulo']}' (entrega em {item['data_entrega']:%d/%m/%Y}: {item['pendentes']})"
+        for item in itens
+    )
+    return f"Você tem {total} avaliação(ões) pendente(s) em atividades com entrega próxima: {atividades}."
+
+
+def enviar_lembretes_de_prazo(inicio, fim, email=False, link=None, batch_size=1000):
+    """
+    Envia um lembrete agregado para cada aluno com avaliações pendentes no período
+
+    As pendências vêm de `avaliacoes_pendentes_por_aluno`; as notificações são
+    gravadas com bulk_create a cada `batch_size` alunos e, se `email` for True,
+    os emails do lote saem por uma única conexão com send_messages.
+
+    Args:
+        inicio (date): Primeira data de entrega considerada
+        fim (date): Última data de entrega considerada
+        email (bool): Também enviar um email de resumo para cada aluno
+        link (str): Caminho incluído na notificação (no email vai como URL
+            absoluta); por padrão, a lista de atividades
+        batch_size (int): Quantidade de alunos por lote
+
+    Returns:
+        tuple: (notificações criadas, emails enviados)
+    """
+    link = link or reverse("atividades")
+    linhas = avaliacoes_pendentes_por_aluno(inicio, fim).iterator(chunk_size=batch_size)
+    por_aluno = ((aluno_id, list(itens)) for aluno_id, itens in groupby(linhas, itemgetter("aluno_id")))
+    modelo_email = get_template("emails/lembrete_prazo.txt") if email else None
+    url_email = url_absoluta(link)
+    conexao = get_connection() if email else None
+
+    notificacoes = emails = 0
+    if conexao:
+        # One SMTP session for the whole run
+        conexao.open()
+    try:
+        while lote := list(islice(por_aluno, batch_size)):
+            with transaction.atomic():
+                criadas = Notificacao.objects.bulk_create(
+                    [
+                        Notificacao(
+                            titulo="Avaliações pendentes",
+                            mensagem=_mensagem_lembrete(itens),
+                            tipo="warning",
+                            link=link,
+                            aluno_id=aluno_id,
+                        )
+                        for aluno_id, itens in lote
+                    ]
+                )
+                transaction.on_commit(
+                    lambda lote=lote: invalidar_notificacoes_em_lote(
+                        "aluno", [aluno_id for aluno_id, _ in lote]
+                    )
+                )
+            notificacoes += len(criadas)
+
+            if conexao:
+                emails += conexao.send_messages(
+                    [
+                        EmailMessage(
+                            subject="Lembrete: avaliações pendentes - Feedback 360°",
+                            body=modelo_email.render(
+                                {"nome": itens[0]["nome"], "itens": itens, "link": url_email}
+                            ),
+                            from_email=settings.DEFAULT_FROM_EMAIL,
+                            to=[itens[0]["email"]],
+                        )
+                        for _, itens in lote
+                    ]
+                ) or 0
+    finally:
+        if conexao:
+            conexao.close()
+    return notificacoes, emails
+
+
+def notas_recebidas_por_aluno(desde):
+    """
+    Resume em uma única consulta agrupada as notas dos colegas recebidas por
+    cada aluno desde `desde`, por atividade
+
+    Returns:
+        QuerySet: Dicionários com aluno_id, nome, email, atividade_id, titulo,
+        quantidade e media, ordenados por aluno e atividade
+    """
+    return (
+        FatoNota.objects.filter(dataAvaliacao__gte=desde, is_self_assessment=False)
+        .values(
+            "atividade_id",
+            aluno_id=F("avaliado_id"),
+            nome=F("avaliado__nomeAluno"),
+            email=F("avaliado__emailAluno"),
+            titulo=F("atividade__titulo"),
+        )
+        .annotate(quantidade=Count("pk"), media=Avg("nota"))
+        .order_by("aluno_id", "atividade_id")
+    )
+
+
+def enviar_resumo_de_avaliacoes(desde, link=None, batch_size=500):
+    """
+    Envia a cada aluno um e-mail com as avaliações pendentes em atividades
+    ainda abertas e as notas recebidas desde `desde`
+
+    As duas listas vêm de uma consulta agrupada cada
+    (`avaliacoes_pendentes_por_aluno` e `notas_recebidas_por_aluno`), lidas
+    em paralelo por aluno sem carregar tudo na memória. O template é carregado
+    uma vez e cada lote de `batch_size` mensagens sai em uma chamada de
+    send_messages sobre a mesma conexão.
+
+    Args:
+        desde (datetime): Início do período das notas recebidas
+        link (str): Endereço incluído no e-mail; por padrão, a URL absoluta da página inicial
+        batch_size (int): Quantidade de e-mails por chamada de send_messages
+
+    Returns:
+        int: Quantidade de e-mails enviados
+    """
+    link = link or url_absoluta(reverse("home"))
+    pendentes = avaliacoes_pendentes_por_aluno(timezone.localdate()).iterator(chunk_size=batch_size)
+    notas = notas_recebidas_por_aluno(desde).iterator(chunk_size=batch_size)
+    linhas = heapq.merge(
+        (("pendentes", linha) for linha in pendentes),
+        (("notas", linha) for linha in notas),
+        key=lambda item: item[1]["aluno_id"],
+    )
+    por_aluno = groupby(linhas, lambda item: item[1]["aluno_id"])
+    modelo = get_template("emails/resumo_avaliacoes.txt")
+
+    def mensagem(itens):
+        contexto = {"pendentes": [], "notas": [], "link": link}
+        for tipo, linha in itens:
+            contexto[tipo].append(linha)
+        contexto["nome"] = linha["nome"]
+        return EmailMessage(
+            subject="Resumo das suas avaliações - Feedback 360°",
+            body=modelo.render(contexto),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[linha["email"]],
+        )
+
+    enviados = 0
+    conexao = get_connection()
+    conexao.open()
+    try:
+        while lote := [mensagem(itens) for _, itens in islice(por_aluno, batch_size)]:
+            enviados += conexao.send_messages(lote) or 0
+    finally:
+        conexao.close()
+    return enviados
+
+
+def sincronizar_identidade(tipo, usuario):
+    """
+    Grava no índice de identidades os dados atuais de um usuário
+
+    Args:
+        tipo (str): 'aluno', 'professor', 'coordenador' ou 'admin'
+        usuario: Instância do modelo correspondente ao tipo
+    """
+    dados = Identidade.dados_do_usuario(tipo, usuario)
+    if not Identidade.objects.filter(tipo=tipo, usuario_id=usuario.pk).update(**dados):
+        Identidade.objects.create(tipo=tipo, usuario_id=usuario.pk, **dados)
+
+
+def registrar_identidades(tipo, usuarios, batch_size=1000):
+    """
+    Insere no índice as identidades de usuários criados com bulk_create
+
+    O bulk_create não dispara os sinais que mantêm o índice sincronizado, então
+    quem cria usuários em lote deve chamar esta função na mesma transação.
+
+    Args:
+        tipo (str): 'aluno', 'professor', 'coordenador' ou 'admin'
+        usuarios (list): Usuários já gravados do modelo correspondente ao tipo
+        batch_size (int): Quantidade de linhas por INSERT
+
+    Returns:
+        int: Quantidade de identidades criadas
+    """
+    modelo, campo_email, *_ = Identidade.ORIGENS[tipo]
+    if any(usuario.pk is None for usuario in usuarios):
+        # Backends sem RETURNING no bulk_create não preenchem as chaves primárias
+        usuarios = modelo.objects.filter(
+            **{f"{campo_email}__in": [getattr(u, campo_email) for u in usuarios]}
+        )
+    criadas = Identidade.objects.bulk_create(
+        [
+            Identidade(
+                tipo=tipo,
+                usuario_id=usuario.pk,
+                **Identidade.dados_do_usuario(tipo, usuario),
+            )
+            for usuario in usuarios
+        ],
+        batch_size=batch_size,
+    )
+    invalidar_totais_de_usuarios()
+    invalidar_estatisticas_dashboard()
+    return len(criadas)
+
+
+def reconstruir_identidades(batch_size=1000):
+    """
+    Apaga e recria o índice de identidades a partir dos quatro modelos de usuário
+
+    Returns:
+        int: Quantidade de identidades criadas
+    """
+    total = 0
+    with transaction.atomic():
+        Identidade.objects.all().delete()
+        for tipo, (modelo, *_) in Identidade.ORIGENS.items():
+            total += registrar_identidades(
+                tipo, list(modelo.objects.iterator(chunk_size=batch_size)), batch_size
+            )
+    return total
+
+
+def buscar_identidades(email):
+    """
+    Retorna as identidades cadastradas com o e-mail, em uma única consulta indexada
+
+    Um mesmo e-mail pode existir em mais de um tipo de usuário; a lista segue a
+    prioridade aluno, professor, coordenador e admin usada no login.
+
+    Args:
+        email (str): E-mail informado pelo usuário
+
+    Returns:
+        list: Identidades encontradas (vazia se nenhuma)
+    """
+    ordem = list(Identidade.ORIGENS)
+    return sorted(
+        Identidade.objects.filter(email=email), key=lambda i: ordem.index(i.tipo)
+    )
+
+
+def autenticar(email, senha):
+    """
+    Localiza a identidade cujo e-mail e senha correspondem aos informados
+
+    Returns:
+        Identidade: Identidade autenticada ou None
+    """
+    for identidade in buscar_identidades(email):
+        if verify_password(senha, identidade.senha):
+            return identidade
+    return None
+
+
+CHAVE_TOTAIS_USUARIOS = "usuarios:totais"
+
+
+def totais_de_usuarios():
+    """
+    Retorna os totais de usuários por tipo e por curso, usando o cache
+
+    Os totais são lidos do índice de identidades e de duas contagens agrupadas
+    por curso, e ficam em cache por USUARIOS_TOTAIS_CACHE_TIMEOUT segundos ou
+    até um usuário ser criado, alterado ou removido.
+
+    Returns:
+        dict: {'por_tipo': {tipo: int}, 'por_curso': {'aluno': {curso_id: int},
+        'coordenador': {curso_id: int}}}
+    """
+    totais = cache.get(CHAVE_TOTAIS_USUARIOS)
+    if totais is None:
+        por_tipo = dict.fromkeys(Identidade.ORIGENS, 0)
+        por_tipo.update(
+            Identidade.objects.values_list("tipo").annotate(total=Count("id"))
+        )
+        totais = {
+            "por_tipo": por_tipo,
+            "por_curso": {
+                tipo: dict(
+                    modelo.objects.filter(curso__isnull=False)
+                    .values_list("curso_id")
+                    .annotate(total=Count("pk"))
+                    .order_by()
+                )
+                for tipo, modelo in (("aluno", Aluno), ("coordenador", Coordenador))
+            },
+        }
+        cache.set(CHAVE_TOTAIS_USUARIOS, totais, settings.USUARIOS_TOTAIS_CACHE_TIMEOUT)
+    return totais
+
+
+def invalidar_totais_de_usuarios():
+    """Descarta os totais em cache, que serão recalculados no próximo acesso"""
+    cache.delete(CHAVE_TOTAIS_USUARIOS)
+
+
+CHAVE_ESTATISTICAS_DASHBOARD = "dashboard:estatisticas"
+
+DASHBOARD_RECENTES = 10
+
+
+def estatisticas_dashboard():
+    """
+    Retorna o retrato de estatísticas do painel do admin, usando o cache
+
+    Os totais por curso vêm de uma consulta com subconsultas de contagem, os
+    totais de usuários de `totais_de_usuarios` e as listas recentes são
+    limitadas a DASHBOARD_RECENTES itens. O retrato fica em cache por
+    DASHBOARD_CACHE_TIMEOUT segundos ou até um dos modelos contados mudar.
+
+    Returns:
+        dict: Contagens por entidade ('cursos', 'disciplinas', 'alunos',
+        'professores', 'coordenadores'), 'por_curso', 'coordenadores' e
+        'atividades_recentes'
+    """
+    estatisticas = cache.get(CHAVE_ESTATISTICAS_DASHBOARD)
+    if estatisticas is None:
+        por_curso = list(
+            Curso.objects.annotate(
+                total_disciplinas=_contagem(
+                    Disciplina.objects.filter(curso=OuterRef("pk")), "curso"
+                ),
+                total_alunos=_contagem(Aluno.objects.filter(curso=OuterRef("pk")), "curso"),
+            )
+            .values("id", "nome", "total_disciplinas", "total_alunos")
+            .order_by("nome")
+        )
+        usuarios = totais_de_usuarios()["por_tipo"]
+        estatisticas = {
+            "cursos": len(por_curso),
+            "disciplinas": sum(c["total_disciplinas"] for c in por_curso),
+            "alunos": usuarios["aluno"],
+            "professores": usuarios["professor"],
+            "coordenadores": usuarios["coordenador"],
+            "por_curso": por_curso,
+            "coordenadores_recentes": list(
+                Coordenador.objects.order_by("-id").values("id", "nomeCoord", "curso__nome")[
+                    :DASHBOARD_RECENTES
+                ]
+            ),
+            "atividades_recentes": list(
+                Atividade.objects.order_by("-id").values(
+                    "id", "titulo", "dataEntrega", "turma__codigo", "turma__disciplina__nome"
+                )[:DASHBOARD_RECENTES]
+            ),
+        }
+        cache.set(
+            CHAVE_ESTATISTICAS_DASHBOARD, estatisticas, settings.DASHBOARD_CACHE_TIMEOUT
+        )
+    return estatisticas
+
+
+def invalidar_estatisticas_dashboard():
+    """Descarta o retrato do painel do admin, que será recalculado no próximo acesso"""
+    cache.delete(CHAVE_ESTATISTICAS_DASHBOARD)
+
+
+def emitir_token_redefinicao(identidade):
+    """
+    Cria um token de redefinição de senha válido por PASSWORD_RESET_TIMEOUT segundos
+
+    Args:
+        identidade (Identidade): Usuário que solicitou a redefinição
+
+    Returns:
+        str: Token gerado
+    """
+    agora = timezone.now()
+    token = TokenRedefinicao.objects.create(
+        token=generate_token(),
+        identidade=identidade,
+        criado_em=agora,
+        expira_em=agora + timedelta(seconds=settings.PASSWORD_RESET_TIMEOUT),
+    )
+    return token.token
+
+
+def validar_token_redefinicao(token):
+    """
+    Localiza um token de redefinição ainda não usado e dentro da validade
+
+    Returns:
+        TokenRedefinicao: Token com a identidade já carregada, ou None
+    """
+    return (
+        TokenRedefinicao.objects.select_related("identidade")
+        .filter(token=token, usado=False, expira_em__gt=timezone.now())
+        .first()
+    )
+
+
+def consumir_token_redefinicao(token_redefinicao):
+    """
+    Marca como usados o token e os demais tokens pendentes do mesmo usuário
+
+    Returns:
+        bool: False se o token já tinha sido usado por outra requisição
+    """
+    with transaction.atomic():
+        if not TokenRedefinicao.objects.filter(
+            pk=token_redefinicao.pk, usado=False
+        ).update(usado=True):
+            return False
+        TokenRedefinicao.objects.filter(
+            identidade_id=token_redefinicao.identidade_id, usado=False
+        ).update(usado=True)
+    return True
+
+
+def purgar_tokens_redefinicao(batch_size=1000):
+    """
+    Apaga em lotes os tokens expirados ou já usados
+
+    Args:
+        batch_size (int): Quantidade de linhas por DELETE
+
+    Returns:
+        int: Quantidade de tokens apagados
+    """
+    vencidos = TokenRedefinicao.objects.filter(
+        Q(expira_em__lte=timezone.now()) | Q(usado=True)
+    )
+    total = 0
+    while ids := list(vencidos.values_list("pk", flat=True)[:batch_size]):
+        total += TokenRedefinicao.objects.filter(pk__in=ids).delete()[0]
+    return total
+
+
+def enfileirar_email(destinatario, assunto, corpo, corpo_html="", remetente=None):
+    """
+    Coloca um e-mail já renderizado na fila de envio
+
+    A requisição só grava a mensagem; o envio fica com o comando
+    send_queued_emails, que não segura a resposta enquanto o SMTP responde.
+
+    Args:
+        destinatario (str): Endereço de destino
+        assunto (str): Assunto do e-mail
+        corpo (str): Versão em texto plano
+        corpo_html (str): Versão HTML (opcional)
+        remetente (str): Remetente; DEFAULT_FROM_EMAIL se omitido
+
+    Returns:
+        EmailPendente: Registro criado na fila
+    """
+    return EmailPendente.objects.create(
+        destinatario=destinatario,
+        assunto=assunto,
+        corpo=corpo,
+        corpo_html=corpo_html,
+        remetente=remetente or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def _espera_apos_falha(tentativas):
+    """Intervalo até a próxima tentativa: EMAIL_FILA_ESPERA dobrando a cada falha, com teto"""
+    segundos = settings.EMAIL_FILA_ESPERA * 2 ** (tentativas - 1)
+    return timedelta(seconds=min(segundos, settings.EMAIL_FILA_ESPERA_MAXIMA))
+
+
+def _reservar_emails(limite):
+    """
+    Reserva até `limite` e-mails vencidos da fila para este processo
+
+    A reserva é um UPDATE condicional: só muda linhas ainda pendentes e
+    vencidas, grava um identificador próprio em `reserva` e adia
+    `proxima_tentativa` por EMAIL_FILA_RESERVA segundos. Se outro worker
+    reservou a mesma linha antes, ela já não está vencida e fica de fora, sem
+    depender de SELECT ... FOR UPDATE (ignorado pelo SQLite). Se este processo
+    morrer no meio do envio, as mensagens voltam para a fila quando a reserva
+    vence.
+    """
+    agora = timezone.now()
+    reserva = uuid.uuid4().hex
+    vencidos = EmailPendente.objects.filter(status="pendente", proxima_tentativa__lte=agora)
+    ids = list(
+        vencidos.order_by("proxima_tentativa", "pk").values_list("pk", flat=True)[:limite]
+    )
+    if not ids or not vencidos.filter(pk__in=ids).update(
+        reserva=reserva,
+        proxima_tentativa=agora + timedelta(seconds=settings.EMAIL_FILA_RESERVA),
+    ):
+        return []
+    return list(EmailPendente.objects.filter(reserva=reserva).order_by("pk"))
+
+
+def _mensagem_da_fila(email, conexao):
+    mensagem = EmailMultiAlternatives(
+        email.assunto, email.corpo, email.remetente, [email.destinatario], connection=conexao
+    )
+    if email.corpo_html:
+        mensagem.attach_alternative(email.corpo_html, "text/html")
+    return mensagem
+
+
+def enviar_emails_pendentes(batch_size=100, max_tentativas=None):
+    """
+    Esvazia a fila de e-mails em lotes, reutilizando uma única conexão SMTP
+
+    Cada mensagem é enviada separadamente para que uma falha afete só ela: a
+    mensagem volta para a fila com espera crescente (`_espera_apos_falha`) e,
+    após `max_tentativas`, fica marcada como 'falhou'. Depois de um erro a
+    conexão é reaberta, já que a sessão SMTP pode ter ficado inutilizável.
+
+    Args:
+        batch_size (int): Quantidade de e-mails reservados por vez
+        max_tentativas (int): Tentativas antes de desistir; EMAIL_FILA_MAX_TENTATIVAS se omitido
+
+    Returns:
+        tuple: (e-mails enviados, tentativas que falharam)
+    """
+    max_tentativas = max_tentativas or settings.EMAIL_FILA_MAX_TENTATIVAS
+    conexao = get_connection()
+    aberta = False
+    enviados = falhas = 0
+    try:
+        while lote := _reservar_emails(batch_size):
+            entregues, com_erro = [], []
+            for email in lote:
+                try:
+                    if not aberta:
+                        conexao.open()
+                        aberta = True
+                    conexao.send_messages([_mensagem_da_fila(email, conexao)])
+                    entregues.append(email.pk)
+                except Exception as e:
+                    conexao.close()
+                    aberta = False
+                    email.tentativas += 1
+                    email.ultimo_erro = str(e)
+                    if email.tentativas >= max_tentativas:
+                        email.status = "falhou"
+                    else:
+                        email.proxima_tentativa = timezone.now() + _espera_apos_falha(email.tentativas)
+                    com_erro.append(email)
+
+            EmailPendente.objects.filter(pk__in=entregues).update(
+                status="enviado",
+                enviado_em=timezone.now(),
+                tentativas=F("tentativas") + 1,
+                ultimo_erro="",
+            )
+            EmailPendente.objects.bulk_update(
+                com_erro, ["status", "tentativas", "ultimo_erro", "proxima_tentativa"]
+            )
+            enviados += len(entregues)
+            falhas += len(com_erro)
+    finally:
+        conexao.close()
+    return enviados, falhas
+
+
+def matricular_alunos(turma, alunos_ids):
+    """
+    Matricula vários alunos na turma com uma consulta e um único INSERT
+
+    Args:
+        turma (Turma): Turma de destino
+        alunos_ids (list): Ids dos alunos selecionados
+
+    Returns:
+        tuple: (quantidade de novas matrículas, quantidade já matriculada, ids inexistentes)
+    """
+    ids = {int(i) for i in alunos_ids if str(i).isdigit()}
+    encontrados = dict(
+        Aluno.objects.filter(idAluno__in=ids)
+        .annotate(
+            matriculado=Exists(
+                TurmaAluno.objects.filter(turma=turma, aluno_id=OuterRef("pk"))
+            )
+        )
+        .values_list("idAluno", "matriculado")
+    )
+    novos = [aluno_id for aluno_id, matriculado in encontrados.items() if not matriculado]
+    TurmaAluno.objects.bulk_create(
+        [TurmaAluno(turma=turma, aluno_id=aluno_id) for aluno_id in novos],
+        ignore_conflicts=True,
+    )
+    inexistentes = sorted(
+        {str(i) for i in alunos_ids} - {str(i) for i in encontrados}
+    )
+    return len(novos), len(encontrados) - len(novos), inexistentes
+
+
+def planejar_sincronizacao(turma, matriculas):
+    """
+    Compara a lista de matrículas com os alunos matriculados na turma
+
+    Alunos que já participam de grupos em atividades da turma não são removidos,
+    seguindo a mesma regra da remoção individual.
+
+    Args:
+        turma (Turma): Turma a sincronizar
+        matriculas (iterable): Números de matrícula que devem compor a turma
+
+    Returns:
+        dict: adicionar (Alunos), remover e bloqueados (TurmaAluno), desconhecidas
+        (matrículas sem aluno cadastrado) e manter (quantidade sem alteração)
+    """
+    matriculas = {str(m).strip() for m in matriculas if str(m).strip()}
+
+    atuais = list(
+        TurmaAluno.objects.filter(turma=turma)
+        .select_related("aluno")
+        .annotate(
+            em_grupo=Exists(
+                Grupo.objects.filter(
+                    atividade__turma=turma, alunos=OuterRef("aluno_id")
+                )
+            )
+        )
+        .order_by("aluno__nomeAluno")
+    )
+    matriculados = {m.aluno.matricula for m in atuais}
+
+    pendentes = sorted(matriculas - matriculados)
+    encontrados = {}
+    for inicio in range(0, len(pendentes), 1000):
+        encontrados.update(
+            (aluno.matricula, aluno)
+            for aluno in Aluno.objects.filter(matricula__in=pendentes[inicio : inicio + 1000])
+        )
+
+    saindo = [m for m in atuais if m.aluno.matricula not in matriculas]
+    return {
+        "adicionar": sorted(encontrados.values(), key=lambda a: a.nomeAluno),
+        "remover": [m for m in saindo if not m.em_grupo],
+        "bloqueados": [m for m in saindo if m.em_grupo],
+        "desconhecidas": [m for m in pendentes if m not in encontrados],
+        "manter": len(atuais) - len(saindo),
+    }
+
+
+def aplicar_sincronizacao(turma, plano):
+    """
+    Aplica em uma única transação as inclusões e remoções calculadas por `planejar_sincronizacao`
+
+    Returns:
+        tuple: (quantidade adicionada, quantidade removida)
+    """
+    with transaction.atomic():
+        TurmaAluno.objects.bulk_create(
+            [TurmaAluno(turma=turma, aluno=aluno) for aluno in plano["adicionar"]],
+            ignore_conflicts=True,
+        )
+        removidas, _ = TurmaAluno.objects.filter(
+            turma=turma, id__in=[m.id for m in plano["remover"]]
+        ).delete()
+    return len(plano["adicionar"]), removidas
@@ -0,0 +1,49 @@
+from django.db.models.signals import post_delete, post_save
+
+from .models import Atividade, Curso, Disciplina, Identidade
+from .services import (
+    invalidar_estatisticas_dashboard,
+    invalidar_totais_de_usuarios,
+    sincronizar_identidade,
+)
+
+
+def _salvar_identidade(sender, instance, **kwargs):
+    sincronizar_identidade(Identidade.tipo_do_modelo(sender), instance)
+    invalidar_totais_de_usuarios()
+    invalidar_estatisticas_dashboard()
+
+
+def _remover_identidade(sender, instance, **kwargs):
+    Identidade.objects.filter(
+        tipo=Identidade.tipo_do_modelo(sender), usuario_id=instance.pk
+    ).delete()
+    invalidar_totais_de_usuarios()
+    invalidar_estatisticas_dashboard()
+
+
+def _invalidar_dashboard(sender, **kwargs):
+    invalidar_estatisticas_dashboard()
+
+
+# Mantém o índice de identidades em sincronia com os quatro modelos de usuário
+for modelo, *_ in Identidade.ORIGENS.values():
+    post_save.connect(
+        _salvar_identidade,
+        sender=modelo,
+        dispatch_uid=f"identidade_save_{modelo.__name__}",
+    )
+    post_delete.connect(
+        _remover_identidade,
+        sender=modelo,
+        dispatch_uid=f"identidade_delete_{modelo.__name__}",
+    )
+
+# Os demais modelos contados no painel do admin
+for modelo in (Curso, Disciplina, Atividade):
+    for sinal, nome in ((post_save, "save"), (post_delete, "delete")):
+        sinal.connect(
+            _invalidar_dashboard,
+            sender=modelo,
+            dispatch_uid=f"dashboard_{nome}_{modelo.__name__}",
+        )
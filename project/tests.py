@@ -1,7 +1,38 @@
-from django.test import TestCase, Client
+import io
+import os
+from unittest import mock, skipIf
+from django.conf import settings
+from django.core.cache import cache
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.urls import reverse
-from .models import Aluno, Professor, Coordenador, Admin, Curso
-from .utils import hash_password
+from datetime import date, timedelta
+from .models import (
+    Aluno, Professor, Coordenador, Admin, Curso, Semestre, Disciplina, Turma,
+    TurmaAluno, Atividade, Grupo, Avaliacao, Competencia, Nota, FatoNota,
+    ResumoCompetencia, Notificacao, Identidade, TokenRedefinicao, EmailPendente,
+)
+from .utils import hash_password, criar_notificacao, criar_notificacoes, resumo_notificacoes
+from .services import (
+    caixa_de_avaliacoes, autenticar, reconstruir_identidades, alunos_sem_grupo,
+    estatisticas_dashboard, avaliacoes_do_grupo, concluir_avaliacoes_do_grupo,
+    avaliacoes_pendentes_por_aluno, enviar_resumo_de_avaliacoes,
+    criar_grupos, dividir_em_grupos, dividir_em_grupos_equilibrados, matricular_alunos,
+    emitir_token_redefinicao, validar_token_redefinicao, purgar_tokens_redefinicao,
+    enfileirar_email, enviar_emails_pendentes,
+)
+from .middleware import view_metrics, _percentile, SessionRenewalMiddleware
+from .analytics import (
+    agregar_notas, montar_chart_data, montar_radar_data, pivot_medias,
+    reconstruir_fatos, reconciliar_resumos,
+)
 
 class ModelTests(TestCase):
     """Testes para os modelos do sistema"""
@@ -150,3 +181,1298 @@ class ViewTests(TestCase):
         
         # Verificar se a sessão foi limpa
         self.assertFalse('user_type' in self.client.session)
+
+
+class CaixaDeAvaliacoesTests(TestCase):
+    """Testes para a caixa de avaliações do aluno"""
+
+    def setUp(self):
+        """Cria uma turma com três alunos"""
+        curso = Curso.objects.create(nome="Engenharia de Software")
+        professor = Professor.objects.create(
+            nomeProf="Professor Teste",
+            emailProf="professor@teste.com",
+            senhaProf=hash_password("123456")
+        )
+        semestre = Semestre.objects.create(ano=2025, periodo=1)
+        disciplina = Disciplina.objects.create(nome="Projeto", codigo="P1", curso=curso)
+        self.turma = Turma.objects.create(
+            codigo="A", disciplina=disciplina, professor=professor, semestre=semestre
+        )
+        self.alunos = []
+        for i in range(3):
+            aluno = Aluno.objects.create(
+                nomeAluno=f"Aluno {i}",
+                emailAluno=f"aluno{i}@teste.com",
+                senhaAluno=hash_password("123456"),
+                matricula=f"{i}",
+                curso=curso
+            )
+            TurmaAluno.objects.create(turma=self.turma, aluno=aluno)
+            self.alunos.append(aluno)
+
+    def criar_atividade(self, titulo, com_grupo=True):
+        atividade = Atividade.objects.create(
+            titulo=titulo, descricao="", dataEntrega=date(2025, 6, 1), turma=self.turma
+        )
+        if com_grupo:
+            grupo = Grupo.objects.create(nome=f"Grupo {titulo}", atividade=atividade)
+            grupo.alunos.set(self.alunos)
+        return atividade
+
+    def test_pendencias(self):
+        """Avaliações concluídas e ausentes são contadas corretamente"""
+        atividade = self.criar_atividade("A1")
+        self.criar_atividade("A2", com_grupo=False)
+        Avaliacao.objects.create(
+            avaliador_aluno=self.alunos[0], avaliado_aluno=self.alunos[1],
+            atividade=atividade, concluida=True
+        )
+
+        caixa = {a.titulo: a for a in caixa_de_avaliacoes(self.alunos[0])}
+
+        self.assertEqual(caixa["A1"].pendentes, 1)
+        self.assertTrue(caixa["A1"].pendente)
+        self.assertIsNone(caixa["A2"].grupo)
+        self.assertFalse(caixa["A2"].pendente)
+
+    def test_numero_de_consultas_constante(self):
+        """O número de consultas não cresce com o número de atividades"""
+        for i in range(10):
+            self.criar_atividade(f"A{i}")
+
+        with self.assertNumQueries(2):
+            caixa = caixa_de_avaliacoes(self.alunos[0])
+            self.assertEqual(len(caixa), 10)
+            self.assertEqual(sum(a.pendentes for a in caixa), 20)
+
+
+class AgregacaoNotasTests(TestCase):
+    """Testes para a agregação de notas por competência e semestre"""
+
+    def setUp(self):
+        """Cria notas de um aluno em dois semestres"""
+        curso = Curso.objects.create(nome="Engenharia de Software")
+        professor = Professor.objects.create(
+            nomeProf="Professor Teste",
+            emailProf="professor@teste.com",
+            senhaProf=hash_password("123456")
+        )
+        disciplina = Disciplina.objects.create(nome="Projeto", codigo="P1", curso=curso)
+        self.aluno = Aluno.objects.create(
+            nomeAluno="Aluno", emailAluno="aluno@teste.com",
+            senhaAluno=hash_password("123456"), matricula="1", curso=curso
+        )
+        self.colega = Aluno.objects.create(
+            nomeAluno="Colega", emailAluno="colega@teste.com",
+            senhaAluno=hash_password("123456"), matricula="2", curso=curso
+        )
+        self.competencias = [
+            Competencia.objects.create(nome="Comunicação", descricao=""),
+            Competencia.objects.create(nome="Liderança", descricao=""),
+        ]
+        notas = {(2024, 2): (2, 4, 5), (2025, 1): (3, 5, 1)}
+        for (ano, periodo), (par, par2, auto) in notas.items():
+            semestre = Semestre.objects.create(ano=ano, periodo=periodo)
+            turma = Turma.objects.create(
+                codigo="A", disciplina=disciplina, professor=professor, semestre=semestre
+            )
+            atividade = Atividade.objects.create(
+                titulo="T", descricao="", dataEntrega=date(ano, 6, 1), turma=turma
+            )
+            avaliacao_par = Avaliacao.objects.create(
+                avaliador_aluno=self.colega, avaliado_aluno=self.aluno,
+                atividade=atividade, concluida=True
+            )
+            avaliacao_auto = Avaliacao.objects.create(
+                avaliador_aluno=self.aluno, avaliado_aluno=self.aluno,
+                atividade=atividade, concluida=True, is_self_assessment=True
+            )
+            Nota.objects.create(avaliacao=avaliacao_par, competencia=self.competencias[0], nota=par)
+            Nota.objects.create(avaliacao=avaliacao_par, competencia=self.competencias[1], nota=par2)
+            Nota.objects.create(avaliacao=avaliacao_auto, competencia=self.competencias[0], nota=auto)
+        reconstruir_fatos()
+        reconciliar_resumos(corrigir=True)
+
+    def test_graficos(self):
+        """As médias por semestre e do radar são calculadas em uma única consulta"""
+        with self.assertNumQueries(1):
+            linhas = agregar_notas(FatoNota.objects.filter(avaliado=self.aluno))
+
+        chart_data = montar_chart_data(linhas, self.competencias)
+        radar_data = montar_radar_data(linhas, self.competencias)
+
+        self.assertEqual(chart_data["Comunicação"]["labels"], ["2024/2", "2025/1"])
+        self.assertEqual(chart_data["Comunicação"]["data"], [3.5, 2.0])
+        self.assertEqual(chart_data["Liderança"]["data"], [4.0, 5.0])
+        self.assertEqual(radar_data["media_geral"], [2.75, 4.5])
+        self.assertEqual(radar_data["auto_avaliacao"], [3.0, 0])
+
+    def test_pivot_por_turma(self):
+        """A matriz competência × turma é preenchida com um único GROUP BY"""
+        turmas = list(Turma.objects.order_by("semestre__ano"))
+        with self.assertNumQueries(1):
+            matriz = pivot_medias(
+                FatoNota.objects.all(), "turma_id",
+                [t.id for t in turmas] + [0], self.competencias
+            )
+
+        self.assertEqual(matriz.tolist(), [[3.5, 2.0, 0], [4.0, 5.0, 0]])
+
+    def test_fatos_da_avaliacao_concluida(self):
+        """Concluir uma avaliação registra suas notas na tabela de fatos"""
+        atividade = Atividade.objects.first()
+        atividade.competencias.set(self.competencias)
+        avaliacao = Avaliacao.objects.create(
+            avaliador_aluno=self.aluno, avaliado_aluno=self.colega, atividade=atividade
+        )
+        client = Client()
+        client.post(reverse('login'), {'email': 'aluno@teste.com', 'password': '123456'})
+
+        client.post(reverse('avaliar_colega', args=[avaliacao.id]), {
+            f'competencia_{c.id}': '4' for c in self.competencias
+        })
+
+        fatos = FatoNota.objects.filter(avaliado=self.colega)
+        self.assertEqual(fatos.count(), 2)
+        self.assertEqual(fatos.first().semestre, atividade.turma.semestre)
+        self.assertEqual(fatos.first().curso_id, self.aluno.curso_id)
+
+    def test_resumos_atualizados_na_conclusao(self):
+        """Concluir uma avaliação soma as notas aos resumos sem gerar divergência"""
+        atividade = Atividade.objects.get(turma__semestre__ano=2025)
+        atividade.competencias.set(self.competencias)
+        avaliacao = Avaliacao.objects.create(
+            avaliador_aluno=self.aluno, avaliado_aluno=self.colega, atividade=atividade
+        )
+        client = Client()
+        client.post(reverse('login'), {'email': 'aluno@teste.com', 'password': '123456'})
+        dados = {f'competencia_{c.id}': '4' for c in self.competencias}
+
+        client.post(reverse('avaliar_colega', args=[avaliacao.id]), dados)
+        client.post(reverse('avaliar_colega', args=[avaliacao.id]), dados)
+
+        resumo = ResumoCompetencia.objects.get(
+            aluno=self.colega, competencia=self.competencias[0], origem='pares'
+        )
+        self.assertEqual((resumo.soma, resumo.total), (4, 1))
+        self.assertEqual(reconciliar_resumos(), [])
+
+    def test_reconciliacao_detecta_divergencia(self):
+        """A reconciliação encontra e corrige resumos divergentes"""
+        ResumoCompetencia.objects.filter(aluno=self.aluno).update(total=99)
+
+        divergencias = reconciliar_resumos(corrigir=True)
+
+        self.assertEqual(len(divergencias), 6)
+        self.assertEqual(reconciliar_resumos(), [])
+
+
+class NotificacoesCacheTests(TestCase):
+    """Testes para o contador de notificações não lidas em cache"""
+
+    def setUp(self):
+        """Cria um aluno logado"""
+        cache.clear()
+        curso = Curso.objects.create(nome="Engenharia de Software")
+        self.aluno = Aluno.objects.create(
+            nomeAluno="Aluno", emailAluno="aluno@teste.com",
+            senhaAluno=hash_password("123456"), matricula="1", curso=curso
+        )
+        self.client = Client()
+        self.client.post(reverse('login'), {'email': 'aluno@teste.com', 'password': '123456'})
+
+    def test_contador_sem_consultas(self):
+        """Uma notificação nova descarta o resumo, que volta a ser servido pelo cache"""
+        resumo_notificacoes('aluno', self.aluno.idAluno)
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_notificacao("Aviso", "Mensagem", self.aluno)
+
+        resumo = resumo_notificacoes('aluno', self.aluno.idAluno)
+        self.assertEqual(resumo['count'], 1)
+        self.assertEqual(resumo['recentes'][0].titulo, "Aviso")
+        with self.assertNumQueries(0):
+            self.assertEqual(resumo_notificacoes('aluno', self.aluno.idAluno)['count'], 1)
+
+    def test_notificacao_desfeita_nao_altera_contador(self):
+        """Uma notificação cuja transação é desfeita não mexe no cache"""
+        resumo_notificacoes('aluno', self.aluno.idAluno)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    criar_notificacao("Aviso", "Mensagem", self.aluno)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+        with self.assertNumQueries(0):
+            self.assertEqual(resumo_notificacoes('aluno', self.aluno.idAluno)['count'], 0)
+
+    def test_marcar_como_lida_atualiza_contador(self):
+        """Marcar notificações como lidas atualiza o contador do cabeçalho"""
+        notificacao = criar_notificacao("Aviso 1", "Mensagem", self.aluno)
+        criar_notificacao("Aviso 2", "Mensagem", self.aluno)
+        self.assertEqual(self.client.get(reverse('perfil')).context['notificacoes_count'], 2)
+
+        self.client.get(reverse('marcar_notificacao_como_lida', args=[notificacao.id]))
+        self.assertEqual(self.client.get(reverse('perfil')).context['notificacoes_count'], 1)
+
+        self.client.post(reverse('notificacoes'), {'marcar_todas_como_lidas': '1'})
+        self.assertEqual(self.client.get(reverse('perfil')).context['notificacoes_count'], 0)
+        self.assertFalse(Notificacao.objects.filter(lida=False).exists())
+
+
+class RequestMetricsTests(TestCase):
+    """Testes para o middleware de métricas por view"""
+
+    def setUp(self):
+        """Cria um admin logado"""
+        view_metrics.reset()
+        Admin.objects.create(
+            nomeAdmin="Admin Teste",
+            emailAdmin="admin@teste.com",
+            senhaAdmin=hash_password("123456")
+        )
+        self.client = Client()
+        self.client.post(reverse('login'), {'email': 'admin@teste.com', 'password': '123456'})
+
+    def test_percentil(self):
+        """Percentil pelo método nearest-rank"""
+        valores = list(range(1, 101))
+        self.assertEqual(_percentile(valores, 50), 50)
+        self.assertEqual(_percentile(valores, 99), 99)
+        self.assertEqual(_percentile([7], 95), 7)
+        self.assertEqual(_percentile([], 95), 0)
+
+    def test_metricas_por_view(self):
+        """As requisições são agregadas pelo nome da view e exibidas no painel"""
+        for _ in range(3):
+            self.client.get(reverse('admin_semesters'))
+
+        response = self.client.get(reverse('admin_metrics'))
+
+        metricas = {m['view']: m for m in response.context['metricas']}
+        self.assertEqual(metricas['admin_semesters']['requests'], 3)
+        self.assertGreater(metricas['admin_semesters']['avg_queries'], 0)
+        self.assertIn('login', metricas)
+        # The table only covers the worker that served the page
+        self.assertContains(response, f"PID {os.getpid()}")
+
+
+class IdentidadeTests(TestCase):
+    """Testes para o índice unificado de identidades"""
+
+    def setUp(self):
+        """Cria um usuário de cada tipo"""
+        self.curso = Curso.objects.create(nome="Engenharia de Software")
+        self.aluno = Aluno.objects.create(
+            nomeAluno="Aluno Teste", emailAluno="aluno@teste.com",
+            senhaAluno=hash_password("123456"), matricula="12345", curso=self.curso
+        )
+        self.professor = Professor.objects.create(
+            nomeProf="Professor Teste", emailProf="professor@teste.com",
+            senhaProf=hash_password("123456")
+        )
+        self.admin = Admin.objects.create(
+            nomeAdmin="Admin Teste", emailAdmin="admin@teste.com",
+            senhaAdmin=hash_password("123456")
+        )
+        self.client = Client()
+
+    def test_indice_sincronizado(self):
+        """Criação, alteração e exclusão de usuários refletem no índice"""
+        total_usuarios = (
+            Aluno.objects.count() + Professor.objects.count()
+            + Coordenador.objects.count() + Admin.objects.count()
+        )
+        self.assertEqual(Identidade.objects.count(), total_usuarios)
+
+        self.professor.emailProf = "novo@teste.com"
+        self.professor.save()
+        identidade = Identidade.objects.get(tipo='professor', usuario_id=self.professor.pk)
+        self.assertEqual(identidade.email, "novo@teste.com")
+
+        self.aluno.delete()
+        self.assertFalse(Identidade.objects.filter(tipo='aluno').exists())
+
+    def test_login_com_uma_consulta(self):
+        """Um login de admin resolve o usuário com uma única consulta ao índice"""
+        with self.assertNumQueries(1):
+            identidade = autenticar("admin@teste.com", "123456")
+        self.assertEqual((identidade.tipo, identidade.usuario_id), ('admin', self.admin.pk))
+
+        response = self.client.post(reverse('login'), {'email': 'admin@teste.com', 'password': '123456'})
+        self.assertRedirects(response, reverse('home'))
+        self.assertEqual(self.client.session['user_type'], 'admin')
+
+    def test_reconstruir_indice(self):
+        """A reconstrução recupera identidades ausentes"""
+        total = Identidade.objects.count()
+        Identidade.objects.all().delete()
+        self.assertEqual(reconstruir_identidades(), total)
+        self.assertTrue(Identidade.objects.filter(email="professor@teste.com").exists())
+
+
+class TokenRedefinicaoTests(TestCase):
+    """Testes para os tokens de redefinição de senha"""
+
+    def setUp(self):
+        """Cria um aluno com sua identidade"""
+        self.curso = Curso.objects.create(nome="Engenharia de Software")
+        self.aluno = Aluno.objects.create(
+            nomeAluno="Aluno Teste", emailAluno="aluno@teste.com",
+            senhaAluno=hash_password("123456"), matricula="12345", curso=self.curso
+        )
+        self.identidade = Identidade.objects.get(tipo='aluno', usuario_id=self.aluno.pk)
+        self.client = Client()
+
+    def confirmar(self, token, senha):
+        return self.client.post(
+            reverse('reset_password_confirm', kwargs={'token': token}),
+            {'password': senha, 'confirm_password': senha},
+        )
+
+    def test_token_de_uso_unico(self):
+        """O token redefine a senha uma única vez e a identidade é sincronizada"""
+        token = emitir_token_redefinicao(self.identidade)
+        with self.assertNumQueries(1):
+            self.assertIsNotNone(validar_token_redefinicao(token))
+
+        self.assertRedirects(self.confirmar(token, 'nova'), reverse('login'))
+        self.identidade.refresh_from_db()
+        self.assertEqual(self.identidade.senha, hash_password('nova'))
+
+        self.confirmar(token, 'outra')
+        self.identidade.refresh_from_db()
+        self.assertEqual(self.identidade.senha, hash_password('nova'))
+
+    def test_token_expirado(self):
+        """Tokens expirados são rejeitados e removidos pela limpeza"""
+        token = emitir_token_redefinicao(self.identidade)
+        TokenRedefinicao.objects.update(expira_em=timezone.now())
+        self.assertIsNone(validar_token_redefinicao(token))
+
+        valido = emitir_token_redefinicao(self.identidade)
+        self.assertEqual(purgar_tokens_redefinicao(batch_size=1), 1)
+        self.assertEqual(
+            list(TokenRedefinicao.objects.values_list('token', flat=True)), [valido]
+        )
+
+
+class ImportacaoUsuariosTests(TestCase):
+    """Testes para a importação de usuários em lote"""
+
+    def setUp(self):
+        """Cria um curso, um aluno existente e um admin logado"""
+        self.curso = Curso.objects.create(nome="Engenharia de Software")
+        Aluno.objects.create(
+            nomeAluno="Existente", emailAluno="existente@teste.com",
+            senhaAluno=hash_password("123456"), matricula="00001", curso=self.curso
+        )
+        Admin.objects.create(
+            nomeAdmin="Admin Teste", emailAdmin="admin@teste.com",
+            senhaAdmin=hash_password("123456")
+        )
+        self.client = Client()
+        self.client.post(reverse('login'), {'email': 'admin@teste.com', 'password': '123456'})
+
+    def importar(self, conteudo, import_type='alunos'):
+        arquivo = SimpleUploadedFile('usuarios.csv', conteudo.encode('utf-8'), content_type='text/csv')
+        return self.client.post(
+            reverse('admin_import_users'), {'import_type': import_type, 'file': arquivo}
+        )
+
+    def test_importacao_com_relatorio_de_erros(self):
+        """Linhas válidas são gravadas e as inválidas aparecem no relatório"""
+        linhas = [f"Aluno {i},aluno{i}@teste.com,{i:05d},{self.curso.id}" for i in range(10, 60)]
+        linhas += [
+            f"Sem email,,99990,{self.curso.id}",
+            "Curso errado,errado@teste.com,99991,9999",
+            f"Repetido,existente@teste.com,99992,{self.curso.id}",
+            f"Duplicado,aluno10@teste.com,99993,{self.curso.id}",
+        ]
+        response = self.importar("nome,email,matricula,curso_id\n" + "\n".join(linhas))
+
+        results = response.context['results']
+        self.assertEqual((results['total'], results['success'], results['failures']), (54, 50, 4))
+        self.assertEqual(results['errors'][0], "Linha 52: campo obrigatório ausente (email)")
+        self.assertEqual(Aluno.objects.get(emailAluno="aluno10@teste.com").matricula, "00010")
+        self.assertTrue(Identidade.objects.filter(email="aluno59@teste.com", tipo='aluno').exists())
+
+    def test_consultas_em_lote(self):
+        """O número de consultas não cresce linha a linha"""
+        def csv(inicio, total):
+            return "nome,email\n" + "\n".join(
+                f"Prof {i},prof{i}@teste.com" for i in range(inicio, inicio + total)
+            )
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.importar(csv(0, 300), 'professores')
+        self.assertLess(len(consultas), 20)
+        self.assertEqual(Professor.objects.count(), 300)
+
+    def test_leitura_em_blocos(self):
+        """CSV e XLSX são lidos em blocos e duplicatas entre blocos são detectadas"""
+        from io import BytesIO
+        from openpyxl import Workbook
+        from .importacao import ImportacaoUsuarios, ler_csv_em_blocos, ler_xlsx_em_blocos
+
+        conteudo = "nome,email\n" + "\n".join(f"Prof {i},prof{i}@teste.com" for i in range(25))
+        conteudo += "\nRepetido,prof3@teste.com"
+        importacao = ImportacaoUsuarios('professores')
+        blocos = list(ler_csv_em_blocos(BytesIO(conteudo.encode('utf-8')), tamanho=10))
+        self.assertEqual([len(b) for b in blocos], [10, 10, 6])
+        for bloco in blocos:
+            importacao.processar(bloco)
+        self.assertEqual(importacao.resultado['success'], 25)
+        self.assertEqual(importacao.resultado['errors'], ["Linha 27: já existe um cadastro com este email"])
+
+        planilha = Workbook()
+        planilha.active.append(['nome', 'email', 'matricula', 'curso_id'])
+        planilha.active.append(['Aluno Planilha', 'planilha@teste.com', 4567, self.curso.id])
+        arquivo = BytesIO()
+        planilha.save(arquivo)
+        arquivo.seek(0)
+        importacao = ImportacaoUsuarios('alunos')
+        for bloco in ler_xlsx_em_blocos(arquivo):
+            importacao.processar(bloco)
+        self.assertEqual(Aluno.objects.get(emailAluno='planilha@teste.com').matricula, '4567')
+
+
+class FormacaoGruposTests(TestCase):
+    """Testes para a criação de grupos e da matriz de avaliações"""
+
+    def setUp(self):
+        """Cria uma turma com doze alunos e um professor logado"""
+        curso = Curso.objects.create(nome="Engenharia de Software")
+        self.professor = Professor.objects.create(
+            nomeProf="Professor Teste", emailProf="professor@teste.com",
+            senhaProf=hash_password("123456")
+        )
+        semestre = Semestre.objects.create(ano=2025, periodo=1)
+        disciplina = Disciplina.objects.create(nome="Projeto", codigo="P1", curso=curso)
+        self.turma = Turma.objects.create(
+            codigo="A", disciplina=disciplina, professor=self.professor, semestre=semestre
+        )
+        self.alunos = []
+        for i in range(12):
+            aluno = Aluno.objects.create(
+                nomeAluno=f"Aluno {i:02d}", emailAluno=f"aluno{i}@teste.com",
+                senhaAluno=hash_password("123456"), matricula=f"{i}", curso=curso
+            )
+            TurmaAluno.objects.create(turma=self.turma, aluno=aluno)
+            self.alunos.append(aluno)
+        self.atividade = Atividade.objects.create(
+            titulo="Projeto", descricao="", dataEntrega=date(2025, 6, 1), turma=self.turma
+        )
+        self.client = Client()
+        self.client.post(reverse('login'), {'email': 'professor@teste.com', 'password': '123456'})
+
+    def test_criar_grupo_em_lote(self):
+        """Um grupo de 10 alunos é criado com poucas consultas e a matriz completa"""
+        ids = [a.idAluno for a in self.alunos[:10]]
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(
+                reverse('criar_grupo', args=[self.atividade.id]),
+                {'nome_grupo': 'Grupo 1', 'alunos': ids},
+            )
+        self.assertRedirects(
+            response, reverse('atividade_detalhe', args=[self.atividade.id]),
+            fetch_redirect_response=False,
+        )
+        self.assertLess(len(consultas), 15)
+
+        grupo = Grupo.objects.get(atividade=self.atividade)
+        self.assertEqual(grupo.alunos.count(), 10)
+        self.assertEqual(Avaliacao.objects.filter(atividade=self.atividade).count(), 100)
+        self.assertEqual(
+            Avaliacao.objects.filter(atividade=self.atividade, is_self_assessment=True).count(), 10
+        )
+
+    def test_alunos_ja_agrupados_sao_ignorados(self):
+        """Alunos que já estão em um grupo da atividade não entram em outro"""
+        ids = [a.idAluno for a in self.alunos[:3]]
+        self.client.post(reverse('criar_grupo', args=[self.atividade.id]), {'nome_grupo': 'G1', 'alunos': ids})
+        self.client.post(
+            reverse('criar_grupo', args=[self.atividade.id]),
+            {'nome_grupo': 'G2', 'alunos': ids[1:] + [self.alunos[3].idAluno]},
+        )
+        self.assertEqual(Grupo.objects.filter(atividade=self.atividade).count(), 1)
+        self.assertEqual(alunos_sem_grupo(self.atividade).count(), 9)
+
+    def test_formar_grupos_automaticamente(self):
+        """Todos os alunos disponíveis são divididos em grupos em uma requisição"""
+        grupo = criar_grupos(self.atividade, [("Grupo 1", [a.idAluno for a in self.alunos[:2]])])[0]
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.post(
+                reverse('formar_grupos', args=[self.atividade.id]),
+                {'tamanho': 4, 'semente': '42'},
+            )
+        self.assertLess(len(consultas), 15)
+
+        grupos = Grupo.objects.filter(atividade=self.atividade).exclude(pk=grupo.pk)
+        tamanhos = sorted(g.alunos.count() for g in grupos)
+        self.assertEqual(tamanhos, [3, 3, 4])
+        self.assertEqual(sorted(g.nome for g in grupos), ["Grupo 2", "Grupo 3", "Grupo 4"])
+        self.assertEqual(alunos_sem_grupo(self.atividade).count(), 0)
+        self.assertEqual(
+            Avaliacao.objects.filter(atividade=self.atividade).count(), 4 + 9 + 9 + 16
+        )
+
+    def test_divisao_reproduzivel(self):
+        """A mesma semente gera a mesma divisão e nenhum grupo fica com um aluno só"""
+        ids = list(range(23))
+        self.assertEqual(dividir_em_grupos(ids, 5, 7), dividir_em_grupos(ids, 5, 7))
+        self.assertEqual(sorted(len(g) for g in dividir_em_grupos(ids, 5)), [4, 4, 5, 5, 5])
+        self.assertEqual([len(g) for g in dividir_em_grupos([1, 2, 3], 2)], [3])
+        # With pairs and an odd count, one group takes the extra student
+        self.assertEqual(sorted(len(g) for g in dividir_em_grupos(range(5), 2)), [2, 3])
+        self.assertEqual(sorted(len(g) for g in dividir_em_grupos(range(7), 2)), [2, 2, 3])
+
+    def test_formar_grupos_equilibrados(self):
+        """No modo equilibrado cada grupo recebe alunos fortes e fracos"""
+        competencia = Competencia.objects.create(nome="Comunicação", descricao="")
+        self.atividade.competencias.add(competencia)
+        fortes = {a.idAluno for a in self.alunos[:6]}
+        for aluno in self.alunos:
+            nota = 5 if aluno.idAluno in fortes else 1
+            ResumoCompetencia.objects.create(
+                aluno=aluno, competencia=competencia, semestre=self.turma.semestre,
+                origem='pares', soma=nota * 3, total=3
+            )
+
+        # The seed comes from a free text field
+        response = self.client.post(
+            reverse('formar_grupos', args=[self.atividade.id]),
+            {'tamanho': 2, 'modo': 'equilibrado', 'semente': 'turma-a'},
+        )
+        self.assertEqual(response.status_code, 302)
+
+        grupos = Grupo.objects.filter(atividade=self.atividade).prefetch_related('alunos')
+        self.assertEqual(len(grupos), 6)
+        for grupo in grupos:
+            membros = {a.idAluno for a in grupo.alunos.all()}
+            self.assertEqual(len(membros & fortes), 1)
+
+        ids = [a.idAluno for a in self.alunos]
+        self.assertEqual(
+            dividir_em_grupos_equilibrados(self.atividade, ids, 2, '42'),
+            dividir_em_grupos_equilibrados(self.atividade, ids, 2, '42'),
+        )
+
+    def test_solver_reduz_desequilibrio(self):
+        """A busca local deixa as médias dos grupos mais próximas que um sorteio"""
+        import numpy as np
+        from .analytics import balancear_grupos
+
+        perfis = np.random.default_rng(0).normal(3, 1, (200, 6))
+        tamanhos = [4] * 50
+        padronizados = (perfis - perfis.mean(axis=0)) / perfis.std(axis=0)
+
+        def desequilibrio(grupos):
+            return sum(np.sum(padronizados[g].mean(axis=0) ** 2) for g in grupos)
+
+        grupos = balancear_grupos(perfis, tamanhos, semente=1)
+        self.assertEqual(sorted(i for g in grupos for i in g), list(range(200)))
+        self.assertEqual([len(g) for g in grupos], tamanhos)
+        sorteio = np.array_split(np.random.default_rng(1).permutation(200), 50)
+        self.assertLess(desequilibrio(grupos), desequilibrio(sorteio) / 5)
+
+
+class MatriculaTurmaTests(TestCase):
+    """Testes para a matrícula em lote e a sincronização da turma"""
+
+    def setUp(self):
+        """Cria uma turma, oito alunos e um admin logado"""
+        curso = Curso.objects.create(nome="Engenharia de Software")
+        professor = Professor.objects.create(
+            nomeProf="Professor Teste", emailProf="professor@teste.com",
+            senhaProf=hash_password("123456")
+        )
+        semestre = Semestre.objects.create(ano=2025, periodo=1)
+        disciplina = Disciplina.objects.create(nome="Projeto", codigo="P1", curso=curso)
+        self.turma = Turma.objects.create(
+            codigo="A", disciplina=disciplina, professor=professor, semestre=semestre
+        )
+        self.alunos = [
+            Aluno.objects.create(
+                nomeAluno=f"Aluno {i}", emailAluno=f"aluno{i}@teste.com",
+                senhaAluno=hash_password("123456"), matricula=f"M{i}", curso=curso
+            )
+            for i in range(8)
+        ]
+        Admin.objects.create(
+            nomeAdmin="Admin Teste", emailAdmin="admin@teste.com",
+            senhaAdmin=hash_password("123456")
+        )
+        self.client = Client()
+        self.client.post(reverse('login'), {'email': 'admin@teste.com', 'password': '123456'})
+        self.url = reverse('admin_class_students', args=[self.turma.id])
+
+    def test_matricula_em_lote(self):
+        """Vários alunos são matriculados com uma consulta e um INSERT"""
+        TurmaAluno.objects.create(turma=self.turma, aluno=self.alunos[0])
+        ids = [a.idAluno for a in self.alunos[:6]] + [9999]
+
+        with self.assertNumQueries(2):
+            self.assertEqual(matricular_alunos(self.turma, ids), (5, 1, ['9999']))
+        self.assertEqual(TurmaAluno.objects.filter(turma=self.turma).count(), 6)
+
+    def test_sincronizacao_com_previa(self):
+        """A prévia mostra o diff e a confirmação o aplica, preservando alunos em grupos"""
+        for aluno in self.alunos[:4]:
+            TurmaAluno.objects.create(turma=self.turma, aluno=aluno)
+        atividade = Atividade.objects.create(
+            titulo="Projeto", descricao="", dataEntrega=date(2025, 6, 1), turma=self.turma
+        )
+        criar_grupos(atividade, [("Grupo 1", [self.alunos[0].idAluno, self.alunos[1].idAluno])])
+
+        arquivo = SimpleUploadedFile('turma.csv', b"matricula\nM1\nM2\nM5\nM6\nX99\n")
+        response = self.client.post(self.url, {'action': 'sync_preview', 'arquivo': arquivo})
+
+        plano = response.context['sincronizacao']
+        self.assertEqual([a.matricula for a in plano['adicionar']], ['M5', 'M6'])
+        self.assertEqual([m.aluno.matricula for m in plano['remover']], ['M3'])
+        self.assertEqual([m.aluno.matricula for m in plano['bloqueados']], ['M0'])
+        self.assertEqual(plano['desconhecidas'], ['X99'])
+        self.assertEqual(TurmaAluno.objects.filter(turma=self.turma).count(), 4)
+
+        self.client.post(
+            self.url, {'action': 'sync_apply', 'matriculas': response.context['matriculas_sync']}
+        )
+        self.assertEqual(
+            sorted(TurmaAluno.objects.filter(turma=self.turma).values_list('aluno__matricula', flat=True)),
+            ['M0', 'M1', 'M2', 'M5', 'M6'],
+        )
+
+
+class BuscaTests(TestCase):
+    """Testes para os endpoints de busca por prefixo com paginação por chave"""
+
+    def setUp(self):
+        """Cria alunos com nomes repetidos e um admin logado"""
+        self.curso = Curso.objects.create(nome="Engenharia de Software")
+        professor = Professor.objects.create(
+            nomeProf="Professor Teste", emailProf="professor@teste.com",
+            senhaProf=hash_password("123456")
+        )
+        semestre = Semestre.objects.create(ano=2025, periodo=1)
+        disciplina = Disciplina.objects.create(nome="Projeto", codigo="P1", curso=self.curso)
+        self.turma = Turma.objects.create(
+            codigo="A", disciplina=disciplina, professor=professor, semestre=semestre
+        )
+        nomes = ["Ana", "ana", "Ana", "André", "Bruno"]
+        self.alunos = [
+            Aluno.objects.create(
+                nomeAluno=nome, emailAluno=f"aluno{i}@teste.com",
+                senhaAluno=hash_password("123456"), matricula=f"M{i}", curso=self.curso
+            )
+            for i, nome in enumerate(nomes)
+        ]
+        Admin.objects.create(
+            nomeAdmin="Admin Teste", emailAdmin="admin@teste.com",
+            senhaAdmin=hash_password("123456")
+        )
+        self.client = Client()
+        self.client.post(reverse('login'), {'email': 'admin@teste.com', 'password': '123456'})
+        self.url = reverse('buscar_alunos')
+
+    def test_paginacao_por_cursor(self):
+        """As páginas seguem o cursor sem repetir nem pular alunos com o mesmo nome"""
+        ids, cursor = [], ''
+        while True:
+            dados = self.client.get(self.url, {'q': 'AN', 'limite': 2, 'cursor': cursor}).json()
+            self.assertLessEqual(len(dados['results']), 2)
+            ids += [item['id'] for item in dados['results']]
+            cursor = dados['proximo']
+            if not cursor:
+                break
+
+        esperados = [a.idAluno for a in self.alunos[:4]]
+        self.assertEqual(ids, esperados)
+
+    def test_busca_por_matricula_e_exclusao_da_turma(self):
+        """A matrícula também é pesquisada e alunos já matriculados podem ser omitidos"""
+        TurmaAluno.objects.create(turma=self.turma, aluno=self.alunos[4])
+
+        dados = self.client.get(self.url, {'q': 'm4'}).json()
+        self.assertEqual([item['id'] for item in dados['results']], [self.alunos[4].idAluno])
+        self.assertIn('(M4)', dados['results'][0]['text'])
+
+        dados = self.client.get(self.url, {'q': 'm4', 'excluir_turma': self.turma.id}).json()
+        self.assertEqual(dados['results'], [])
+
+    def test_cursor_invalido_e_acesso(self):
+        """Cursor malformado retorna 400 e só o admin pesquisa alunos"""
+        self.assertEqual(self.client.get(self.url, {'cursor': 'xyz'}).status_code, 400)
+
+        aluno = Client()
+        aluno.post(reverse('login'), {'email': 'aluno0@teste.com', 'password': '123456'})
+        self.assertEqual(aluno.get(self.url).status_code, 403)
+        self.assertEqual(aluno.get(reverse('buscar_turmas')).status_code, 403)
+
+        professor = Client()
+        professor.post(reverse('login'), {'email': 'professor@teste.com', 'password': '123456'})
+        self.assertEqual(professor.get(self.url, {'q': 'a'}).status_code, 403)
+
+
+class DiretorioUsuariosTests(TestCase):
+    """Testes para o diretório de usuários paginado do admin"""
+
+    def setUp(self):
+        """Cria alunos em dois cursos e um admin logado"""
+        cache.clear()
+        self.cursos = [Curso.objects.create(nome=f"Curso {i}") for i in range(2)]
+        self.alunos = [
+            Aluno.objects.create(
+                nomeAluno=f"Aluno {i:02d}", emailAluno=f"aluno{i}@teste.com",
+                senhaAluno=hash_password("123456"), matricula=f"M{i}",
+                curso=self.cursos[i % 2]
+            )
+            for i in range(7)
+        ]
+        Admin.objects.create(
+            nomeAdmin="Admin Teste", emailAdmin="admin@teste.com",
+            senhaAdmin=hash_password("123456")
+        )
+        self.client = Client()
+        self.client.post(reverse('login'), {'email': 'admin@teste.com', 'password': '123456'})
+        self.url = reverse('admin_users')
+
+    def test_paginas_por_curso(self):
+        """O filtro por curso é paginado pelo cursor e usa o total em cache"""
+        from . import views
+        original = views.USUARIOS_POR_PAGINA
+        views.USUARIOS_POR_PAGINA = 2
+        try:
+            nomes, cursor = [], ''
+            while True:
+                response = self.client.get(
+                    self.url, {'papel': 'aluno', 'curso': self.cursos[0].id, 'cursor': cursor}
+                )
+                nomes += [a.nomeAluno for a in response.context['usuarios']]
+                self.assertEqual(response.context['total'], 4)
+                cursor = response.context['proximo']
+                if not cursor:
+                    break
+        finally:
+            views.USUARIOS_POR_PAGINA = original
+
+        self.assertEqual(nomes, ["Aluno 00", "Aluno 02", "Aluno 04", "Aluno 06"])
+
+    def test_totais_em_cache_e_invalidados(self):
+        """Os totais não são recontados a cada página e mudam quando um usuário é criado"""
+        response = self.client.get(self.url, {'papel': 'aluno'})
+        self.assertEqual(response.context['totais']['aluno'], 7)
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(self.url, {'papel': 'aluno'})
+        self.assertFalse(any('COUNT' in q['sql'] for q in consultas.captured_queries))
+
+        Aluno.objects.create(
+            nomeAluno="Novo", emailAluno="novo@teste.com", senhaAluno="x",
+            matricula="N1", curso=self.cursos[1]
+        )
+        response = self.client.get(self.url, {'papel': 'aluno', 'q': 'nov'})
+        self.assertEqual(response.context['totais']['aluno'], 8)
+        self.assertIsNone(response.context['total'])
+        self.assertEqual([a.nomeAluno for a in response.context['usuarios']], ["Novo"])
+
+
+class EstatisticasDashboardTests(TestCase):
+    """Testes para o retrato em cache do painel do admin"""
+
+    def setUp(self):
+        """Cria dois cursos com disciplinas e alunos"""
+        cache.clear()
+        self.curso = Curso.objects.create(nome="Engenharia de Software")
+        outro = Curso.objects.create(nome="Arquitetura")
+        for i in range(3):
+            Disciplina.objects.create(nome=f"Disciplina {i}", codigo=f"D{i}", curso=self.curso)
+        for i in range(4):
+            Aluno.objects.create(
+                nomeAluno=f"Aluno {i}", emailAluno=f"aluno{i}@teste.com", senhaAluno="x",
+                matricula=f"M{i}", curso=self.curso if i < 3 else outro
+            )
+
+    def test_contagens_por_curso(self):
+        """As contagens por curso vêm de uma consulta agregada"""
+        estatisticas = estatisticas_dashboard()
+        por_curso = {c['nome']: (c['total_disciplinas'], c['total_alunos']) for c in estatisticas['por_curso']}
+        self.assertEqual(por_curso, {"Engenharia de Software": (3, 3), "Arquitetura": (0, 1)})
+        self.assertEqual((estatisticas['cursos'], estatisticas['disciplinas'], estatisticas['alunos']), (2, 3, 4))
+
+    def test_cache_e_invalidacao(self):
+        """O retrato é servido do cache até uma disciplina ser criada"""
+        estatisticas_dashboard()
+        with self.assertNumQueries(0):
+            estatisticas_dashboard()
+
+        Disciplina.objects.create(nome="Nova", codigo="N1", curso=self.curso)
+        self.assertEqual(estatisticas_dashboard()['disciplinas'], 4)
+
+
+class AtividadeDetalheAlunoTests(TestCase):
+    """Testes para a página da atividade do aluno, que não grava no GET"""
+
+    def setUp(self):
+        """Cria um grupo de três alunos sem nenhuma avaliação gravada"""
+        curso = Curso.objects.create(nome="Engenharia de Software")
+        professor = Professor.objects.create(
+            nomeProf="Professor Teste", emailProf="professor@teste.com",
+            senhaProf=hash_password("123456")
+        )
+        semestre = Semestre.objects.create(ano=2025, periodo=1)
+        disciplina = Disciplina.objects.create(nome="Projeto", codigo="P1", curso=curso)
+        turma = Turma.objects.create(
+            codigo="A", disciplina=disciplina, professor=professor, semestre=semestre
+        )
+        self.atividade = Atividade.objects.create(
+            titulo="Projeto", descricao="", dataEntrega=date(2025, 6, 1), turma=turma
+        )
+        self.competencia = Competencia.objects.create(nome="Comunicação", descricao="")
+        self.atividade.competencias.add(self.competencia)
+        self.alunos = [
+            Aluno.objects.create(
+                nomeAluno=f"Aluno {i}", emailAluno=f"aluno{i}@teste.com",
+                senhaAluno=hash_password("123456"), matricula=f"M{i}", curso=curso
+            )
+            for i in range(3)
+        ]
+        grupo = Grupo.objects.create(nome="Grupo 1", atividade=self.atividade)
+        grupo.alunos.set(self.alunos)
+        self.client = Client()
+        self.client.post(reverse('login'), {'email': 'aluno0@teste.com', 'password': '123456'})
+
+    def test_detalhe_sem_escritas(self):
+        """Abrir a atividade não cria avaliações nem executa escritas"""
+        with self.assertNumQueries(1):
+            grupo, roster = avaliacoes_do_grupo(self.atividade, self.alunos[0])
+        self.assertEqual(grupo.nome, "Grupo 1")
+        self.assertEqual([c.nomeAluno for c, _ in roster], ["Aluno 0", "Aluno 1", "Aluno 2"])
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('atividade_detalhe', args=[self.atividade.id]))
+        self.assertEqual(response.status_code, 200)
+        escritas = [
+            q['sql'] for q in consultas.captured_queries
+            if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+            and 'django_session' not in q['sql']
+        ]
+        self.assertEqual(escritas, [])
+        self.assertFalse(Avaliacao.objects.exists())
+        self.assertEqual(len(response.context['avaliacoes']), 2)
+
+    def test_avaliacao_criada_no_envio(self):
+        """A avaliação é criada e concluída quando o formulário é enviado"""
+        url = reverse('avaliar_membro', args=[self.atividade.id, self.alunos[1].idAluno])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertFalse(Avaliacao.objects.exists())
+
+        self.client.post(url, {f'competencia_{self.competencia.id}': '5'})
+
+        avaliacao = Avaliacao.objects.get()
+        self.assertTrue(avaliacao.concluida)
+        self.assertFalse(avaliacao.is_self_assessment)
+        self.assertEqual(avaliacao.notas.get().nota, 5)
+
+        self.client.post(
+            reverse('avaliar_membro', args=[self.atividade.id, self.alunos[0].idAluno]),
+            {f'competencia_{self.competencia.id}': '4'},
+        )
+        self.assertTrue(Avaliacao.objects.get(avaliado_aluno=self.alunos[0]).is_self_assessment)
+
+    def test_avaliar_grupo_em_lote(self):
+        """O grupo inteiro é avaliado em uma transação, e reenviar não duplica nada"""
+        dados = {
+            f'aluno_{aluno.idAluno}_competencia_{self.competencia.id}': str(3 + i)
+            for i, aluno in enumerate(self.alunos)
+        }
+        url = reverse('avaliar_grupo', args=[self.atividade.id])
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.client.post(url, dados)
+        self.client.post(url, dados)
+
+        self.assertEqual(Avaliacao.objects.filter(concluida=True).count(), 3)
+        self.assertEqual(Nota.objects.count(), 3)
+        self.assertEqual(
+            Avaliacao.objects.get(avaliado_aluno=self.alunos[2]).notas.get().nota, 5
+        )
+        self.assertEqual(Notificacao.objects.filter(aluno__in=self.alunos[1:]).count(), 2)
+        self.assertFalse(Notificacao.objects.filter(aluno=self.alunos[0]).exists())
+
+    def test_avaliar_grupo_valida_tudo_antes(self):
+        """Uma nota inválida de qualquer membro impede todas as gravações"""
+        dados = {
+            f'aluno_{aluno.idAluno}_competencia_{self.competencia.id}': '4'
+            for aluno in self.alunos
+        }
+        dados[f'aluno_{self.alunos[2].idAluno}_competencia_{self.competencia.id}'] = '9'
+
+        self.client.post(reverse('avaliar_grupo', args=[self.atividade.id]), dados)
+
+        self.assertFalse(Avaliacao.objects.exists())
+        self.assertFalse(Nota.objects.exists())
+
+    def test_concluir_grupo_com_escritas_em_lote(self):
+        """Notas, flags e notificações usam um INSERT ou UPDATE cada"""
+        notas = {aluno.idAluno: {self.competencia.id: 4} for aluno in self.alunos}
+        with CaptureQueriesContext(connection) as consultas:
+            concluidas = concluir_avaliacoes_do_grupo(self.atividade, self.alunos[0], notas)
+        self.assertEqual(sorted(concluidas), [a.idAluno for a in self.alunos])
+
+        def contar(inicio):
+            return sum(1 for q in consultas.captured_queries if q['sql'].startswith(inicio))
+
+        self.assertEqual(contar('INSERT INTO "project_nota"'), 1)
+        self.assertEqual(contar('INSERT INTO "project_notificacao"'), 1)
+        self.assertEqual(contar('UPDATE "project_avaliacao"'), 1)
+        self.assertEqual(contar('UPDATE "project_resumocompetencia"'), 1)
+        self.assertEqual(
+            sorted(ResumoCompetencia.objects.values_list('aluno_id', 'origem', 'soma', 'total')),
+            [(self.alunos[0].idAluno, 'auto', 4, 1)]
+            + [(a.idAluno, 'pares', 4, 1) for a in self.alunos[1:]],
+        )
+        self.assertEqual(concluir_avaliacoes_do_grupo(self.atividade, self.alunos[0], notas), [])
+
+        # A second evaluator adds to the existing rows in the same single UPDATE
+        notas = {aluno.idAluno: {self.competencia.id: 2} for aluno in self.alunos}
+        with CaptureQueriesContext(connection) as consultas:
+            concluir_avaliacoes_do_grupo(self.atividade, self.alunos[1], notas)
+        self.assertEqual(contar('UPDATE "project_resumocompetencia"'), 1)
+        self.assertEqual(
+            ResumoCompetencia.objects.get(aluno=self.alunos[2], origem='pares').soma, 6
+        )
+        self.assertEqual(reconciliar_resumos(), [])
+
+    def test_concluir_grupo_sem_competencias(self):
+        """Atividades sem competências concluem as avaliações sem nenhuma nota"""
+        self.atividade.competencias.clear()
+        notas = {aluno.idAluno: {} for aluno in self.alunos}
+        concluidas = concluir_avaliacoes_do_grupo(self.atividade, self.alunos[0], notas)
+        self.assertEqual(sorted(concluidas), [a.idAluno for a in self.alunos])
+        self.assertEqual(Avaliacao.objects.filter(concluida=True).count(), 3)
+        self.assertFalse(Nota.objects.exists())
+
+
+class NotificacoesEmMassaTests(TestCase):
+    """Testes para a criação de notificações em lote"""
+
+    def setUp(self):
+        """Cria cinco alunos"""
+        cache.clear()
+        curso = Curso.objects.create(nome="Engenharia de Software")
+        self.alunos = [
+            Aluno.objects.create(
+                nomeAluno=f"Aluno {i}", emailAluno=f"aluno{i}@teste.com",
+                senhaAluno="x", matricula=f"M{i}", curso=curso
+            )
+            for i in range(5)
+        ]
+
+    def test_queryset_em_lotes_e_cache(self):
+        """Os INSERTs saem em lotes e os resumos em cache são descartados"""
+        resumo_notificacoes('aluno', self.alunos[0].idAluno)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as consultas:
+                total = criar_notificacoes(
+                    Aluno.objects.all(), "Aviso", "Mensagem", batch_size=2
+                )
+
+        self.assertEqual(total, 5)
+        inserts = [q for q in consultas.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 3)
+        resumo = resumo_notificacoes('aluno', self.alunos[0].idAluno)
+        self.assertEqual(resumo['count'], 1)
+        self.assertEqual(resumo['recentes'][0].titulo, "Aviso")
+
+    def test_lista_de_ids(self):
+        """Uma lista de IDs exige o tipo do destinatário"""
+        ids = [a.idAluno for a in self.alunos[:2]]
+        with self.assertRaises(ValueError):
+            criar_notificacoes(ids, "Aviso", "Mensagem")
+
+        self.assertEqual(criar_notificacoes(ids, "Aviso", "Mensagem", user_type='aluno'), 2)
+        self.assertEqual(Notificacao.objects.filter(aluno_id__in=ids).count(), 2)
+
+    def test_nova_atividade_e_avisos_na_mesma_transacao(self):
+        """A atividade avisa os alunos da turma e não fica gravada se o aviso falhar"""
+        professor = Professor.objects.create(
+            nomeProf="Professor Teste", emailProf="professor@teste.com",
+            senhaProf=hash_password("123456")
+        )
+        disciplina = Disciplina.objects.create(
+            nome="Projeto", codigo="P1", curso=self.alunos[0].curso
+        )
+        turma = Turma.objects.create(
+            codigo="A", disciplina=disciplina, professor=professor,
+            semestre=Semestre.objects.create(ano=2025, periodo=1)
+        )
+        for aluno in self.alunos[:3]:
+            TurmaAluno.objects.create(turma=turma, aluno=aluno)
+        competencia = Competencia.objects.create(nome="Comunicação", descricao="")
+        self.client.post(reverse('login'), {'email': 'professor@teste.com', 'password': '123456'})
+        dados = {
+            'titulo': 'Projeto', 'descricao': 'Descrição', 'turma': turma.id,
+            'data_entrega': '2025-06-01', 'competencias': [competencia.id],
+        }
+
+        with mock.patch('project.views.criar_notificacoes', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse('criar_atividade'), dados)
+        self.assertFalse(Atividade.objects.exists())
+
+        self.client.post(reverse('criar_atividade'), dados)
+        self.assertEqual(
+            Notificacao.objects.filter(
+                titulo="Nova atividade publicada", link=f"/atividade/{Atividade.objects.get().id}/"
+            ).count(),
+            3,
+        )
+
+
+class LembretesPrazoTests(TestCase):
+    """Testes para os lembretes de prazo e o resumo de avaliações por e-mail"""
+
+    def setUp(self):
+        """Cria uma atividade com entrega em dois dias e outra em um mês"""
+        cache.clear()
+        curso = Curso.objects.create(nome="Engenharia de Software")
+        professor = Professor.objects.create(
+            nomeProf="Professor Teste", emailProf="professor@teste.com", senhaProf="x"
+        )
+        semestre = Semestre.objects.create(ano=2025, periodo=1)
+        disciplina = Disciplina.objects.create(nome="Projeto", codigo="P1", curso=curso)
+        turma = Turma.objects.create(
+            codigo="A", disciplina=disciplina, professor=professor, semestre=semestre
+        )
+        self.alunos = [
+            Aluno.objects.create(
+                nomeAluno=f"Aluno {i}", emailAluno=f"aluno{i}@teste.com",
+                senhaAluno="x", matricula=f"M{i}", curso=curso
+            )
+            for i in range(3)
+        ]
+        hoje = timezone.localdate()
+        self.proxima, distante = [
+            Atividade.objects.create(
+                titulo=titulo, descricao="", dataEntrega=hoje + timedelta(days=dias), turma=turma
+            )
+            for titulo, dias in (("Próxima", 2), ("Distante", 30))
+        ]
+        for atividade in (self.proxima, distante):
+            criar_grupos(atividade, [("Grupo 1", [a.idAluno for a in self.alunos])])
+
+        self.competencia = Competencia.objects.create(nome="Comunicação", descricao="")
+        self.proxima.competencias.add(self.competencia)
+
+        # Aluno 0 already evaluated everyone
+        concluir_avaliacoes_do_grupo(
+            self.proxima, self.alunos[0], {a.idAluno: {self.competencia.id: 2} for a in self.alunos}
+        )
+
+    def test_pendencias_em_uma_consulta(self):
+        """As pendências de todos os alunos vêm de uma consulta agrupada"""
+        hoje = timezone.localdate()
+        with self.assertNumQueries(1):
+            linhas = list(avaliacoes_pendentes_por_aluno(hoje, hoje + timedelta(days=3)))
+
+        self.assertEqual(
+            [(l['aluno_id'], l['titulo'], l['pendentes']) for l in linhas],
+            [(self.alunos[1].idAluno, "Próxima", 2), (self.alunos[2].idAluno, "Próxima", 2)],
+        )
+
+    def test_pendencias_iguais_as_da_caixa(self):
+        """Lembrete e caixa de avaliações contam as pendências da mesma forma"""
+        aluno = self.alunos[1]
+        TurmaAluno.objects.create(turma=self.proxima.turma, aluno=aluno)
+        # Self-assessment plus a colleague who then leaves the group
+        concluir_avaliacoes_do_grupo(
+            self.proxima, aluno,
+            {a.idAluno: {self.competencia.id: 3} for a in self.alunos[1:]},
+        )
+        self.proxima.grupos.get().alunos.remove(self.alunos[2])
+
+        hoje = timezone.localdate()
+        lembrete = {
+            l['atividade_id']: l['pendentes']
+            for l in avaliacoes_pendentes_por_aluno(hoje, hoje + timedelta(days=3))
+            if l['aluno_id'] == aluno.idAluno
+        }
+        caixa = {a.id: a.pendentes for a in caixa_de_avaliacoes(aluno)}
+        self.assertEqual(lembrete[self.proxima.id], 1)
+        self.assertEqual(caixa[self.proxima.id], 1)
+
+    def test_comando_envia_lembretes_e_emails(self):
+        """Cada aluno pendente recebe uma notificação e um email"""
+        call_command('send_deadline_reminders', '--email', stdout=io.StringIO())
+
+        lembretes = Notificacao.objects.filter(titulo="Avaliações pendentes")
+        self.assertEqual(
+            sorted(lembretes.values_list('aluno_id', flat=True)),
+            [self.alunos[1].idAluno, self.alunos[2].idAluno],
+        )
+        self.assertIn("'Próxima'", lembretes.first().mensagem)
+        self.assertEqual(lembretes.first().link, reverse('atividades'))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn("Próxima", mail.outbox[0].body)
+        self.assertIn("http://localhost/atividades/", mail.outbox[0].body)
+
+    def test_resumo_em_lotes_por_uma_conexao(self):
+        """Pendências e notas recebidas vêm de duas consultas e cada lote sai em um send_messages"""
+        concluir_avaliacoes_do_grupo(
+            self.proxima, self.alunos[1], {a.idAluno: {self.competencia.id: 4} for a in self.alunos}
+        )
+
+        enviar = locmem.EmailBackend.send_messages
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', autospec=True, side_effect=enviar) as envios, \
+                mock.patch('project.services.get_connection', wraps=mail.get_connection) as conexoes, \
+                self.assertNumQueries(2):
+            enviados = enviar_resumo_de_avaliacoes(timezone.now() - timedelta(days=1), batch_size=2)
+
+        self.assertEqual(enviados, 3)
+        self.assertEqual(conexoes.call_count, 1)
+        self.assertEqual([len(c.args[1]) for c in envios.call_args_list], [2, 1])
+        corpos = {m.to[0]: m.body for m in mail.outbox}
+        self.assertIn("Próxima: 1 nota(s), média 4,0", corpos["aluno0@teste.com"])
+        self.assertIn("Próxima: 1 nota(s), média 2,0", corpos["aluno1@teste.com"])
+        self.assertIn("Próxima: 2 nota(s), média 3,0", corpos["aluno2@teste.com"])
+        self.assertIn("Distante: 2 avaliação(ões) pendente(s)", corpos["aluno1@teste.com"])
+        self.assertIn("Próxima: 2 avaliação(ões) pendente(s)", corpos["aluno2@teste.com"])
+        self.assertIn("http://localhost/home/", corpos["aluno2@teste.com"])
+
+
+class FilaDeEmailsTests(TestCase):
+    """Testes para a fila de e-mails e o comando send_queued_emails"""
+
+    def test_redefinicao_apenas_enfileira(self):
+        """A requisição só grava o e-mail; o comando faz o envio"""
+        curso = Curso.objects.create(nome="Engenharia de Software")
+        Aluno.objects.create(
+            nomeAluno="Aluno Teste", emailAluno="aluno@teste.com",
+            senhaAluno=hash_password("123456"), matricula="12345", curso=curso
+        )
+        response = self.client.post(reverse('reset_password'), {'email': 'aluno@teste.com'})
+        self.assertRedirects(response, reverse('login'))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EmailPendente.objects.get().status, 'pendente')
+
+        call_command('send_queued_emails', stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['aluno@teste.com'])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        email = EmailPendente.objects.get()
+        self.assertEqual((email.status, email.tentativas), ('enviado', 1))
+
+    def test_falha_volta_para_fila_com_espera(self):
+        """Uma falha afeta só a mensagem, que volta com espera até esgotar as tentativas"""
+        for destinatario in ['a@teste.com', 'ruim@teste.com', 'b@teste.com']:
+            enfileirar_email(destinatario, 'Assunto', 'Corpo')
+        enviar = locmem.EmailBackend.send_messages
+
+        def falhar_para_ruim(backend, mensagens):
+            if mensagens[0].to == ['ruim@teste.com']:
+                raise ConnectionError('conexão recusada')
+            return enviar(backend, mensagens)
+
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', autospec=True, side_effect=falhar_para_ruim), \
+                mock.patch.object(locmem.EmailBackend, 'open', autospec=True) as abrir, \
+                mock.patch('project.services.get_connection', wraps=mail.get_connection) as conexoes:
+            self.assertEqual(enviar_emails_pendentes(batch_size=2), (2, 1))
+            # Reopened once after the failure, over a single backend instance
+            self.assertEqual(conexoes.call_count, 1)
+            self.assertEqual(abrir.call_count, 2)
+
+            ruim = EmailPendente.objects.get(destinatario='ruim@teste.com')
+            self.assertEqual((ruim.status, ruim.tentativas), ('pendente', 1))
+            self.assertGreater(ruim.proxima_tentativa, timezone.now() + timedelta(seconds=50))
+            self.assertEqual(enviar_emails_pendentes(), (0, 0))
+
+            EmailPendente.objects.filter(pk=ruim.pk).update(tentativas=4, proxima_tentativa=timezone.now())
+            self.assertEqual(enviar_emails_pendentes(), (0, 1))
+        ruim.refresh_from_db()
+        self.assertEqual((ruim.status, ruim.tentativas), ('falhou', 5))
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_reserva_nao_entrega_a_mesma_mensagem_duas_vezes(self):
+        """Um worker que leu a fila antes da reserva de outro não pega as mesmas linhas"""
+        from .services import _reservar_emails
+
+        for destinatario in ['a@teste.com', 'b@teste.com', 'c@teste.com']:
+            enfileirar_email(destinatario, 'Assunto', 'Corpo')
+        ids = list(EmailPendente.objects.values_list('pk', flat=True))
+        primeiro = _reservar_emails(2)
+        self.assertEqual([e.pk for e in primeiro], ids[:2])
+
+        # Second worker whose SELECT ran before the first one's UPDATE
+        with mock.patch.object(
+            QuerySet, 'values_list', autospec=True, side_effect=lambda qs, *a, **k: ids
+        ):
+            segundo = _reservar_emails(3)
+        self.assertEqual([e.pk for e in segundo], ids[2:])
+        self.assertEqual(_reservar_emails(3), [])
+
+
+class SessoesTests(TestCase):
+    """Testes para a renovação de sessões e as mensagens em cookie"""
+
+    def setUp(self):
+        cache.clear()
+        curso = Curso.objects.create(nome="Engenharia de Software")
+        Aluno.objects.create(
+            nomeAluno="Aluno Teste", emailAluno="aluno@teste.com",
+            senhaAluno=hash_password("123456"), matricula="12345", curso=curso
+        )
+        self.client.post(reverse('login'), {'email': 'aluno@teste.com', 'password': '123456'})
+
+    def escritas(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        return response, [
+            q['sql'] for q in consultas.captured_queries
+            if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+
+    def test_pagina_nao_regrava_a_sessao(self):
+        """Uma página comum não grava a sessão nem reenvia o cookie"""
+        response, escritas = self.escritas(reverse('perfil'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(escritas, [])
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+    def test_sessao_renovada_perto_de_expirar(self):
+        """Perto de expirar, a sessão é regravada e o cookie renovado"""
+        sessao = self.client.session
+        vencimento = settings.SESSION_COOKIE_AGE - settings.SESSION_RENEW_WINDOW
+        sessao[SessionRenewalMiddleware.RENEWED_AT] -= vencimento
+        sessao.save()
+
+        response = self.client.get(reverse('perfil'))
+        self.assertIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertGreater(
+            self.client.session[SessionRenewalMiddleware.RENEWED_AT],
+            sessao[SessionRenewalMiddleware.RENEWED_AT],
+        )
+
+    def test_mensagens_sem_banco(self):
+        """Mensagens ficam no cookie, sem criar sessão para o visitante"""
+        self.client.get(reverse('logout'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home'), follow=True)
+        self.assertIn("Você precisa estar logado", response.content.decode())
+
+    @skipIf(settings.SHARED_CACHE or 'SESSION_MODE' in os.environ, "depende do CACHE_BACKEND e SESSION_MODE padrão")
+    def test_cache_local_usa_sessao_no_banco(self):
+        """Com o cache por processo, a sessão padrão fica no banco e o logout vale para todos os workers"""
+        self.assertEqual(settings.SESSION_ENGINE, 'django.contrib.sessions.backends.db')
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_sessao_em_cookie_assinado(self):
+        """No modo signed_cookies o login funciona sem tabela de sessões"""
+        self.client.post(reverse('login'), {'email': 'aluno@teste.com', 'password': '123456'})
+        response, escritas = self.escritas(reverse('perfil'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(escritas, [])
@@ -14,6 +14,8 @@ urlpatterns = [
     path('atividade/<int:id_atividade>/', views.atividade_detalhe, name='atividade_detalhe'),
     path('avaliar/<int:id_avaliacao>/', views.avaliar_colega, name='avaliar_colega'),
     path('auto-avaliar/<int:id_avaliacao>/', views.auto_avaliar, name='auto_avaliar'),
+    path('avaliar/<int:id_atividade>/membro/<int:id_colega>/', views.avaliar_membro, name='avaliar_membro'),
+    path('avaliar/<int:id_atividade>/grupo/', views.avaliar_grupo, name='avaliar_grupo'),
     path('notas/', views.notas, name='notas'),
     path('notas/feedback/', views.feedback_personalizado, name='feedback_personalizado'),
     path('disciplinas/', views.disciplinas, name='disciplinas'),
@@ -23,6 +25,7 @@ urlpatterns = [
     # Professor functionalities
     path('criar-atividade/', views.criar_atividade, name='criar_atividade'),
     path('criar-grupo/<int:id_atividade>/', views.criar_grupo, name='criar_grupo'),
+    path('formar-grupos/<int:id_atividade>/', views.formar_grupos, name='formar_grupos'),
     
     # Admin functionalities - change the URL pattern to avoid conflict with Django admin
     path('custom-admin/dashboard/', views.admin_dashboard, name='admin_dashboard'),
@@ -36,6 +39,13 @@ urlpatterns = [
     path('custom-admin/classes/', views.admin_classes, name='admin_classes'),
     path('custom-admin/classes/<int:turma_id>/students/', views.admin_class_students, name='admin_class_students'),
     path('custom-admin/semesters/', views.admin_semesters, name='admin_semesters'),
+    path('custom-admin/metrics/', views.admin_metrics, name='admin_metrics'),
+    
+    # Typeahead search (JSON)
+    path('api/buscar/alunos/', views.buscar_alunos, name='buscar_alunos'),
+    path('api/buscar/professores/', views.buscar_professores, name='buscar_professores'),
+    path('api/buscar/disciplinas/', views.buscar_disciplinas, name='buscar_disciplinas'),
+    path('api/buscar/turmas/', views.buscar_turmas, name='buscar_turmas'),
     
     # Add debug URL
     path('custom-admin/debug/auth/', views.debug_auth, name='debug_auth'),
@@ -1,11 +1,12 @@
 import hashlib
 import random
 import string
-import csv
-import io
 import secrets
 import uuid
-from django.core.mail import EmailMultiAlternatives
+from itertools import islice
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import QuerySet
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
@@ -49,111 +50,136 @@ def generate_random_password(length=8):
     characters = string.ascii_letters + string.digits + string.punctuation
     return ''.join(random.choice(characters) for _ in range(length))
 
-def process_csv_file(file, user_type):
+def criar_notificacao(titulo, mensagem, destinatario, tipo='info', link=None):
     """
-    Processa um arquivo CSV de importação de usuários
+    Cria uma nova notificação para um usuário
     
     Args:
-        file: O arquivo CSV enviado
-        user_type (str): Tipo de usuário ('aluno', 'professor' ou 'coordenador')
-        
+        titulo (str): Título da notificação
+        mensagem (str): Conteúdo da notificação
+        destinatario (obj): Objeto do usuário (Aluno, Professor, Coordenador ou Admin)
+        tipo (str): Tipo da notificação (info, warning, success, danger)
+        link (str): Link opcional para redirecionamento
+    
     Returns:
-        list: Lista de dicionários com os dados dos usuários
+        Notificacao: Objeto da notificação criada
     """
-    decoded_file = file.read().decode('utf-8')
-    io_string = io.StringIO(decoded_file)
-    reader = csv.reader(io_string)
-    
-    # Pular cabeçalho
-    next(reader)
+    from .models import Identidade, Notificacao
     
-    users = []
-    line_num = 2  # Começando com a linha 2 (depois do cabeçalho)
-    
-    for row in reader:
-        # Validar quantidade de colunas
-        if user_type == 'aluno' and len(row) != 4:
-            raise ValueError(f"A linha {line_num} não possui 4 colunas para aluno. Formato esperado: nome,email,matricula,curso_id")
-        elif user_type == 'professor' and len(row) != 2:
-            raise ValueError(f"A linha {line_num} não possui 2 colunas para professor. Formato esperado: nome,email")
-        elif user_type == 'coordenador' and len(row) != 3:
-            raise ValueError(f"A linha {line_num} não possui 3 colunas para coordenador. Formato esperado: nome,email,curso_id")
-        
-        # Criar dicionário de usuário baseado no tipo
-        user = {}
-        if user_type == 'aluno':
-            user = {
-                'nome': row[0],
-                'email': row[1],
-                'matricula': row[2],
-                'curso_id': row[3]
-            }
-        elif user_type == 'professor':
-            user = {
-                'nome': row[0],
-                'email': row[1]
-            }
-        elif user_type == 'coordenador':
-            user = {
-                'nome': row[0],
-                'email': row[1],
-                'curso_id': row[2]
-            }
-        
-        users.append(user)
-        line_num += 1
+    user_type = Identidade.tipo_do_modelo(type(destinatario))
+    if user_type is None:
+        return None
     
-    return users
+    notificacao = Notificacao.objects.create(
+        titulo=titulo,
+        mensagem=mensagem,
+        tipo=tipo,
+        link=link,
+        **{user_type: destinatario}
+    )
+    # After the commit, so a rolled back notification does not touch the cache
+    transaction.on_commit(lambda: invalidar_notificacoes(user_type, destinatario.pk))
+    return notificacao
 
-def criar_notificacao(titulo, mensagem, destinatario, tipo='info', link=None):
+def criar_notificacoes(destinatarios, titulo, mensagem, tipo='info', link=None, user_type=None, batch_size=1000):
     """
-    Cria uma nova notificação para um usuário
+    Cria a mesma notificação para muitos usuários, com bulk_create em lotes
+    
+    Cada lote é gravado em uma transação e, depois do commit, os resumos em
+    cache dos destinatários são descartados de uma vez (delete_many).
     
     Args:
+        destinatarios: QuerySet de um dos modelos de usuário ou lista de IDs
         titulo (str): Título da notificação
         mensagem (str): Conteúdo da notificação
-        destinatario (obj): Objeto do usuário (Aluno, Professor, Coordenador ou Admin)
         tipo (str): Tipo da notificação (info, warning, success, danger)
         link (str): Link opcional para redirecionamento
+        user_type (str): Tipo dos destinatários, obrigatório para listas de IDs
+        batch_size (int): Quantidade de linhas por INSERT
     
     Returns:
-        Notificacao: Objeto da notificação criada
+        int: Quantidade de notificações criadas
     """
-    from .models import Notificacao, Aluno, Professor, Coordenador, Admin
+    from .models import Identidade, Notificacao
+    
+    if isinstance(destinatarios, QuerySet):
+        user_type = Identidade.tipo_do_modelo(destinatarios.model)
+        ids = destinatarios.order_by().values_list('pk', flat=True).iterator(chunk_size=batch_size)
+    else:
+        ids = iter(destinatarios)
+    if user_type not in Identidade.ORIGENS:
+        raise ValueError('Tipo de destinatário inválido.')
     
-    if isinstance(destinatario, Aluno):
-        return Notificacao.objects.create(
-            titulo=titulo,
-            mensagem=mensagem,
-            aluno=destinatario,
-            tipo=tipo,
-            link=link
-        )
-    elif isinstance(destinatario, Professor):
-        return Notificacao.objects.create(
-            titulo=titulo,
-            mensagem=mensagem,
-            professor=destinatario,
-            tipo=tipo,
-            link=link
-        )
-    elif isinstance(destinatario, Coordenador):
-        return Notificacao.objects.create(
-            titulo=titulo,
-            mensagem=mensagem,
-            coordenador=destinatario,
-            tipo=tipo,
-            link=link
-        )
-    elif isinstance(destinatario, Admin):
-        return Notificacao.objects.create(
-            titulo=titulo,
-            mensagem=mensagem,
-            admin=destinatario,
-            tipo=tipo,
-            link=link
-        )
-    return None
+    total = 0
+    while lote := list(islice(ids, batch_size)):
+        with transaction.atomic():
+            notificacoes = Notificacao.objects.bulk_create([
+                Notificacao(
+                    titulo=titulo,
+                    mensagem=mensagem,
+                    tipo=tipo,
+                    link=link,
+                    **{f"{user_type}_id": user_id}
+                )
+                for user_id in lote
+            ])
+            transaction.on_commit(
+                lambda lote=lote: invalidar_notificacoes_em_lote(user_type, lote)
+            )
+        total += len(notificacoes)
+    return total
+
+def _chave_notificacoes(user_type, user_id):
+    return f"notificacoes:{user_type}:{user_id}"
+
+def resumo_notificacoes(user_type, user_id):
+    """
+    Retorna a quantidade de notificações não lidas e as mais recentes, usando o cache
+    
+    Args:
+        user_type (str): Tipo de usuário ('aluno', 'professor', 'coordenador' ou 'admin')
+        user_id (int): ID do usuário
+    
+    Returns:
+        dict: {'count': int, 'recentes': list}
+    """
+    from .models import Notificacao
+    
+    if user_type not in ('aluno', 'professor', 'coordenador', 'admin') or not user_id:
+        return {'count': 0, 'recentes': []}
+    
+    chave = _chave_notificacoes(user_type, user_id)
+    resumo = cache.get(chave)
+    if resumo is None:
+        nao_lidas = Notificacao.objects.filter(lida=False, **{f"{user_type}_id": user_id})
+        resumo = {
+            'count': nao_lidas.count(),
+            'recentes': list(nao_lidas[:settings.NOTIFICACOES_RECENTES]),
+        }
+        cache.set(chave, resumo, settings.NOTIFICACOES_CACHE_TIMEOUT)
+    return resumo
+
+def invalidar_notificacoes(user_type, user_id):
+    """Descarta o resumo em cache, que será recalculado na próxima página"""
+    cache.delete(_chave_notificacoes(user_type, user_id))
+
+def invalidar_notificacoes_em_lote(user_type, user_ids):
+    """
+    Descarta de uma vez os resumos em cache de vários usuários do mesmo tipo
+    
+    Usado depois de criar notificações: apagar a chave não perde atualizações
+    quando duas notificações são criadas ao mesmo tempo, como aconteceria com
+    ler, incrementar e regravar o contador.
+    """
+    cache.delete_many([_chave_notificacoes(user_type, user_id) for user_id in user_ids])
+
+def zerar_notificacoes(user_type, user_id):
+    """Marca no cache que o usuário não possui notificações não lidas"""
+    cache.set(
+        _chave_notificacoes(user_type, user_id),
+        {'count': 0, 'recentes': []},
+        settings.NOTIFICACOES_CACHE_TIMEOUT,
+    )
 
 def tem_permissao_competencias(request):
     """Verifica se o usuário tem permissão para gerenciar competências"""
@@ -198,9 +224,25 @@ def generate_token():
     """
     return secrets.token_urlsafe(32)
 
+def url_absoluta(caminho, request=None):
+    """
+    Monta a URL absoluta de um caminho do sistema, para uso em emails
+    
+    Args:
+        caminho (str): Caminho gerado por reverse()
+        request: Objeto da requisição (opcional); sem ele, usa o primeiro de ALLOWED_HOSTS
+        
+    Returns:
+        str: URL absoluta
+    """
+    if request:
+        return request.build_absolute_uri(caminho)
+    domain = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost:8000'
+    return f"http://{domain}{caminho}"
+
 def enviar_email_redefinicao_senha(user, user_type, request=None):
     """
-    Envia email de redefinição de senha para o usuário
+    Gera o email de redefinição de senha e o coloca na fila de envio
     
     Args:
         user: Objeto do usuário (Aluno, Professor, Coordenador ou Admin)
@@ -208,44 +250,35 @@ def enviar_email_redefinicao_senha(user, user_type, request=None):
         request: Objeto da requisição (opcional, usado para gerar URLs absolutas)
         
     Returns:
-        bool: True se o email foi enviado com sucesso, False caso contrário
+        bool: True se o email foi colocado na fila de envio, False caso contrário
     """
-    # Gerar token de redefinição
-    token = generate_token()
-    
-    # Salvar token no usuário correspondente
+    from .models import Identidade
+    from .services import emitir_token_redefinicao, enfileirar_email
+
+    # Obter nome e email do usuário correspondente
     if user_type == 'aluno':
-        user.reset_token = token
-        user.save()
         nome = user.nomeAluno
         email = user.emailAluno
     elif user_type == 'professor':
-        user.reset_token = token
-        user.save()
         nome = user.nomeProf
         email = user.emailProf
     elif user_type == 'coordenador':
-        user.reset_token = token
-        user.save()
         nome = user.nomeCoord
         email = user.emailCoord
     elif user_type == 'admin':
-        user.reset_token = token
-        user.save()
         nome = user.nomeAdmin
         email = user.emailAdmin
     else:
         return False
     
+    # Gerar token de redefinição com validade
+    identidade = Identidade.objects.get(tipo=user_type, usuario_id=user.pk)
+    token = emitir_token_redefinicao(identidade)
+    
     # Construir URL de redefinição
-    if request:
-        reset_url = request.build_absolute_uri(
-            reverse('reset_password_confirm', kwargs={'token': token})
-        )
-    else:
-        # Caso não tenha request, usa o domínio padrão das configurações
-        domain = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost:8000'
-        reset_url = f"http://{domain}{reverse('reset_password_confirm', kwargs={'token': token})}"
+    reset_url = url_absoluta(
+        reverse('reset_password_confirm', kwargs={'token': token}), request
+    )
     
     # Renderizar o template HTML
     context = {
@@ -256,17 +289,11 @@ def enviar_email_redefinicao_senha(user, user_type, request=None):
     html_content = render_to_string('emails/reset_password_email.html', context)
     text_content = strip_tags(html_content)  # Versão texto plano do email
     
-    # Enviar email
-    try:
-        subject = 'Redefinição de Senha - Feedback 360°'
-        from_email = settings.DEFAULT_FROM_EMAIL
-        to_email = email
-        
-        msg = EmailMultiAlternatives(subject, text_content, from_email, [to_email])
-        msg.attach_alternative(html_content, "text/html")
-        msg.send()
-        
-        return True
-    except Exception as e:
-        print(f"Erro ao enviar email: {str(e)}")
-        return False
+    # Colocar na fila; o envio é feito pelo comando send_queued_emails
+    enfileirar_email(
+        email,
+        'Redefinição de Senha - Feedback 360°',
+        text_content,
+        corpo_html=html_content,
+    )
+    return True
@@ -3,13 +3,18 @@ import logging
 from django.contrib import messages
 from django.http import HttpResponse, JsonResponse
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Avg, Count
+from django.db import transaction
+from django.db.models import Avg, Count, Sum
 from django.utils import timezone
 from django.urls import reverse
 import pandas as pd
+import csv
 import json
+import os
 from datetime import datetime
 
+from django.conf import settings
+
 from .models import (
     Aluno,
     Professor,
@@ -25,6 +30,10 @@ from .models import (
     Semestre,
     Avaliacao,
     Notificacao,
+    FatoNota,
+    ResumoCompetencia,
+    Identidade,
+    Admin,
 )
 from .utils import (
     hash_password,
@@ -34,6 +43,45 @@ from .utils import (
     tem_permissao_competencias,
     obter_notificacoes_usuario,
     criar_notificacao,
+    criar_notificacoes,
+    invalidar_notificacoes,
+    zerar_notificacoes,
+)
+from .services import (
+    autenticar,
+    buscar_identidades,
+    alunos_sem_grupo,
+    avaliacao_para_envio,
+    avaliacoes_do_grupo,
+    caixa_de_avaliacoes,
+    concluir_avaliacao,
+    concluir_avaliacoes_do_grupo,
+    consumir_token_redefinicao,
+    aplicar_sincronizacao,
+    criar_grupos,
+    matricular_alunos,
+    planejar_sincronizacao,
+    dividir_em_grupos,
+    dividir_em_grupos_equilibrados,
+    emitir_token_redefinicao,
+    estatisticas_dashboard,
+    totais_de_usuarios,
+    validar_token_redefinicao,
+)
+from .busca import buscar_por_prefixo
+from .importacao import (
+    ImportacaoUsuarios,
+    FORMATOS as FORMATOS_IMPORTACAO,
+    ler_csv_em_blocos,
+    ler_matriculas,
+    ler_xlsx_em_blocos,
+)
+from .analytics import (
+    agregar_notas,
+    montar_chart_data,
+    montar_radar_data,
+    pivot_medias,
+    agregar_resumos,
 )
 
 
@@ -116,47 +164,30 @@ def login_required_custom(view_func):
     return wrapper
 
 
+# Welcome message prefix for each user type
+SAUDACOES = {
+    "aluno": "",
+    "professor": "Prof. ",
+    "coordenador": "Coord. ",
+    "admin": "Admin ",
+}
+
+
 def login(request):
     if request.method == "POST":
         email = request.POST["email"]
         password = request.POST["password"]
 
-        # Check if the user is an Aluno
-        user = Aluno.objects.filter(emailAluno=email).first()
-        if user and verify_password(password, user.senhaAluno):
-            request.session["user_type"] = "aluno"
-            request.session["user_id"] = user.idAluno
-            request.session["username"] = user.nomeAluno
-            messages.success(request, f"Bem-vindo, {user.nomeAluno}!")
-            return redirect("home")
-
-        # Check if the user is a Professor
-        user = Professor.objects.filter(emailProf=email).first()
-        if user and verify_password(password, user.senhaProf):
-            request.session["user_type"] = "professor"
-            request.session["user_id"] = user.idProfessor
-            request.session["username"] = user.nomeProf
-            messages.success(request, f"Bem-vindo, Prof. {user.nomeProf}!")
-            return redirect("home")
-
-        # Check if the user is a Coordenador
-        user = Coordenador.objects.filter(emailCoord=email).first()
-        if user and verify_password(password, user.senhaCoord):
-            request.session["user_type"] = "coordenador"
-            request.session["user_id"] = user.id
-            request.session["username"] = user.nomeCoord
-            messages.success(request, f"Bem-vindo, Coord. {user.nomeCoord}!")
-            return redirect("home")
-
-        # Check if the user is an Admin
-        from .models import Admin
-
-        user = Admin.objects.filter(emailAdmin=email).first()
-        if user and verify_password(password, user.senhaAdmin):
-            request.session["user_type"] = "admin"
-            request.session["user_id"] = user.id
-            request.session["username"] = user.nomeAdmin
-            messages.success(request, f"Bem-vindo, Admin {user.nomeAdmin}!")
+        # A single indexed lookup on the identity index covers all user types
+        identidade = autenticar(email, password)
+        if identidade:
+            request.session["user_type"] = identidade.tipo
+            request.session["user_id"] = identidade.usuario_id
+            request.session["username"] = identidade.nome
+            messages.success(
+                request,
+                f"Bem-vindo, {SAUDACOES[identidade.tipo]}{identidade.nome}!",
+            )
             return redirect("home")
         else:
             # Add an error message if credentials are incorrect
@@ -180,26 +211,16 @@ def resetPassword(request):
     if request.method == "POST":
         email = request.POST.get("email", "")
 
-        # Import Admin model
-        from .models import Admin
         from .utils import enviar_email_redefinicao_senha
 
-        # Check in all user types
+        # Resolve the user through the identity index
         user = None
         user_type = None
 
-        if Aluno.objects.filter(emailAluno=email).exists():
-            user = Aluno.objects.get(emailAluno=email)
-            user_type = "aluno"
-        elif Professor.objects.filter(emailProf=email).exists():
-            user = Professor.objects.get(emailProf=email)
-            user_type = "professor"
-        elif Coordenador.objects.filter(emailCoord=email).exists():
-            user = Coordenador.objects.get(emailCoord=email)
-            user_type = "coordenador"
-        elif Admin.objects.filter(emailAdmin=email).exists():
-            user = Admin.objects.get(emailAdmin=email)
-            user_type = "admin"
+        identidades = buscar_identidades(email)
+        if identidades:
+            user_type = identidades[0].tipo
+            user = identidades[0].usuario
 
         if user:
             # Generate token and send email
@@ -227,34 +248,10 @@ def reset_password_confirm(request, token):
     """
     View for confirming password reset using a token
     """
-    # Find which user has this reset token
-    user = None
-    user_type = None
-
-    # Check in all user types
-    aluno = Aluno.objects.filter(reset_token=token).first()
-    if aluno:
-        user = aluno
-        user_type = "aluno"
-    else:
-        professor = Professor.objects.filter(reset_token=token).first()
-        if professor:
-            user = professor
-            user_type = "professor"
-        else:
-            coordenador = Coordenador.objects.filter(reset_token=token).first()
-            if coordenador:
-                user = coordenador
-                user_type = "coordenador"
-            else:
-                from .models import Admin
+    # A single indexed lookup validates the token, its expiry and one-time use
+    token_redefinicao = validar_token_redefinicao(token)
 
-                admin = Admin.objects.filter(reset_token=token).first()
-                if admin:
-                    user = admin
-                    user_type = "admin"
-
-    if not user:
+    if not token_redefinicao:
         messages.error(
             request,
             "Token inválido ou expirado. Por favor, solicite uma nova redefinição de senha.",
@@ -269,19 +266,29 @@ def reset_password_confirm(request, token):
             messages.error(request, "As senhas não correspondem.")
             return render(request, "reset_password_confirm.html", {"token": token})
 
-        # Update password based on user type
-        if user_type == "aluno":
-            user.senhaAluno = hash_password(password)
-        elif user_type == "professor":
-            user.senhaProf = hash_password(password)
-        elif user_type == "coordenador":
-            user.senhaCoord = hash_password(password)
-        elif user_type == "admin":
-            user.senhaAdmin = hash_password(password)
+        with transaction.atomic():
+            # Invalidate the token before changing the password
+            if not consumir_token_redefinicao(token_redefinicao):
+                messages.error(
+                    request,
+                    "Token inválido ou expirado. Por favor, solicite uma nova redefinição de senha.",
+                )
+                return redirect("login")
+
+            user = token_redefinicao.identidade.usuario
+            user_type = token_redefinicao.identidade.tipo
+
+            # Update password based on user type
+            if user_type == "aluno":
+                user.senhaAluno = hash_password(password)
+            elif user_type == "professor":
+                user.senhaProf = hash_password(password)
+            elif user_type == "coordenador":
+                user.senhaCoord = hash_password(password)
+            elif user_type == "admin":
+                user.senhaAdmin = hash_password(password)
 
-        # Clear the reset token
-        user.reset_token = None
-        user.save()
+            user.save()
 
         messages.success(
             request,
@@ -304,31 +311,9 @@ def home(request):
     if user_type == "aluno":
         aluno = Aluno.objects.get(idAluno=user_id)
 
-        # Get pending evaluations the same way they're calculated in atividades view
-        turmas_aluno = TurmaAluno.objects.filter(aluno=aluno)
-        all_atividades = Atividade.objects.filter(
-            turma__in=[ta.turma for ta in turmas_aluno]
-        ).order_by("-dataEntrega", "titulo")
-
-        pending_evaluations = 0
-        for atividade in all_atividades:
-            grupos = Grupo.objects.filter(atividade=atividade, alunos=aluno)
-            if grupos.exists():
-                grupo = grupos.first()
-                colegas = grupo.alunos.exclude(idAluno=aluno.idAluno)
-
-                for colega in colegas:
-                    try:
-                        avaliacao = Avaliacao.objects.get(
-                            avaliador_aluno=aluno,
-                            avaliado_aluno=colega,
-                            atividade=atividade,
-                        )
-
-                        if not avaliacao.concluida:
-                            pending_evaluations += 1
-                    except Avaliacao.DoesNotExist:
-                        pending_evaluations += 1
+        # Pending evaluations come from the shared evaluation inbox
+        all_atividades = caixa_de_avaliacoes(aluno)
+        pending_evaluations = sum(a.pendentes for a in all_atividades)
 
         # Get recent activities
         recent_activities = all_atividades[:5]  # First 5 activities
@@ -371,38 +356,10 @@ def atividades(request):
 
     if user_type == "aluno":
         aluno = Aluno.objects.get(idAluno=user_id)
-        turmas_aluno = TurmaAluno.objects.filter(aluno=aluno)
-        atividades = Atividade.objects.filter(
-            turma__in=[ta.turma for ta in turmas_aluno]
-        ).order_by("-dataEntrega", "titulo")
-
-        # Add group info and pending evaluations
-        pending_count = 0
-        for atividade in atividades:
-            grupos = Grupo.objects.filter(atividade=atividade, alunos=aluno)
-            atividade.grupo = grupos.first() if grupos.exists() else None
-            atividade.pendente = False
-            if atividade.grupo:
-                colegas = atividade.grupo.alunos.exclude(idAluno=aluno.idAluno)
-                for colega in colegas:
-                    try:
-                        avaliacao = Avaliacao.objects.get(
-                            avaliador_aluno=aluno,
-                            avaliado_aluno=colega,
-                            atividade=atividade,
-                        )
-                        if not avaliacao.concluida:
-                            atividade.pendente = True
-                            pending_count += 1
-                            break
-                    except Avaliacao.DoesNotExist:
-                        atividade.pendente = True
-                        pending_count += 1
-                        break
+        atividades = caixa_de_avaliacoes(aluno)
 
         atividades_pendentes = [a for a in atividades if a.grupo and a.pendente]
         pending_activities = atividades_pendentes
-        print(f"Total pending evaluations in atividades view: {pending_count}")
         return render(
             request,
             "atividades.html",
@@ -451,33 +408,17 @@ def atividade_detalhe(request, id_atividade):
 
     if user_type == "aluno":
         aluno = Aluno.objects.get(idAluno=user_id)
-        grupos = Grupo.objects.filter(atividade=atividade, alunos=aluno)
-        if not grupos.exists():
+
+        # Read-only: missing evaluations are only created when submitted
+        grupo, roster = avaliacoes_do_grupo(atividade, aluno)
+        if grupo is None:
             messages.error(request, "Você não pertence a nenhum grupo nesta atividade.")
             return redirect("atividades")
 
-        grupo = grupos.first()
-        colegas = grupo.alunos.all().order_by(
-            "nomeAluno"
-        )  # Sort colleagues alphabetically
-
-        # Check for pending evaluations (both peer and self-evaluations)
         avaliacoes = []
         auto_avaliacao = None
 
-        for colega in colegas:
-            avaliacao, created = Avaliacao.objects.get_or_create(
-                avaliador_aluno=aluno,
-                avaliado_aluno=colega,
-                atividade=atividade,
-                defaults={"concluida": False, "is_self_assessment": (colega == aluno)},
-            )
-
-            # Update is_self_assessment if the evaluation already existed
-            if not created and avaliacao.is_self_assessment != (colega == aluno):
-                avaliacao.is_self_assessment = colega == aluno
-                avaliacao.save()
-
+        for colega, avaliacao in roster:
             if colega == aluno:  # Self-evaluation
                 auto_avaliacao = {"colega": colega, "avaliacao": avaliacao}
             else:  # Peer evaluation
@@ -489,6 +430,8 @@ def atividade_detalhe(request, id_atividade):
             {
                 "atividade": atividade,
                 "grupo": grupo,
+                "membros": [colega for colega, _ in roster],
+                "pendentes": sum(1 for _, avaliacao in roster if not avaliacao.concluida),
                 "avaliacoes": avaliacoes,
                 "auto_avaliacao": auto_avaliacao,
                 "user_type": user_type,
@@ -510,6 +453,174 @@ def atividade_detalhe(request, id_atividade):
     return redirect("atividades")
 
 
+def _ler_notas(request, competencias, prefixo="competencia"):
+    """
+    Lê e valida as notas enviadas no formulário de avaliação
+
+    Args:
+        prefixo (str): Início do nome dos campos, seguido de "_<competencia_id>"
+
+    Returns:
+        tuple: ({competencia_id: nota}, None) ou (None, mensagem de erro)
+    """
+    notas_por_competencia = {}
+    for competencia in competencias:
+        nota_valor = request.POST.get(f"{prefixo}_{competencia.id}")
+        if not nota_valor:
+            return None, f"A nota para a competência {competencia.nome} é obrigatória."
+
+        try:
+            nota_valor = int(nota_valor)
+        except ValueError:
+            return None, "Valor de nota inválido."
+
+        if nota_valor < 1 or nota_valor > 5:
+            return None, "As notas devem estar entre 1 e 5."
+
+        notas_por_competencia[competencia.id] = nota_valor
+    return notas_por_competencia, None
+
+
+@login_required_custom
+def avaliar_membro(request, id_atividade, id_colega):
+    """View para avaliar um membro do grupo (ou a si mesmo) pela atividade e pelo colega"""
+    user_type = request.session.get("user_type")
+    user_id = request.session.get("user_id")
+
+    if user_type != "aluno":
+        messages.error(request, "Apenas alunos podem realizar avaliações.")
+        return redirect("home")
+
+    atividade = get_object_or_404(
+        Atividade.objects.select_related("turma__disciplina"), id=id_atividade
+    )
+    aluno = Aluno.objects.get(idAluno=user_id)
+    colega = get_object_or_404(Aluno, idAluno=id_colega)
+
+    # Both students must be in the same group of this activity
+    if (
+        not Grupo.objects.filter(atividade=atividade, alunos=aluno)
+        .filter(alunos=colega)
+        .exists()
+    ):
+        messages.error(request, "Você não tem permissão para realizar esta avaliação.")
+        return redirect("atividades")
+
+    propria = colega.idAluno == aluno.idAluno
+    avaliacao = Avaliacao.objects.filter(
+        avaliador_aluno=aluno, avaliado_aluno=colega, atividade=atividade
+    ).first() or Avaliacao(
+        avaliador_aluno=aluno,
+        avaliado_aluno=colega,
+        atividade=atividade,
+        is_self_assessment=propria,
+    )
+    competencias = atividade.competencias.all()
+    ja_concluida = (
+        "Esta auto-avaliação já foi concluída."
+        if propria
+        else "Esta avaliação já foi concluída."
+    )
+
+    if request.method == "POST":
+        if avaliacao.concluida:
+            messages.warning(request, ja_concluida)
+            return redirect("atividade_detalhe", id_atividade=atividade.id)
+
+        notas_por_competencia, erro = _ler_notas(request, competencias)
+        if erro:
+            messages.error(request, erro)
+            return redirect("avaliar_membro", id_atividade=atividade.id, id_colega=colega.idAluno)
+
+        # The evaluation row is created here, on submit, if it is still missing
+        with transaction.atomic():
+            avaliacao = avaliacao_para_envio(atividade, aluno, colega)
+            concluida = concluir_avaliacao(avaliacao, notas_por_competencia)
+        if not concluida:
+            messages.warning(request, ja_concluida)
+            return redirect("atividade_detalhe", id_atividade=atividade.id)
+
+        if propria:
+            messages.success(request, "Auto-avaliação realizada com sucesso!")
+        else:
+            criar_notificacao(
+                titulo="Nova avaliação recebida",
+                mensagem=f"{aluno.nomeAluno} concluiu sua avaliação na atividade '{atividade.titulo}'.",
+                destinatario=colega,
+                tipo="info",
+                link=f"/atividade/{atividade.id}/",
+            )
+            messages.success(request, "Avaliação realizada com sucesso!")
+        return redirect("atividade_detalhe", id_atividade=atividade.id)
+
+    return render(
+        request,
+        "auto_avaliar.html" if propria else "avaliar_colega.html",
+        {"avaliacao": avaliacao, "competencias": competencias, "user_type": user_type},
+    )
+
+
+@login_required_custom
+def avaliar_grupo(request, id_atividade):
+    """View para avaliar todos os membros pendentes do grupo em um único envio"""
+    user_type = request.session.get("user_type")
+    user_id = request.session.get("user_id")
+
+    if user_type != "aluno":
+        messages.error(request, "Apenas alunos podem realizar avaliações.")
+        return redirect("home")
+
+    atividade = get_object_or_404(
+        Atividade.objects.select_related("turma__disciplina"), id=id_atividade
+    )
+    aluno = Aluno.objects.get(idAluno=user_id)
+
+    grupo, roster = avaliacoes_do_grupo(atividade, aluno)
+    if grupo is None:
+        messages.error(request, "Você não pertence a nenhum grupo nesta atividade.")
+        return redirect("atividades")
+
+    pendentes = [colega for colega, avaliacao in roster if not avaliacao.concluida]
+    competencias = list(atividade.competencias.all())
+
+    if request.method == "POST":
+        if not pendentes:
+            messages.warning(request, "Todas as suas avaliações já foram concluídas.")
+            return redirect("atividade_detalhe", id_atividade=atividade.id)
+
+        # Every score of every member is validated before anything is written
+        notas_por_colega = {}
+        for colega in pendentes:
+            notas, erro = _ler_notas(
+                request, competencias, prefixo=f"aluno_{colega.idAluno}_competencia"
+            )
+            if erro:
+                messages.error(request, f"{colega.nomeAluno}: {erro}")
+                return redirect("avaliar_grupo", id_atividade=atividade.id)
+            notas_por_colega[colega.idAluno] = notas
+
+        concluidas = concluir_avaliacoes_do_grupo(atividade, aluno, notas_por_colega)
+        if concluidas:
+            messages.success(
+                request, f"{len(concluidas)} avaliação(ões) realizada(s) com sucesso!"
+            )
+        else:
+            messages.warning(request, "Estas avaliações já foram concluídas.")
+        return redirect("atividade_detalhe", id_atividade=atividade.id)
+
+    return render(
+        request,
+        "avaliar_grupo.html",
+        {
+            "atividade": atividade,
+            "grupo": grupo,
+            "pendentes": pendentes,
+            "competencias": competencias,
+            "user_type": user_type,
+        },
+    )
+
+
 @login_required_custom
 def avaliar_colega(request, id_avaliacao):
     """View para avaliar um colega"""
@@ -537,33 +648,16 @@ def avaliar_colega(request, id_avaliacao):
             messages.warning(request, "Esta avaliação já foi concluída.")
             return redirect("atividade_detalhe", id_atividade=avaliacao.atividade.id)
 
-        for competencia in competencias:
-            nota_valor = request.POST.get(f"competencia_{competencia.id}")
-            if not nota_valor:
-                messages.error(
-                    request,
-                    f"A nota para a competência {competencia.nome} é obrigatória.",
-                )
-                return redirect("avaliar_colega", id_avaliacao=id_avaliacao)
-
-            try:
-                nota_valor = int(nota_valor)
-                if nota_valor < 1 or nota_valor > 5:
-                    messages.error(request, "As notas devem estar entre 1 e 5.")
-                    return redirect("avaliar_colega", id_avaliacao=id_avaliacao)
-
-                Nota.objects.create(
-                    avaliacao=avaliacao,
-                    competencia=competencia,
-                    nota=nota_valor,
-                    dataAvaliacao=timezone.now(),
-                )
-            except ValueError:
-                messages.error(request, "Valor de nota inválido.")
-                return redirect("avaliar_colega", id_avaliacao=id_avaliacao)
+        # Validate every score before writing anything
+        notas_por_competencia, erro = _ler_notas(request, competencias)
+        if erro:
+            messages.error(request, erro)
+            return redirect("avaliar_colega", id_avaliacao=id_avaliacao)
 
-        avaliacao.concluida = True
-        avaliacao.save()
+        # Notes, completion flag, fact rows and rollups are written atomically
+        if not concluir_avaliacao(avaliacao, notas_por_competencia):
+            messages.warning(request, "Esta avaliação já foi concluída.")
+            return redirect("atividade_detalhe", id_atividade=avaliacao.atividade.id)
 
         # Notificar o aluno avaliado
         criar_notificacao(
@@ -613,33 +707,16 @@ def auto_avaliar(request, id_avaliacao):
             messages.warning(request, "Esta auto-avaliação já foi concluída.")
             return redirect("atividade_detalhe", id_atividade=avaliacao.atividade.id)
 
-        for competencia in competencias:
-            nota_valor = request.POST.get(f"competencia_{competencia.id}")
-            if not nota_valor:
-                messages.error(
-                    request,
-                    f"A nota para a competência {competencia.nome} é obrigatória.",
-                )
-                return redirect("auto_avaliar", id_avaliacao=id_avaliacao)
+        # Validate every score before writing anything
+        notas_por_competencia, erro = _ler_notas(request, competencias)
+        if erro:
+            messages.error(request, erro)
+            return redirect("auto_avaliar", id_avaliacao=id_avaliacao)
 
-            try:
-                nota_valor = int(nota_valor)
-                if nota_valor < 1 or nota_valor > 5:
-                    messages.error(request, "As notas devem estar entre 1 e 5.")
-                    return redirect("auto_avaliar", id_avaliacao=id_avaliacao)
-
-                Nota.objects.create(
-                    avaliacao=avaliacao,
-                    competencia=competencia,
-                    nota=nota_valor,
-                    dataAvaliacao=timezone.now(),
-                )
-            except ValueError:
-                messages.error(request, "Valor de nota inválido.")
-                return redirect("auto_avaliar", id_avaliacao=id_avaliacao)
-
-        avaliacao.concluida = True
-        avaliacao.save()
+        # Notes, completion flag, fact rows and rollups are written atomically
+        if not concluir_avaliacao(avaliacao, notas_por_competencia):
+            messages.warning(request, "Esta auto-avaliação já foi concluída.")
+            return redirect("atividade_detalhe", id_atividade=avaliacao.atividade.id)
 
         messages.success(request, "Auto-avaliação realizada com sucesso!")
         return redirect("atividade_detalhe", id_atividade=avaliacao.atividade.id)
@@ -680,50 +757,11 @@ def notas(request):
         # Use notas_qs as the main 'notas' variable for template (ordered recent first)
         notas = notas_qs
 
-        # Prepare data for charts - evolution over time
-        competencias = Competencia.objects.all()
-        chart_data = {}
-        for competencia in competencias:
-            notas_competencia = notas.filter(competencia=competencia)
-            if notas_competencia.exists():
-                chart_data[competencia.nome] = {"labels": [], "data": []}
-
-                # Group by semester
-                semestres = Semestre.objects.all().order_by("ano", "periodo")
-                for semestre in semestres:
-                    notas_semestre = notas_competencia.filter(
-                        avaliacao__atividade__turma__semestre=semestre
-                    )
-                    if notas_semestre.exists():
-                        media = notas_semestre.aggregate(Avg("nota"))["nota__avg"]
-                        chart_data[competencia.nome]["labels"].append(
-                            f"{semestre.ano}/{semestre.periodo}"
-                        )
-                        chart_data[competencia.nome]["data"].append(float(media))
-
-        # Calculate average by competency for radar chart - separated by type
-        radar_data = {
-            "labels": [c.nome for c in competencias],
-            "media_geral": [],
-            "auto_avaliacao": [],
-        }
-
-        for competencia in competencias:
-            # Média geral (todas as avaliações)
-            notas_comp_geral = notas.filter(competencia=competencia)
-            if notas_comp_geral.exists():
-                media_geral = notas_comp_geral.aggregate(Avg("nota"))["nota__avg"]
-                radar_data["media_geral"].append(float(media_geral))
-            else:
-                radar_data["media_geral"].append(0)
-
-            # Média das auto-avaliações
-            notas_comp_auto = notas_auto.filter(competencia=competencia)
-            if notas_comp_auto.exists():
-                media_auto = notas_comp_auto.aggregate(Avg("nota"))["nota__avg"]
-                radar_data["auto_avaliacao"].append(float(media_auto))
-            else:
-                radar_data["auto_avaliacao"].append(0)
+        # Prepare chart data from a single grouped aggregation
+        competencias = list(Competencia.objects.all())
+        linhas = agregar_resumos(aluno)
+        chart_data = montar_chart_data(linhas, competencias)
+        radar_data = montar_radar_data(linhas, competencias)
 
         context = {
             "notas": notas,
@@ -756,27 +794,25 @@ def notas(request):
                 ).first()
 
         # Gather disciplines for coordinator's courses
-        disciplinas = (
+        disciplinas = list(
             Disciplina.objects.filter(curso__in=cursos).distinct().order_by("nome")
         )
 
         # Get turmas for these disciplines, optionally filtered by semester
+        turmas = Turma.objects.filter(disciplina__in=disciplinas).select_related(
+            "disciplina", "semestre"
+        )
         if selected_semestre:
-            turmas = Turma.objects.filter(
-                disciplina__in=disciplinas, semestre=selected_semestre
-            ).distinct()
-        else:
-            turmas = Turma.objects.filter(disciplina__in=disciplinas).distinct()
+            turmas = turmas.filter(semestre=selected_semestre)
+        turmas = list(turmas.distinct())
 
         # Get only concluded evaluations related to these turmas
         notas_qs = Nota.objects.filter(
             avaliacao__atividade__turma__in=turmas, avaliacao__concluida=True
         ).select_related("competencia", "avaliacao", "avaliacao__atividade")
+        fatos = FatoNota.objects.filter(turma__in=turmas)
 
-        # Prepare disciplinas_data: averages per disciplina separated by competencia
         competencias = list(Competencia.objects.all())
-        disciplinas_labels = [d.nome for d in disciplinas]
-        disciplinas_datasets = []
         # color palette
         palette = [
             "rgba(255, 99, 132, 0.7)",
@@ -785,55 +821,46 @@ def notas(request):
             "rgba(75, 192, 192, 0.7)",
             "rgba(153, 102, 255, 0.7)",
         ]
-        for idx, competencia in enumerate(competencias):
-            data_vals = []
-            for disciplina in disciplinas:
-                avg_res = notas_qs.filter(
-                    avaliacao__atividade__turma__disciplina=disciplina,
-                    competencia=competencia,
-                ).aggregate(Avg("nota"))["nota__avg"]
-                data_vals.append(float(avg_res) if avg_res is not None else 0)
-
-            disciplinas_datasets.append(
+
+        def montar_datasets(matriz):
+            return [
                 {
                     "label": competencia.nome,
-                    "data": data_vals,
+                    "data": matriz[idx].tolist(),
                     "backgroundColor": palette[idx % len(palette)],
                     "borderColor": palette[idx % len(palette)].replace("0.7", "1"),
                     "borderWidth": 1,
                 }
-            )
+                for idx, competencia in enumerate(competencias)
+            ]
 
+        # Prepare disciplinas_data: averages per disciplina separated by competencia
+        disciplinas_matriz = pivot_medias(
+            fatos,
+            "disciplina_id",
+            [d.id for d in disciplinas],
+            competencias,
+        )
         disciplinas_data = {
-            "labels": disciplinas_labels,
-            "datasets": disciplinas_datasets,
+            "labels": [d.nome for d in disciplinas],
+            "datasets": montar_datasets(disciplinas_matriz),
         }
 
         # Prepare turmas_data: averages per turma separated by competencia
+        turmas_matriz = pivot_medias(
+            fatos,
+            "turma_id",
+            [t.id for t in turmas],
+            competencias,
+        )
         turmas_labels = [
             f"{t.disciplina.codigo} - {t.codigo} ({str(t.semestre.ano)[-2:]}/{t.semestre.periodo})"
             for t in turmas
         ]
-        turmas_datasets = []
-        for idx, competencia in enumerate(competencias):
-            data_vals = []
-            for turma in turmas:
-                avg_res = notas_qs.filter(
-                    avaliacao__atividade__turma=turma, competencia=competencia
-                ).aggregate(Avg("nota"))["nota__avg"]
-                data_vals.append(float(avg_res) if avg_res is not None else 0)
-
-            turmas_datasets.append(
-                {
-                    "label": competencia.nome,
-                    "data": data_vals,
-                    "backgroundColor": palette[idx % len(palette)],
-                    "borderColor": palette[idx % len(palette)].replace("0.7", "1"),
-                    "borderWidth": 1,
-                }
-            )
-
-        turmas_data = {"labels": turmas_labels, "datasets": turmas_datasets}
+        turmas_data = {
+            "labels": turmas_labels,
+            "datasets": montar_datasets(turmas_matriz),
+        }
 
         semesters = Semestre.objects.all().order_by("-ano", "-periodo")
 
@@ -872,17 +899,20 @@ def feedback_personalizado(request):
 
     aluno = Aluno.objects.get(idAluno=user_id)
 
-    # Compute average per competency for this student
-    from django.db.models import Avg
-
+    # Compute average per competency for this student from the rollups
     medias_qs = (
-        Nota.objects.filter(avaliacao__avaliado_aluno=aluno, avaliacao__concluida=True)
-        .values("competencia__id", "competencia__nome")
-        .annotate(media=Avg("nota"))
+        ResumoCompetencia.objects.filter(aluno=aluno)
+        .values("competencia_id")
+        .annotate(soma=Sum("soma"), total=Sum("total"))
+        .order_by()
     )
 
     # Map competency id -> média
-    medias_map = {item["competencia__id"]: item["media"] for item in medias_qs}
+    medias_map = {
+        item["competencia_id"]: item["soma"] / item["total"]
+        for item in medias_qs
+        if item["total"]
+    }
 
     # Prepare feedback messages for each competency
     feedback_items = []
@@ -1313,16 +1343,28 @@ def criar_atividade(request):
                 )
                 return redirect("atividades")
 
-            atividade = Atividade.objects.create(
-                titulo=titulo,
-                descricao=descricao,
-                turma=turma,
-                dataEntrega=datetime.strptime(data_entrega, "%Y-%m-%d").date(),
-            )
+            data = datetime.strptime(data_entrega, "%Y-%m-%d").date()
 
-            # Adicionar competências selecionadas
-            competencias = Competencia.objects.filter(id__in=competencias_ids)
-            atividade.competencias.set(competencias)
+            # The activity and its notifications are saved or discarded together
+            with transaction.atomic():
+                atividade = Atividade.objects.create(
+                    titulo=titulo,
+                    descricao=descricao,
+                    turma=turma,
+                    dataEntrega=data,
+                )
+
+                # Adicionar competências selecionadas
+                competencias = Competencia.objects.filter(id__in=competencias_ids)
+                atividade.competencias.set(competencias)
+
+                # Avisar todos os alunos matriculados na turma
+                criar_notificacoes(
+                    Aluno.objects.filter(turmas__turma=turma),
+                    titulo="Nova atividade publicada",
+                    mensagem=f"A atividade '{titulo}' foi publicada na turma {turma.codigo} de {turma.disciplina.nome}.",
+                    link=f"/atividade/{atividade.id}/",
+                )
 
             messages.success(request, f"Atividade '{titulo}' criada com sucesso!")
             return redirect("atividade_detalhe", id_atividade=atividade.id)
@@ -1331,19 +1373,7 @@ def criar_atividade(request):
             messages.error(request, f"Erro ao criar atividade: {str(e)}")
             return redirect("criar_atividade")
 
-    # Obter turmas do professor
-    if user_type == "professor":
-        professor = Professor.objects.get(idProfessor=user_id)
-        turmas = Turma.objects.filter(professor=professor)
-    elif user_type == "coordenador":
-        coordenador = Coordenador.objects.get(id=user_id)
-        if coordenador.curso:
-            disciplinas = Disciplina.objects.filter(curso=coordenador.curso)
-            turmas = Turma.objects.filter(disciplina__in=disciplinas)
-        else:
-            turmas = []
-    else:  # admin
-        turmas = Turma.objects.all()
+    # As turmas visíveis para o usuário são buscadas pelo endpoint buscar_turmas
 
     # Obter todas as competências
     competencias = Competencia.objects.all().order_by("nome")
@@ -1352,7 +1382,6 @@ def criar_atividade(request):
         request,
         "criar_atividade.html",
         {
-            "turmas": turmas,
             "competencias": competencias,
             "user_type": user_type,
             "username": request.session.get("username"),
@@ -1369,33 +1398,8 @@ def criar_grupo(request, id_atividade):
         messages.error(request, "Apenas professores podem criar grupos.")
         return redirect("home")
 
-    atividade = get_object_or_404(Atividade, id=id_atividade)
-    turma = atividade.turma
-
-    # Improved query to get students enrolled in this class
-    alunos_turma = TurmaAluno.objects.filter(turma=turma).select_related("aluno")
-
-    if not alunos_turma.exists():
-        messages.warning(request, "Não há alunos matriculados nesta turma.")
-
-    # Get IDs of students already in groups for this activity
-    alunos_em_grupos = Grupo.objects.filter(atividade=atividade).values_list(
-        "alunos", flat=True
-    )
-
-    # Filter available students (those not already in groups)
-    alunos_disponiveis = [
-        ta for ta in alunos_turma if ta.aluno.idAluno not in alunos_em_grupos
-    ]
-
-    # Check if we have any available students
-    if not alunos_disponiveis:
-        if alunos_turma.exists():
-            messages.warning(request, "Todos os alunos desta turma já estão em grupos.")
-
-    # Get existing groups for this activity to display
-    grupos_existentes = Grupo.objects.filter(atividade=atividade).prefetch_related(
-        "alunos"
+    atividade = get_object_or_404(
+        Atividade.objects.select_related("turma__disciplina"), id=id_atividade
     )
 
     if request.method == "POST":
@@ -1409,29 +1413,39 @@ def criar_grupo(request, id_atividade):
             )
             return redirect("criar_grupo", id_atividade=id_atividade)
 
-        grupo = Grupo.objects.create(nome=nome_grupo, atividade=atividade)
-
-        for aluno_id in alunos_ids:
-            aluno = Aluno.objects.get(idAluno=aluno_id)
-            grupo.alunos.add(aluno)
-
-        # Create evaluation entries for each group member to evaluate others AND self-evaluation
-        alunos_grupo = grupo.alunos.all()
-        for avaliador in alunos_grupo:
-            for avaliado in alunos_grupo:
-                Avaliacao.objects.get_or_create(
-                    avaliador_aluno=avaliador,
-                    avaliado_aluno=avaliado,
-                    atividade=atividade,
-                    defaults={
-                        "concluida": False,
-                        "is_self_assessment": (avaliador == avaliado),
-                    },
-                )
+        # Only enrolled students that are not in another group can be added
+        alunos_ids = list(
+            alunos_sem_grupo(atividade)
+            .filter(aluno_id__in=alunos_ids)
+            .values_list("aluno_id", flat=True)
+        )
+        if len(alunos_ids) < 2:
+            messages.error(
+                request,
+                "Selecione pelo menos 2 alunos matriculados que ainda não estejam em grupos.",
+            )
+            return redirect("criar_grupo", id_atividade=id_atividade)
+
+        # Members and the evaluation matrix are inserted in bulk
+        criar_grupos(atividade, [(nome_grupo, alunos_ids)])
 
         messages.success(request, f"Grupo '{nome_grupo}' criado com sucesso!")
         return redirect("atividade_detalhe", id_atividade=id_atividade)
 
+    # Students enrolled in this class that are not in a group yet
+    alunos_disponiveis = list(alunos_sem_grupo(atividade))
+
+    if not alunos_disponiveis:
+        if TurmaAluno.objects.filter(turma_id=atividade.turma_id).exists():
+            messages.warning(request, "Todos os alunos desta turma já estão em grupos.")
+        else:
+            messages.warning(request, "Não há alunos matriculados nesta turma.")
+
+    # Get existing groups for this activity to display
+    grupos_existentes = Grupo.objects.filter(atividade=atividade).prefetch_related(
+        "alunos"
+    )
+
     return render(
         request,
         "criar_grupo.html",
@@ -1444,6 +1458,60 @@ def criar_grupo(request, id_atividade):
     )
 
 
+@login_required_custom
+def formar_grupos(request, id_atividade):
+    """View para dividir automaticamente todos os alunos disponíveis da turma em grupos"""
+    user_type = request.session.get("user_type")
+
+    if user_type not in ["professor", "admin"]:
+        messages.error(request, "Apenas professores podem criar grupos.")
+        return redirect("home")
+
+    if request.method != "POST":
+        return redirect("criar_grupo", id_atividade=id_atividade)
+
+    atividade = get_object_or_404(Atividade, id=id_atividade)
+
+    try:
+        tamanho = int(request.POST.get("tamanho", ""))
+    except ValueError:
+        tamanho = 0
+    if tamanho < 2:
+        messages.error(request, "O tamanho dos grupos deve ser de pelo menos 2 alunos.")
+        return redirect("criar_grupo", id_atividade=id_atividade)
+
+    # The same seed always produces the same split
+    semente = request.POST.get("semente") or None
+
+    alunos_ids = list(alunos_sem_grupo(atividade).values_list("aluno_id", flat=True))
+    if len(alunos_ids) < 2:
+        messages.warning(
+            request, "Não há alunos disponíveis suficientes para formar grupos."
+        )
+        return redirect("criar_grupo", id_atividade=id_atividade)
+
+    # Balanced mode evens out the groups' historical competency profiles
+    if request.POST.get("modo") == "equilibrado":
+        divisao = dividir_em_grupos_equilibrados(
+            atividade, alunos_ids, tamanho, semente
+        )
+    else:
+        divisao = dividir_em_grupos(alunos_ids, tamanho, semente)
+
+    # Continue the numbering of the groups that already exist
+    inicio = Grupo.objects.filter(atividade=atividade).count() + 1
+    criar_grupos(
+        atividade,
+        [(f"Grupo {inicio + i}", membros) for i, membros in enumerate(divisao)],
+    )
+
+    messages.success(
+        request,
+        f"{len(divisao)} grupos formados automaticamente com {len(alunos_ids)} alunos.",
+    )
+    return redirect("atividade_detalhe", id_atividade=id_atividade)
+
+
 # Admin redirection view
 @login_required_custom
 def admin_redirect(request):
@@ -1470,29 +1538,11 @@ def admin_dashboard(request):
         messages.error(request, "Acesso negado. Você não é um administrador.")
         return redirect("home")
 
-    # Get counts for the dashboard
-    cursos_count = Curso.objects.count()
-    disciplinas_count = Disciplina.objects.count()
-    alunos_count = Aluno.objects.count()
-    professores_count = Professor.objects.count()
-    coordenadores_count = Coordenador.objects.count()
-
-    # Get all courses and coordinators
-    cursos = Curso.objects.all().prefetch_related("disciplinas", "alunos")
-    coordenadores = Coordenador.objects.all().select_related("curso")
-
-    # Get recent activities
-    atividades_recentes = Atividade.objects.all().order_by("-id")[:10]
+    # Cached snapshot; no related collections are loaded here
+    estatisticas = estatisticas_dashboard()
 
     context = {
-        "cursos_count": cursos_count,
-        "disciplinas_count": disciplinas_count,
-        "alunos_count": alunos_count,
-        "professores_count": professores_count,
-        "coordenadores_count": coordenadores_count,
-        "cursos": cursos,
-        "coordenadores": coordenadores,
-        "atividades_recentes": atividades_recentes,
+        "estatisticas": estatisticas,
         "user_type": "admin",
         "username": request.session.get("username"),
     }
@@ -1508,147 +1558,46 @@ def admin_import_users(request):
         messages.error(request, "Acesso negado. Você não é um administrador.")
         return redirect("home")
 
+    results = None
+
     if request.method == "POST" and request.FILES.get("file"):
         file = request.FILES["file"]
         import_type = request.POST.get("import_type")
 
+        if import_type not in FORMATOS_IMPORTACAO:
+            messages.error(request, "Tipo de importação inválido.")
+            return redirect("admin_import_users")
+
         try:
-            # Read CSV or Excel file
+            # Stream the file in fixed-size blocks instead of loading it whole
             if file.name.endswith(".csv"):
-                import io
-
-                file_bytes = file.read()
-                try:
-                    file_str = file_bytes.decode("utf-8")
-                except UnicodeDecodeError:
-                    file_str = file_bytes.decode("latin1")
-                df = pd.read_csv(io.StringIO(file_str))
-            elif file.name.endswith((".xls", ".xlsx")):
-                df = pd.read_excel(file)
+                blocos = ler_csv_em_blocos(file)
+            elif file.name.endswith(".xlsx"):
+                blocos = ler_xlsx_em_blocos(file)
+            elif file.name.endswith(".xls"):
+                # Legacy Excel format has no streaming reader
+                blocos = [pd.read_excel(file, dtype=str)]
             else:
                 messages.error(
                     request, "Formato de arquivo não suportado. Use CSV ou Excel."
                 )
                 return redirect("admin_import_users")
 
-            # Process based on import type
-            if import_type == "alunos":
-                # Expected columns: nome, email, matricula, curso_id
-                success_count = 0
-                for _, row in df.iterrows():
-                    try:
-                        # Validate required fields
-                        if not all(
-                            field in row and pd.notna(row[field])
-                            for field in ["nome", "email", "matricula", "curso_id"]
-                        ):
-                            continue
-
-                        # Check if curso_id exists
-                        curso = Curso.objects.filter(id=row["curso_id"]).first()
-                        if not curso:
-                            continue
-
-                        # Check if email or matricula already exists
-                        if (
-                            Aluno.objects.filter(emailAluno=row["email"]).exists()
-                            or Aluno.objects.filter(matricula=row["matricula"]).exists()
-                        ):
-                            continue
-
-                        # Create student
-                        Aluno.objects.create(
-                            nomeAluno=row["nome"],
-                            emailAluno=row["email"],
-                            matricula=str(
-                                row["matricula"]
-                            ),  # Convert to string in case it's a number
-                            senhaAluno=hash_password("123456"),  # Default password
-                            curso=curso,
-                        )
-                        success_count += 1
-                    except Exception as e:
-                        # Skip problematic rows
-                        print(f"Error importing student: {str(e)}")
-                        continue
-
-                messages.success(
-                    request, f"{success_count} alunos importados com sucesso."
-                )
-
-            elif import_type == "professores":
-                # Expected columns: nome, email
-                success_count = 0
-                for _, row in df.iterrows():
-                    try:
-                        # Validate required fields
-                        if not all(
-                            field in row and pd.notna(row[field])
-                            for field in ["nome", "email"]
-                        ):
-                            continue
-
-                        # Check if email already exists
-                        if Professor.objects.filter(emailProf=row["email"]).exists():
-                            continue
-
-                        # Create professor
-                        Professor.objects.create(
-                            nomeProf=row["nome"],
-                            emailProf=row["email"],
-                            senhaProf=hash_password("123456"),  # Default password
-                        )
-                        success_count += 1
-                    except Exception as e:
-                        # Skip problematic rows
-                        print(f"Error importing professor: {str(e)}")
-                        continue
-
-                messages.success(
-                    request, f"{success_count} professores importados com sucesso."
-                )
-
-            elif import_type == "coordenadores":
-                # Expected columns: nome, email, curso_id
-                success_count = 0
-                for _, row in df.iterrows():
-                    try:
-                        # Validate required fields
-                        if not all(
-                            field in row and pd.notna(row[field])
-                            for field in ["nome", "email", "curso_id"]
-                        ):
-                            continue
-
-                        # Check if curso_id exists
-                        curso = Curso.objects.filter(id=row["curso_id"]).first()
-                        if not curso:
-                            continue
-
-                        # Check if email already exists
-                        if Coordenador.objects.filter(emailCoord=row["email"]).exists():
-                            continue
-
-                        # Create coordinator
-                        Coordenador.objects.create(
-                            nomeCoord=row["nome"],
-                            emailCoord=row["email"],
-                            senhaCoord=hash_password("123456"),  # Default password
-                            curso=curso,
-                        )
-                        success_count += 1
-                    except Exception as e:
-                        # Skip problematic rows
-                        print(f"Error importing coordinator: {str(e)}")
-                        continue
+            # Each block is validated at once and inserted in batches
+            importacao = ImportacaoUsuarios(import_type)
+            for bloco in blocos:
+                importacao.processar(bloco)
+            results = importacao.resultado
 
-                messages.success(
-                    request, f"{success_count} coordenadores importados com sucesso."
+            messages.success(
+                request, f"{results['success']} {import_type} importados com sucesso."
+            )
+            if results["failures"]:
+                messages.warning(
+                    request,
+                    f"{results['failures']} linhas não foram importadas. Veja os erros abaixo.",
                 )
 
-            else:
-                messages.error(request, "Tipo de importação inválido.")
-
         except Exception as e:
             messages.error(request, f"Erro ao processar arquivo: {str(e)}")
 
@@ -1657,6 +1606,7 @@ def admin_import_users(request):
 
     context = {
         "cursos": cursos,
+        "results": results,
         "user_type": "admin",
         "username": request.session.get("username"),
     }
@@ -1664,6 +1614,38 @@ def admin_import_users(request):
     return render(request, "admin/import_users.html", context)
 
 
+# How each role is listed in the user directory: searched fields, sort field
+# and whether it can be filtered by curso
+DIRETORIO_USUARIOS = {
+    "aluno": {
+        "modelo": Aluno,
+        "campos": ["nomeAluno", "emailAluno", "matricula"],
+        "ordem": "nomeAluno",
+        "por_curso": True,
+    },
+    "professor": {
+        "modelo": Professor,
+        "campos": ["nomeProf", "emailProf"],
+        "ordem": "nomeProf",
+        "por_curso": False,
+    },
+    "coordenador": {
+        "modelo": Coordenador,
+        "campos": ["nomeCoord", "emailCoord"],
+        "ordem": "nomeCoord",
+        "por_curso": True,
+    },
+    "admin": {
+        "modelo": Admin,
+        "campos": ["nomeAdmin", "emailAdmin"],
+        "ordem": "nomeAdmin",
+        "por_curso": False,
+    },
+}
+
+USUARIOS_POR_PAGINA = 50
+
+
 @login_required_custom
 def admin_users(request):
     """View for managing users in the admin dashboard"""
@@ -1672,21 +1654,54 @@ def admin_users(request):
         messages.error(request, "Acesso negado. Você não é um administrador.")
         return redirect("home")
 
-    # Get all users of each type
-    from .models import Admin
+    papel = request.GET.get("papel", "aluno")
+    if papel not in DIRETORIO_USUARIOS:
+        papel = "aluno"
+    diretorio = DIRETORIO_USUARIOS[papel]
+
+    usuarios = diretorio["modelo"].objects.all()
+    curso_id = request.GET.get("curso", "")
+    if diretorio["por_curso"]:
+        usuarios = usuarios.select_related("curso")
+        if curso_id.isdigit():
+            usuarios = usuarios.filter(curso_id=int(curso_id))
+        else:
+            curso_id = ""
+    else:
+        curso_id = ""
 
-    alunos = Aluno.objects.all().select_related("curso").order_by("nomeAluno")
-    professores = Professor.objects.all().order_by("nomeProf")
-    coordenadores = (
-        Coordenador.objects.all().select_related("curso").order_by("nomeCoord")
-    )
-    admins = Admin.objects.all().order_by("nomeAdmin")
+    # One page at a time, continuing after the last row shown (no OFFSET)
+    busca = request.GET.get("q", "").strip()
+    try:
+        pagina, proximo = buscar_por_prefixo(
+            usuarios,
+            busca,
+            diretorio["campos"],
+            diretorio["ordem"],
+            cursor=request.GET.get("cursor"),
+            limite=USUARIOS_POR_PAGINA,
+        )
+    except ValueError:
+        return redirect(f"{reverse('admin_users')}?papel={papel}")
+
+    # Totals come from the cache; a text search has no precomputed total
+    totais = totais_de_usuarios()
+    if busca:
+        total = None
+    elif curso_id:
+        total = totais["por_curso"][papel].get(int(curso_id), 0)
+    else:
+        total = totais["por_tipo"][papel]
 
     context = {
-        "alunos": alunos,
-        "professores": professores,
-        "coordenadores": coordenadores,
-        "admins": admins,
+        "papel": papel,
+        "usuarios": pagina,
+        "proximo": proximo,
+        "busca": busca,
+        "curso_id": curso_id,
+        "cursos": Curso.objects.order_by("nome") if diretorio["por_curso"] else [],
+        "total": total,
+        "totais": totais["por_tipo"],
         "user_type": "admin",
         "username": request.session.get("username"),
     }
@@ -2293,14 +2308,27 @@ def admin_disciplines(request):
             else:
                 messages.error(request, "ID da disciplina é obrigatório.")
 
-    # Get all disciplines and courses
-    disciplinas = (
-        Disciplina.objects.all().select_related("curso").order_by("curso__nome", "nome")
-    )
+    # One page of disciplines, filtered by name/code prefix
+    busca = request.GET.get("q", "").strip()
+    try:
+        disciplinas, proximo = buscar_por_prefixo(
+            Disciplina.objects.select_related("curso").annotate(
+                total_turmas=Count("turmas")
+            ),
+            busca,
+            ["nome", "codigo"],
+            "nome",
+            cursor=request.GET.get("cursor"),
+            limite=50,
+        )
+    except ValueError:
+        return redirect("admin_disciplines")
     cursos = Curso.objects.all().order_by("nome")
 
     context = {
         "disciplinas": disciplinas,
+        "busca": busca,
+        "proximo": proximo,
         "cursos": cursos,
         "user_type": "admin",
         "username": request.session.get("username"),
@@ -2445,16 +2473,27 @@ def admin_classes(request):
             except Exception as e:
                 messages.error(request, f"Erro ao excluir turma: {str(e)}")
 
-    # Get all classes, disciplines, professors and semesters
-    turmas = Turma.objects.all().select_related("disciplina", "professor", "semestre")
-    disciplinas = Disciplina.objects.all().order_by("nome")
-    professores = Professor.objects.all().order_by("nomeProf")
+    # One page of classes; disciplines and professors are searched on demand
+    busca = request.GET.get("q", "").strip()
+    try:
+        turmas, proximo = buscar_por_prefixo(
+            Turma.objects.select_related(
+                "disciplina", "professor", "semestre"
+            ).annotate(total_alunos=Count("matriculas")),
+            busca,
+            ["codigo", "disciplina__nome", "disciplina__codigo"],
+            "disciplina__nome",
+            cursor=request.GET.get("cursor"),
+            limite=50,
+        )
+    except ValueError:
+        return redirect("admin_classes")
     semestres = Semestre.objects.all().order_by("-ano", "-periodo")
 
     context = {
         "turmas": turmas,
-        "disciplinas": disciplinas,
-        "professores": professores,
+        "busca": busca,
+        "proximo": proximo,
         "semestres": semestres,
         "user_type": "admin",
         "username": request.session.get("username"),
@@ -2486,6 +2525,9 @@ def admin_class_students(request, turma_id):
         )
         return redirect("home")
 
+    sincronizacao = None
+    matriculas_sync = []
+
     # Handle form actions
     if request.method == "POST":
         action = request.POST.get("action")
@@ -2524,15 +2566,8 @@ def admin_class_students(request, turma_id):
                 messages.error(request, "Selecione pelo menos um aluno.")
                 return redirect("admin_class_students", turma_id=turma_id)
 
-            count = 0
-            for aluno_id in alunos_ids:
-                try:
-                    aluno = Aluno.objects.get(idAluno=aluno_id)
-                    if not TurmaAluno.objects.filter(turma=turma, aluno=aluno).exists():
-                        TurmaAluno.objects.create(turma=turma, aluno=aluno)
-                        count += 1
-                except:
-                    pass
+            # One IN lookup and a single bulk insert for any number of students
+            count, ja_matriculados, inexistentes = matricular_alunos(turma, alunos_ids)
 
             if count > 0:
                 messages.success(
@@ -2540,6 +2575,50 @@ def admin_class_students(request, turma_id):
                 )
             else:
                 messages.warning(request, "Nenhum aluno novo foi adicionado à turma.")
+            if ja_matriculados:
+                messages.info(
+                    request, f"{ja_matriculados} alunos já estavam matriculados."
+                )
+            if inexistentes:
+                messages.error(
+                    request,
+                    f"Alunos não encontrados: {', '.join(inexistentes)}.",
+                )
+
+        # Preview a roster sync from a CSV with the class matrículas
+        elif action == "sync_preview":
+            arquivo = request.FILES.get("arquivo")
+
+            if not arquivo:
+                messages.error(request, "Selecione um arquivo CSV com as matrículas.")
+                return redirect("admin_class_students", turma_id=turma_id)
+
+            try:
+                matriculas_sync = ler_matriculas(arquivo)
+            except (UnicodeDecodeError, csv.Error) as e:
+                messages.error(request, f"Erro ao ler o arquivo: {str(e)}")
+                return redirect("admin_class_students", turma_id=turma_id)
+
+            sincronizacao = planejar_sincronizacao(turma, matriculas_sync)
+
+        # Apply the previewed roster sync
+        elif action == "sync_apply":
+            matriculas_sync = request.POST.get("matriculas", "").splitlines()
+
+            # The diff is recomputed so that changes made since the preview are respected
+            plano = planejar_sincronizacao(turma, matriculas_sync)
+            adicionados, removidos = aplicar_sincronizacao(turma, plano)
+
+            messages.success(
+                request,
+                f"Turma sincronizada: {adicionados} alunos adicionados e {removidos} removidos.",
+            )
+            if plano["bloqueados"]:
+                messages.warning(
+                    request,
+                    f"{len(plano['bloqueados'])} alunos não foram removidos por participarem de grupos.",
+                )
+            return redirect("admin_class_students", turma_id=turma_id)
 
         # Remove student
         elif action == "remove_student":
@@ -2573,23 +2652,16 @@ def admin_class_students(request, turma_id):
             except Exception as e:
                 messages.error(request, f"Erro ao remover aluno: {str(e)}")
 
-    # Get enrolled students and available students
+    # Get enrolled students; students to add are searched through buscar_alunos
     matriculas = TurmaAluno.objects.filter(turma=turma).select_related(
         "aluno", "aluno__curso"
     )
 
-    # Get list of student IDs already enrolled
-    alunos_matriculados_ids = matriculas.values_list("aluno__idAluno", flat=True)
-
-    # Get available students (not enrolled in this class)
-    alunos_disponiveis = Aluno.objects.exclude(
-        idAluno__in=alunos_matriculados_ids
-    ).select_related("curso")
-
     context = {
         "turma": turma,
         "matriculas": matriculas,
-        "alunos_disponiveis": alunos_disponiveis,
+        "sincronizacao": sincronizacao,
+        "matriculas_sync": "\n".join(matriculas_sync),
         "user_type": user_type,
         "username": request.session.get("username"),
     }
@@ -2597,6 +2669,109 @@ def admin_class_students(request, turma_id):
     return render(request, "admin/class_students.html", context)
 
 
+def _resposta_busca(request, queryset, campos, ordem, rotulo):
+    """Responde uma busca de autocompletar no formato esperado pelo Select2"""
+    try:
+        itens, proximo = buscar_por_prefixo(
+            queryset,
+            request.GET.get("q", ""),
+            campos,
+            ordem,
+            cursor=request.GET.get("cursor"),
+            limite=request.GET.get("limite", 20),
+        )
+    except ValueError as e:
+        return JsonResponse({"erro": str(e)}, status=400)
+
+    return JsonResponse(
+        {
+            "results": [{"id": item.pk, "text": rotulo(item)} for item in itens],
+            "proximo": proximo,
+        }
+    )
+
+
+def _acesso_negado_busca():
+    return JsonResponse({"erro": "Acesso negado."}, status=403)
+
+
+@login_required_custom
+def buscar_alunos(request):
+    """Typeahead search for students by name, email or matrícula (admin only)"""
+    # Only the admin enrollment screen uses it; it exposes every student's email
+    if request.session.get("user_type") != "admin":
+        return _acesso_negado_busca()
+
+    alunos = Aluno.objects.select_related("curso")
+
+    # Leave out students already enrolled in the class being edited
+    turma_id = request.GET.get("excluir_turma")
+    if turma_id and turma_id.isdigit():
+        alunos = alunos.exclude(turmas__turma_id=int(turma_id))
+
+    return _resposta_busca(
+        request,
+        alunos,
+        ["nomeAluno", "emailAluno", "matricula"],
+        "nomeAluno",
+        lambda aluno: f"{aluno.nomeAluno} ({aluno.matricula}) - {aluno.curso.nome}",
+    )
+
+
+@login_required_custom
+def buscar_professores(request):
+    """Typeahead search for professors by name or email"""
+    if request.session.get("user_type") != "admin":
+        return _acesso_negado_busca()
+
+    return _resposta_busca(
+        request,
+        Professor.objects.all(),
+        ["nomeProf", "emailProf"],
+        "nomeProf",
+        lambda professor: f"{professor.nomeProf} ({professor.emailProf})",
+    )
+
+
+@login_required_custom
+def buscar_disciplinas(request):
+    """Typeahead search for disciplines by name or code"""
+    if request.session.get("user_type") != "admin":
+        return _acesso_negado_busca()
+
+    return _resposta_busca(
+        request,
+        Disciplina.objects.all(),
+        ["nome", "codigo"],
+        "nome",
+        lambda disciplina: f"{disciplina.codigo} - {disciplina.nome}",
+    )
+
+
+@login_required_custom
+def buscar_turmas(request):
+    """Typeahead search for classes by code or discipline name/code"""
+    user_type = request.session.get("user_type")
+    user_id = request.session.get("user_id")
+
+    turmas = Turma.objects.select_related("disciplina", "semestre")
+    if user_type == "professor":
+        turmas = turmas.filter(professor_id=user_id)
+    elif user_type == "coordenador":
+        coordenador = Coordenador.objects.get(id=user_id)
+        turmas = turmas.filter(disciplina__curso_id=coordenador.curso_id)
+    elif user_type != "admin":
+        return _acesso_negado_busca()
+
+    return _resposta_busca(
+        request,
+        turmas,
+        ["codigo", "disciplina__nome", "disciplina__codigo"],
+        "disciplina__nome",
+        lambda turma: f"{turma.disciplina.nome} - Turma {turma.codigo} ({turma.semestre})",
+    )
+
+
 @login_required_custom
 def admin_semesters(request):
     """View for managing semesters in the admin dashboard"""
@@ -2684,6 +2859,36 @@ def admin_semesters(request):
     return render(request, "admin/semesters.html", context)
 
 
+@login_required_custom
+def admin_metrics(request):
+    """
+    View showing the per-view hot-path table recorded by the metrics middleware.
+    The numbers are those of the worker process serving this request only.
+    """
+    # Ensure user is admin
+    if request.session.get("user_type") != "admin":
+        messages.error(request, "Acesso negado. Você não é um administrador.")
+        return redirect("home")
+
+    from .middleware import view_metrics
+
+    if request.method == "POST" and request.POST.get("action") == "reset":
+        view_metrics.reset()
+        messages.success(request, "Métricas reiniciadas.")
+        return redirect("admin_metrics")
+
+    context = {
+        "metricas": view_metrics.snapshot(),
+        "janela": view_metrics.window,
+        "pid": os.getpid(),
+        "log_lento": settings.METRICS_SLOW_LOG,
+        "user_type": "admin",
+        "username": request.session.get("username"),
+    }
+
+    return render(request, "admin/metrics.html", context)
+
+
 @login_required_custom
 def debug_auth(request):
     """View for debugging authentication and password management (admin only)"""
@@ -2748,38 +2953,15 @@ def debug_auth(request):
                 messages.error(request, "Email é obrigatório.")
                 return redirect("debug_auth")
 
-            # Try to find the user in each user type
-            user = None
-            user_type = None
-
-            if Aluno.objects.filter(emailAluno=email).exists():
-                user = Aluno.objects.get(emailAluno=email)
-                user_type = "aluno"
-            elif Professor.objects.filter(emailProf=email).exists():
-                user = Professor.objects.get(emailProf=email)
-                user_type = "professor"
-            elif Coordenador.objects.filter(emailCoord=email).exists():
-                user = Coordenador.objects.get(emailCoord=email)
-                user_type = "coordenador"
-            elif Admin.objects.filter(emailAdmin=email).exists():
-                user = Admin.objects.get(emailAdmin=email)
-                user_type = "admin"
-
-            if user:
-                # Generate token and create reset URL
-                token = generate_token()
-
-                # Save token to user
-                if user_type == "aluno":
-                    user.reset_token = token
-                elif user_type == "professor":
-                    user.reset_token = token
-                elif user_type == "coordenador":
-                    user.reset_token = token
-                elif user_type == "admin":
-                    user.reset_token = token
+            # Resolve the user through the identity index
+            identidades = buscar_identidades(email)
 
-                user.save()
+            if identidades:
+                identidade = identidades[0]
+                user_type = identidade.tipo
+
+                # Generate an expiring, one-time token
+                token = emitir_token_redefinicao(identidade)
 
                 # Generate the reset URL
                 reset_url = request.build_absolute_uri(
@@ -2868,6 +3050,7 @@ def notificacoes(request):
     # Handle marking all as read
     if request.method == "POST" and "marcar_todas_como_lidas" in request.POST:
         notificacoes.filter(lida=False).update(lida=True)
+        zerar_notificacoes(user_type, user_id)
         messages.success(request, "Todas as notificações foram marcadas como lidas.")
         return redirect("notificacoes")
 
@@ -2897,8 +3080,10 @@ def marcar_notificacao_como_lida(request, notificacao_id):
         or (user_type == "coordenador" and notificacao.coordenador_id == user_id)
         or (user_type == "admin" and notificacao.admin_id == user_id)
     ):
-        notificacao.lida = True
-        notificacao.save()
+        if not notificacao.lida:
+            notificacao.lida = True
+            notificacao.save()
+            invalidar_notificacoes(user_type, user_id)
 
         # If there's a link, redirect to it
         if notificacao.link:
@@ -2928,6 +3113,8 @@ def excluir_notificacao(request, notificacao_id):
         or (user_type == "admin" and notificacao.admin_id == user_id)
     ):
         notificacao.delete()
+        if not notificacao.lida:
+            invalidar_notificacoes(user_type, user_id)
         messages.success(request, "Notificação excluída com sucesso.")
     else:
         messages.error(request, "Você não tem permissão para excluir esta notificação.")
@@ -3043,25 +3230,22 @@ def notas_turma_geral(request, turma_id):
     # Get activities for this class
     atividades = Atividade.objects.filter(turma=turma)
 
-    # Get completed evaluations for this class
-    avaliacoes = Avaliacao.objects.filter(atividade__in=atividades, concluida=True)
-
-    # Get all notes for this class
-    notas = Nota.objects.filter(avaliacao__in=avaliacoes).select_related(
-        "competencia", "avaliacao", "avaliacao__avaliado_aluno"
-    )
-
-    # Calculate overall class statistics by competency
+    # Calculate overall class statistics by competency from the grade fact table
     competencias = Competencia.objects.all()
     estatisticas_competencias = {}
 
+    medias = dict(
+        FatoNota.objects.filter(turma=turma)
+        .values("competencia_id")
+        .annotate(media=Avg("nota"))
+        .order_by()
+        .values_list("competencia_id", "media")
+    )
     for competencia in competencias:
-        notas_competencia = notas.filter(competencia=competencia)
-        if notas_competencia.exists():
-            media = notas_competencia.aggregate(Avg("nota"))["nota__avg"]
-            estatisticas_competencias[competencia.nome] = round(media, 2)
-        else:
-            estatisticas_competencias[competencia.nome] = 0
+        media = medias.get(competencia.id)
+        estatisticas_competencias[competencia.nome] = (
+            round(media, 2) if media is not None else 0
+        )
 
     # Prepare chart data for competencies
     chart_data = {
@@ -3135,29 +3319,11 @@ def notas_aluno_individual(request, turma_id, aluno_id):
     )
 
     # Calculate statistics by competency - separated by type
-    competencias = Competencia.objects.all()
-    radar_data = {
-        "labels": [c.nome for c in competencias],
-        "media_geral": [],
-        "auto_avaliacao": [],
-    }
-
-    for competencia in competencias:
-        # Overall average (all evaluations)
-        notas_comp_geral = notas.filter(competencia=competencia)
-        if notas_comp_geral.exists():
-            media_geral = notas_comp_geral.aggregate(Avg("nota"))["nota__avg"]
-            radar_data["media_geral"].append(float(media_geral))
-        else:
-            radar_data["media_geral"].append(0)
-
-        # Self-assessment average
-        notas_comp_auto = notas_auto.filter(competencia=competencia)
-        if notas_comp_auto.exists():
-            media_auto = notas_comp_auto.aggregate(Avg("nota"))["nota__avg"]
-            radar_data["auto_avaliacao"].append(float(media_auto))
-        else:
-            radar_data["auto_avaliacao"].append(0)
+    competencias = list(Competencia.objects.all())
+    radar_data = montar_radar_data(
+        agregar_notas(FatoNota.objects.filter(turma=turma, avaliado=aluno)),
+        competencias,
+    )
 
     context = {
         "turma": turma,
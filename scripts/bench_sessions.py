@@ -0,0 +1,84 @@
+"""
+Per-request database work for each SESSION_MODE.
+
+Runs against a throwaway test database: logs a student in and requests the
+profile page N times, counting SQL reads and writes per request. The "legacy"
+row is the previous configuration (db sessions saved on every request).
+
+Usage: python scripts/bench_sessions.py [requests]
+"""
+import os
+import sys
+import time
+
+import django
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'FeedBack360.settings')
+django.setup()
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment
+from django.urls import reverse
+
+from project.models import Aluno, Curso
+from project.utils import hash_password
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+MODES = {
+    'legacy': {'SESSION_ENGINE': settings.SESSION_ENGINES['db'], 'SESSION_SAVE_EVERY_REQUEST': True},
+    **{mode: {'SESSION_ENGINE': engine} for mode, engine in settings.SESSION_ENGINES.items()},
+}
+
+
+def measure(requests):
+    client = Client()
+    client.post(reverse('login'), {'email': 'bench@teste.com', 'password': '123456'})
+    url = reverse('perfil')
+    reads = writes = session_queries = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if 'django_session' in sql:
+                session_queries += 1
+            if sql.startswith(WRITES):
+                writes += 1
+            else:
+                reads += 1
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return reads / requests, writes / requests, session_queries / requests, elapsed_ms / requests
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        curso = Curso.objects.create(nome='Benchmark')
+        Aluno.objects.create(
+            nomeAluno='Bench', emailAluno='bench@teste.com',
+            senhaAluno=hash_password('123456'), matricula='B1', curso=curso,
+        )
+        print(f'{requests} GET {reverse("perfil")} per mode\n')
+        print(f'{"mode":<16}{"reads/req":>10}{"writes/req":>12}{"session SQL/req":>17}{"ms/req":>9}')
+        for mode, overrides in MODES.items():
+            cache.clear()
+            with override_settings(**overrides):
+                reads, writes, session_queries, ms = measure(requests)
+            print(f'{mode:<16}{reads:>10.2f}{writes:>12.2f}{session_queries:>17.2f}{ms:>9.2f}')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+// Select2 with the typeahead endpoints (api/buscar/...).
+// The endpoints page by cursor instead of page number, so the `proximo`
+// cursor of the last page loaded for each term is kept and sent back when
+// Select2 asks for the next page on scroll.
+function buscaSelect2(seletor, url, opcoes) {
+    var cursores = {};
+    var extras = (opcoes && opcoes.extras) || {};
+
+    return $(seletor).select2($.extend({
+        theme: 'bootstrap4',
+        width: '100%',
+        ajax: {
+            url: url,
+            dataType: 'json',
+            delay: 250,
+            data: function(params) {
+                var termo = params.term || '';
+                return $.extend({
+                    q: termo,
+                    cursor: params.page ? cursores[termo] : ''
+                }, extras);
+            },
+            processResults: function(data, params) {
+                cursores[params.term || ''] = data.proximo;
+                return {
+                    results: data.results,
+                    pagination: {more: !!data.proximo}
+                };
+            }
+        },
+        language: {
+            searching: function() { return 'Buscando...'; },
+            noResults: function() { return 'Nenhum resultado encontrado'; },
+            loadingMore: function() { return 'Carregando mais resultados...'; }
+        }
+    }, opcoes && opcoes.select2));
+}
+
+// Select2 only shows values it has an <option> for, so a preset value
+// (e.g. in an edit modal) needs its label too.
+function buscaSelecionar(seletor, id, texto) {
+    var campo = $(seletor);
+    campo.empty();
+    if (id) {
+        campo.append(new Option(texto, id, true, true));
+    }
+    campo.trigger('change');
+}